@@ -6,6 +6,7 @@ from alumno.models import Alumno
 
 class AlumnoAdmin(admin.ModelAdmin):
     list_display = ('nombre_completo', 'legajo', 'carrera', 'año_ingreso', 'activo')
+    list_select_related = ('usuario', 'carrera')
     search_fields = ('usuario__first_name', 'usuario__last_name', 'legajo', 'usuario__username')
     list_filter = ('carrera', 'año_ingreso', 'activo')
     ordering = ('usuario__last_name', 'usuario__first_name')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0001_initial'),
+        ('carrera', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumno',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['carrera'], name='alumno_activo_carrera_idx'),
+        ),
+    ]
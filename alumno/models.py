@@ -43,6 +43,9 @@ class Alumno(models.Model):
         verbose_name = 'Alumno'
         verbose_name_plural = 'Alumnos'
         ordering = ['usuario__last_name', 'usuario__first_name']
+        indexes = [
+            models.Index(fields=['carrera'], condition=models.Q(activo=True), name='alumno_activo_carrera_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_completo} (Legajo: {self.legajo})"
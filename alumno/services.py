@@ -1,9 +1,24 @@
-from django.db import IntegrityError
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group
+from django.db.models.functions import Lower
+
+from gestion_academica.services import ReportesService
 from .models import Usuario, Carrera, Alumno
 
 
+def _inicializar_proceso_hash():
+    """Prepara Django en los procesos que calculan los hashes de contraseña"""
+    django.setup()
+
 
 class AlumnoService:
     """
@@ -58,3 +73,180 @@ class AlumnoService:
             return Alumno.objects.filter(carrera=carrera, activo=True).order_by('usuario__last_name', 'usuario__first_name')
         except Carrera.DoesNotExist:
             raise ValidationError('La carrera especificada no existe')
+    
+    @staticmethod
+    def importar_alumnos(filas, tamaño_lote=500, procesos=None):
+        """
+        Importa alumnos en forma masiva a partir de un iterable de
+        (número de línea, dict con dni, nombre, apellido, email, legajo,
+        carrera, año_ingreso). El iterable se consume por lotes, la
+        unicidad se valida con una consulta por campo y lote, los hashes
+        se calculan en un pool de procesos y cada lote se inserta con
+        bulk_create en su propia transacción.
+        Retorna un resumen con los totales y las filas rechazadas.
+        """
+        try:
+            grupo = Group.objects.get(name='Alumnos')
+        except Group.DoesNotExist:
+            raise ValidationError('El grupo "Alumnos" no existe. Ejecute el comando crear_grupos')
+        
+        carreras = {c.codigo: c for c in Carrera.objects.filter(activa=True)}
+        vistos = {'dni': set(), 'email': set(), 'legajo': set()}
+        resumen = {'procesadas': 0, 'importadas': 0, 'rechazadas': []}
+        inicio = time.perf_counter()
+        
+        pool = None
+        if procesos != 1:
+            pool = ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso_hash)
+        try:
+            filas = iter(filas)
+            while True:
+                lote = list(islice(filas, tamaño_lote))
+                if not lote:
+                    break
+                resumen['procesadas'] += len(lote)
+                
+                validas = []
+                for linea, fila in lote:
+                    try:
+                        validas.append((linea, AlumnoService._normalizar_fila(fila, carreras, vistos)))
+                    except ValidationError as e:
+                        resumen['rechazadas'].append((linea, e.messages[0]))
+                
+                validas = AlumnoService._descartar_existentes(validas, resumen['rechazadas'])
+                if not validas:
+                    continue
+                
+                dnis = [datos['dni'] for _, datos in validas]
+                if pool:
+                    hashes = list(pool.map(make_password, dnis, chunksize=max(len(dnis) // 32, 1)))
+                else:
+                    hashes = [make_password(dni) for dni in dnis]
+                
+                try:
+                    AlumnoService._insertar_lote([datos for _, datos in validas], hashes, grupo)
+                    resumen['importadas'] += len(validas)
+                except IntegrityError as e:
+                    for linea, _ in validas:
+                        resumen['rechazadas'].append((linea, f'Error de integridad: {str(e)}'))
+        finally:
+            if pool:
+                pool.shutdown()
+        
+        resumen['segundos'] = time.perf_counter() - inicio
+        return resumen
+    
+    @staticmethod
+    def _texto(valor):
+        """
+        Valor de una celda como texto. Las planillas XLSX pueden traer los
+        números como float (40000000.0): los enteros se escriben sin decimales.
+        """
+        if isinstance(valor, float) and valor.is_integer():
+            valor = int(valor)
+        return str(valor or '').strip()
+    
+    @staticmethod
+    def _normalizar_fila(fila, carreras, vistos):
+        """Valida el formato de una fila y la normaliza"""
+        datos = {campo: AlumnoService._texto(fila.get(campo)) for campo in (
+            'dni', 'nombre', 'apellido', 'email', 'legajo', 'carrera', 'año_ingreso'
+        )}
+        
+        if not datos['dni'].isdigit() or len(datos['dni']) != 8:
+            raise ValidationError('El DNI debe tener exactamente 8 dígitos.')
+        if not datos['nombre'] or not datos['apellido']:
+            raise ValidationError('El nombre y el apellido son obligatorios.')
+        datos['nombre'] = datos['nombre'].title()
+        datos['apellido'] = datos['apellido'].title()
+        
+        datos['email'] = datos['email'].lower()
+        try:
+            validate_email(datos['email'])
+        except ValidationError:
+            raise ValidationError(f'Email inválido: "{datos["email"]}"')
+        
+        if not re.fullmatch(r'\d{4,10}', datos['legajo']):
+            raise ValidationError('El legajo debe tener entre 4 y 10 dígitos')
+        
+        carrera = carreras.get(datos['carrera'].upper())
+        if carrera is None:
+            raise ValidationError(f'La carrera "{datos["carrera"]}" no existe o no está activa')
+        datos['carrera'] = carrera
+        
+        try:
+            datos['año_ingreso'] = int(float(datos['año_ingreso']))
+        except (ValueError, OverflowError):
+            raise ValidationError('El año de ingreso debe ser numérico')
+        if not 2000 <= datos['año_ingreso'] <= 2030:
+            raise ValidationError('El año de ingreso debe estar entre 2000 y 2030')
+        
+        # Duplicados dentro del mismo archivo
+        for campo in ('dni', 'email', 'legajo'):
+            if datos[campo] in vistos[campo]:
+                raise ValidationError(f'{campo.upper()} {datos[campo]} repetido en el archivo')
+        for campo in ('dni', 'email', 'legajo'):
+            vistos[campo].add(datos[campo])
+        
+        return datos
+    
+    @staticmethod
+    def _descartar_existentes(validas, rechazadas):
+        """Descarta las filas cuyo DNI, email o legajo ya existen (una consulta por campo)"""
+        dnis = set(Usuario.objects.filter(
+            username__in=[d['dni'] for _, d in validas]
+        ).values_list('username', flat=True))
+        # Los emails del archivo ya están en minúsculas; los guardados pueden no estarlo
+        emails = set(Usuario.objects.annotate(email_minusculas=Lower('email')).filter(
+            email_minusculas__in=[d['email'] for _, d in validas]
+        ).values_list('email_minusculas', flat=True))
+        legajos = set(Alumno.objects.filter(
+            legajo__in=[d['legajo'] for _, d in validas]
+        ).order_by().values_list('legajo', flat=True))
+        
+        nuevas = []
+        for linea, datos in validas:
+            if datos['dni'] in dnis:
+                rechazadas.append((linea, f'Ya existe un usuario con DNI {datos["dni"]}'))
+            elif datos['email'] in emails:
+                rechazadas.append((linea, f'Ya existe un usuario con email {datos["email"]}'))
+            elif datos['legajo'] in legajos:
+                rechazadas.append((linea, f'Ya existe un alumno con legajo {datos["legajo"]}'))
+            else:
+                nuevas.append((linea, datos))
+        return nuevas
+    
+    @staticmethod
+    def _insertar_lote(filas, hashes, grupo):
+        """
+        Inserta usuarios, su grupo y alumnos de un lote en una transacción.
+        bulk_create no dispara signals: el reporte general se invalida aquí.
+        """
+        with transaction.atomic():
+            transaction.on_commit(ReportesService.invalidar_reporte_general)
+            usuarios = Usuario.objects.bulk_create([
+                Usuario(
+                    username=datos['dni'],
+                    first_name=datos['nombre'],
+                    last_name=datos['apellido'],
+                    email=datos['email'],
+                    password=password,
+                    is_active=True,
+                )
+                for datos, password in zip(filas, hashes)
+            ])
+            
+            UsuarioGrupo = Usuario.groups.through
+            UsuarioGrupo.objects.bulk_create([
+                UsuarioGrupo(usuario_id=usuario.id, group_id=grupo.id) for usuario in usuarios
+            ])
+            
+            Alumno.objects.bulk_create([
+                Alumno(
+                    usuario=usuario,
+                    legajo=datos['legajo'],
+                    carrera=datos['carrera'],
+                    año_ingreso=datos['año_ingreso'],
+                )
+                for datos, usuario in zip(filas, usuarios)
+            ])
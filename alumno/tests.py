@@ -1,3 +1,111 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from carrera.models import Carrera
+from gestion_academica.services import ReportesService
+from usuario.models import Usuario
+
+from .models import Alumno
+from .services import AlumnoService
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportarAlumnosTest(TestCase):
+
+    COLUMNAS = ['dni', 'nombre', 'apellido', 'email', 'legajo', 'carrera', 'año_ingreso']
+
+    def setUp(self):
+        self.grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        Usuario.objects.create(username='39999999', email='existente@test.com', password='x')
+
+    def fila(self, i, **cambios):
+        fila = {
+            'dni': f'{40000000 + i}', 'nombre': 'ana', 'apellido': f'pérez {i}',
+            'email': f'Alumno{i}@Test.com', 'legajo': f'{20250000 + i}',
+            'carrera': 'tp2024', 'año_ingreso': '2025',
+        }
+        fila.update(cambios)
+        return fila
+
+    def escribir_csv(self, filas):
+        archivo = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8')
+        with archivo:
+            writer = csv.DictWriter(archivo, fieldnames=self.COLUMNAS)
+            writer.writeheader()
+            writer.writerows(filas)
+        self.addCleanup(os.remove, archivo.name)
+        return archivo.name
+
+    def test_importa_y_reporta_rechazos(self):
+        filas = [self.fila(i) for i in range(5)] + [
+            self.fila(5, dni='39999999'),               # DNI ya registrado
+            self.fila(6, email='alumno0@test.com'),     # Email repetido en el archivo
+            self.fila(7, carrera='XX9999'),             # Carrera inexistente
+            self.fila(8, legajo='12'),                  # Legajo inválido
+        ]
+        salida = StringIO()
+        call_command('importar_alumnos', self.escribir_csv(filas), '--procesos', '1', stdout=salida)
+
+        self.assertIn('Alumnos importados: 5', salida.getvalue())
+        self.assertIn('Filas rechazadas: 4', salida.getvalue())
+        self.assertIn('Línea 7: Ya existe un usuario con DNI 39999999', salida.getvalue())
+
+        alumno = Alumno.objects.select_related('usuario').get(legajo='20250001')
+        self.assertEqual(alumno.nombre_completo, 'Ana Pérez 1')
+        self.assertEqual(alumno.email, 'alumno1@test.com')
+        self.assertEqual(alumno.usuario.rol, 'alumno')
+        self.assertTrue(alumno.usuario.primer_login)
+        self.assertTrue(alumno.usuario.check_password('40000001'))
+
+    def test_email_existente_sin_distinguir_mayusculas(self):
+        Usuario.objects.create(username='39999998', email='Mayusculas@Test.com', password='x')
+        resumen = AlumnoService.importar_alumnos([(2, self.fila(0, email='mayusculas@test.com'))], procesos=1)
+        self.assertEqual(resumen['importadas'], 0)
+        self.assertEqual(resumen['rechazadas'], [(2, 'Ya existe un usuario con email mayusculas@test.com')])
+
+    def test_invalida_el_reporte_general(self):
+        cache.clear()
+        self.assertEqual(ReportesService.reporte_general()['total_alumnos'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            AlumnoService.importar_alumnos([(2, self.fila(0))], procesos=1)
+        self.assertEqual(ReportesService.reporte_general()['total_alumnos'], 1)
+
+    def test_consultas_por_lote_y_no_por_alumno(self):
+        filas = ((i + 2, self.fila(i)) for i in range(200))
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = AlumnoService.importar_alumnos(filas, tamaño_lote=500, procesos=1)
+        self.assertEqual(resumen['importadas'], 200)
+        # grupo + carreras + 3 validaciones + inserts en lotes del backend
+        self.assertLess(len(consultas), 20)
+        self.assertEqual(Alumno.objects.count(), 200)
+
+    def test_celdas_numericas_de_planilla_y_pool_de_procesos(self):
+        filas = [
+            (2, self.fila(0, dni=40000000.0, legajo=20250000.0, año_ingreso=2025.0)),
+            (3, self.fila(1, dni=40000001, legajo=20250001, año_ingreso=2025)),
+            (4, self.fila(2, año_ingreso='inf')),
+            (5, self.fila(3, año_ingreso=float('nan'))),
+            (6, self.fila(4, dni=40000004.5)),
+        ]
+        resumen = AlumnoService.importar_alumnos(filas, procesos=2)
+
+        self.assertEqual(resumen['importadas'], 2)
+        self.assertEqual(resumen['rechazadas'], [
+            (4, 'El año de ingreso debe ser numérico'),
+            (5, 'El año de ingreso debe ser numérico'),
+            (6, 'El DNI debe tener exactamente 8 dígitos.'),
+        ])
+        # Los hashes calculados en los procesos del pool son válidos
+        for alumno in Alumno.objects.select_related('usuario'):
+            self.assertIn(alumno.legajo, ('20250000', '20250001'))
+            self.assertTrue(alumno.usuario.check_password(alumno.usuario.username))
@@ -6,21 +6,23 @@ from django.views.generic import (
 )
 from django.core.exceptions import ValidationError
 
+from gestion_academica.paginacion import CursorPaginationMixin
 from usuario.views import AdminRequiredMixin
 
 from .models import Alumno
 from .forms import AlumnoForm
 # Create your views here.
 
-class AlumnoListView(AdminRequiredMixin, ListView):
+class AlumnoListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """Lista todos los alumnos"""
     model = Alumno
     template_name = 'gestion_academica/alumnos/list.html'
     context_object_name = 'alumnos'
     paginate_by = 10
+    orden_cursor = ('usuario__last_name', 'usuario__first_name', 'id')
     
     def get_queryset(self):
-        return Alumno.objects.filter(activo=True).select_related('carrera', 'usuario').order_by('usuario__last_name', 'usuario__first_name')
+        return Alumno.objects.filter(activo=True).select_related('carrera', 'usuario')
 
 
 class AlumnoDetailView(AdminRequiredMixin, DetailView):
@@ -75,6 +77,9 @@ class AlumnoDeleteView(AdminRequiredMixin, DeleteView):
     template_name = 'gestion_academica/alumnos/confirm_delete.html'
     success_url = reverse_lazy('alumno_list')
     
+    def get_queryset(self):
+        return Alumno.objects.select_related('carrera', 'usuario').prefetch_related('inscripciones')
+    
     def post(self, request, *args, **kwargs):
         try:
             alumno = self.get_object()
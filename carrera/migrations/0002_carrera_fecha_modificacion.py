@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def copiar_fecha_creacion(apps, schema_editor):
+    Carrera = apps.get_model('carrera', 'Carrera')
+    Carrera.objects.update(fecha_modificacion=F('fecha_creacion'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrera', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carrera',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copiar_fecha_creacion, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ from django.views.generic import (
 )
 from django.core.exceptions import ValidationError
 
+from gestion_academica.paginacion import CursorPaginationMixin
 from usuario.views import AdminRequiredMixin
 
 from .models import Carrera
@@ -13,15 +14,16 @@ from .forms import CarreraForm
 from .services import CarreraService
 
 # Create your views here.
-class CarreraListView(AdminRequiredMixin, ListView):
+class CarreraListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """Lista todas las carreras"""
     model = Carrera
     template_name = 'gestion_academica/carreras/list.html'
     context_object_name = 'carreras'
     paginate_by = 10
+    orden_cursor = ('nombre', 'id')
     
     def get_queryset(self):
-        return Carrera.objects.filter(activa=True).order_by('nombre')
+        return Carrera.objects.filter(activa=True)
 
 
 class CarreraCreateView(AdminRequiredMixin, CreateView):
@@ -0,0 +1,223 @@
+"""
+API JSON de solo lectura para el portal de alumnos
+"""
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import F, QuerySet
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from inscripcion.services import ColaInscripcionService, InscripcionService, ListaEsperaService
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.views import AlumnoRequiredMixin
+
+from .paginacion import PaginadorCursor
+
+
+@method_decorator(gzip_page, name='dispatch')
+class ApiListView(View):
+    """
+    Listado JSON paginado por cursor.
+    Las filas se leen con values() limitadas a los campos pedidos en
+    ?fields=a,b,c (por defecto todos), sin instanciar modelos.
+    Las subclases definen `queryset` o `model`, o redefinen get_queryset().
+    """
+    # nombre publicado -> campo del modelo o expresión
+    campos = {}
+    orden = ('id',)
+    paginate_by = 50
+    queryset = None
+    model = None
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            queryset = self.queryset
+            if isinstance(queryset, QuerySet):
+                # Copia, para no compartir la caché de resultados entre requests
+                queryset = queryset.all()
+            return queryset
+        if self.model is not None:
+            return self.model._default_manager.all()
+        raise ImproperlyConfigured(
+            f'A {self.__class__.__name__} le falta el queryset. Define {self.__class__.__name__}.model, '
+            f'{self.__class__.__name__}.queryset o redefine {self.__class__.__name__}.get_queryset().'
+        )
+
+    def campos_pedidos(self):
+        pedidos = self.request.GET.get('fields')
+        if not pedidos:
+            return list(self.campos)
+        nombres = [nombre.strip() for nombre in pedidos.split(',') if nombre.strip()]
+        desconocidos = [nombre for nombre in nombres if nombre not in self.campos]
+        if desconocidos:
+            raise ValidationError(f'Campos desconocidos: {", ".join(desconocidos)}')
+        return nombres
+
+    def proyectar(self, queryset, nombres):
+        """values() con los campos pedidos más los que necesita el cursor"""
+        posicionales, expresiones = [], {}
+        del_orden = [campo.lstrip('-') for campo in self.orden]
+        for nombre in nombres + [campo for campo in del_orden if campo not in nombres]:
+            origen = self.campos.get(nombre, nombre)
+            if origen == nombre:
+                posicionales.append(nombre)
+            else:
+                expresiones[nombre] = F(origen) if isinstance(origen, str) else origen
+        return queryset.values(*posicionales, **expresiones)
+
+    def url_pagina(self, cursor):
+        if cursor is None:
+            return None
+        parametros = self.request.GET.copy()
+        parametros['cursor'] = cursor
+        return f'{self.request.path}?{parametros.urlencode()}'
+
+    def get(self, request, *args, **kwargs):
+        try:
+            nombres = self.campos_pedidos()
+            filas, cursor_anterior, cursor_siguiente = PaginadorCursor(self.orden, self.paginate_by).paginar(
+                self.proyectar(self.get_queryset(), nombres),
+                request.GET.get('cursor')
+            )
+        except ValidationError as e:
+            return JsonResponse({'error': e.messages[0]}, status=400)
+
+        return JsonResponse({
+            'resultados': [{nombre: fila[nombre] for nombre in nombres} for fila in filas],
+            'anterior': self.url_pagina(cursor_anterior),
+            'siguiente': self.url_pagina(cursor_siguiente),
+        })
+
+
+class CarrerasApiView(ApiListView):
+    """Carreras activas"""
+    campos = {
+        'id': 'id',
+        'codigo': 'codigo',
+        'nombre': 'nombre',
+        'descripcion': 'descripcion',
+        'duracion_años': 'duracion_años',
+    }
+    orden = ('nombre', 'id')
+    queryset = Carrera.objects.filter(activa=True)
+
+
+class MateriasApiView(ApiListView):
+    """
+    Materias activas con su disponibilidad de cupo.
+    Filtros: ?carrera=<id> y ?con_cupo=1
+    """
+    campos = {
+        'id': 'id',
+        'codigo': 'codigo',
+        'nombre': 'nombre',
+        'descripcion': 'descripcion',
+        'carrera_id': 'carrera_id',
+        'carrera_nombre': 'carrera__nombre',
+        'año': 'año',
+        'cuatrimestre': 'cuatrimestre',
+        'cupo_maximo': 'cupo_maximo',
+        'inscriptos_activos': 'inscriptos_activos',
+        'cupo_disponible': F('cupo_maximo') - F('inscriptos_activos'),
+    }
+    orden = ('carrera_id', 'año', 'cuatrimestre', 'nombre', 'id')
+
+    def get_queryset(self):
+        carrera_id = self.request.GET.get('carrera')
+        if carrera_id and not carrera_id.isdigit():
+            raise ValidationError('La carrera especificada no existe')
+
+        if self.request.GET.get('con_cupo') in ('1', 'true'):
+            materias = MateriaService.obtener_materias_con_cupo()
+            return materias.filter(carrera_id=carrera_id) if carrera_id else materias
+        if carrera_id:
+            return MateriaService.obtener_materias_por_carrera(carrera_id)
+        return Materia.objects.filter(activa=True)
+
+
+class MisInscripcionesApiView(AlumnoRequiredMixin, ApiListView):
+    """Inscripciones activas del alumno autenticado"""
+    campos = {
+        'id': 'id',
+        'materia_id': 'materia_id',
+        'materia_codigo': 'materia__codigo',
+        'materia_nombre': 'materia__nombre',
+        'materia_año': 'materia__año',
+        'materia_cuatrimestre': 'materia__cuatrimestre',
+        'fecha_inscripcion': 'fecha_inscripcion',
+    }
+    orden = ('-fecha_inscripcion', 'id')
+
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'No tienes permisos para acceder a este recurso.'}, status=403)
+
+    def get_queryset(self):
+        try:
+            alumno = self.request.user.perfil_alumno
+        except Alumno.DoesNotExist:
+            raise ValidationError('No se encontró información del alumno.')
+        return InscripcionService.obtener_inscripciones_alumno(alumno.id)
+
+
+class MiListaEsperaApiView(AlumnoRequiredMixin, ApiListView):
+    """
+    Lugares del alumno autenticado en listas de espera, con su posición
+    (null una vez promovido o cancelado)
+    """
+    campos = {
+        'id': 'id',
+        'materia_id': 'materia_id',
+        'materia_codigo': 'materia__codigo',
+        'materia_nombre': 'materia__nombre',
+        'estado': 'estado',
+        'posicion': 'posicion',
+        'inscripcion_id': 'inscripcion_id',
+        'fecha_alta': 'fecha_alta',
+        'fecha_modificacion': 'fecha_modificacion',
+    }
+    orden = ('-fecha_alta', 'id')
+
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'No tienes permisos para acceder a este recurso.'}, status=403)
+
+    def get_queryset(self):
+        try:
+            alumno = self.request.user.perfil_alumno
+        except Alumno.DoesNotExist:
+            raise ValidationError('No se encontró información del alumno.')
+        return ListaEsperaService.esperas_alumno(alumno.id)
+
+
+class SolicitudInscripcionApiView(AlumnoRequiredMixin, View):
+    """
+    Estado de una solicitud de inscripción encolada, para consultarlo
+    periódicamente hasta que deje de estar pendiente
+    """
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'No tienes permisos para acceder a este recurso.'}, status=403)
+
+    def get(self, request, ticket):
+        try:
+            solicitud = ColaInscripcionService.obtener_solicitud(ticket, request.user.perfil_alumno.id)
+        except (Alumno.DoesNotExist, ValidationError):
+            return JsonResponse({'error': 'La solicitud de inscripción no existe'}, status=404)
+
+        posicion = ColaInscripcionService.posicion(solicitud)
+        response = JsonResponse({
+            'ticket': solicitud.ticket,
+            'materia_id': solicitud.materia_id,
+            'materia_nombre': solicitud.materia.nombre,
+            'estado': solicitud.estado,
+            'mensaje': solicitud.mensaje,
+            'posicion': posicion,
+            'fecha_solicitud': solicitud.fecha_solicitud,
+            'fecha_proceso': solicitud.fecha_proceso,
+        })
+        if posicion is not None:
+            response['Retry-After'] = '1'
+        return response
@@ -14,15 +14,29 @@ class FiltroMateriaForm(forms.Form):
 
 class FiltroAlumnoMateriaForm(forms.Form):
     alumno = forms.ModelChoiceField(
-        queryset=Alumno.objects.filter(activo=True),
+        queryset=Alumno.objects.filter(activo=True).select_related('usuario'),
         empty_label="Seleccionar alumno",
         required=False,
         label="Ver materias del alumno"
     )
     
     materia = forms.ModelChoiceField(
-        queryset=Materia.objects.filter(activa=True),
+        queryset=Materia.objects.filter(activa=True).select_related('carrera'),
         empty_label="Seleccionar materia",
         required=False,
         label="Ver alumnos de la materia"
     )
+
+
+class ExportacionForm(FiltroMateriaForm):
+    formato = forms.ChoiceField(
+        choices=[('csv', 'CSV'), ('json', 'JSON')],
+        required=False,
+        label="Formato"
+    )
+    
+    estado = forms.ChoiceField(
+        choices=[('activos', 'Solo activos'), ('inactivos', 'Solo inactivos'), ('todos', 'Todos')],
+        required=False,
+        label="Estado"
+    )
@@ -0,0 +1,164 @@
+"""
+Comando para comparar el rendimiento de las inscripciones concurrentes
+con la configuración de SQLite por defecto y con el perfil de producción
+(ver SQLITE_PERFIL_PRODUCCION)
+"""
+
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from inscripcion.services import InscripcionService
+from materia.models import Materia
+from myapp.estadisticas import columna_ms, percentil
+from usuario.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        'Inscribe alumnos desde varios hilos, con lectores concurrentes, sobre una base '
+        'SQLite temporal con la configuración por defecto y con el perfil de producción'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alumnos', type=int, default=2000, help='Inscripciones por escenario (por defecto 2000)')
+        parser.add_argument('--materias', type=int, default=10, help='Materias entre las que se reparten (por defecto 10)')
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos que inscriben (por defecto 8)')
+        parser.add_argument('--lectores', type=int, default=2, help='Hilos que leen a la vez (por defecto 2)')
+
+    def handle(self, *args, **options):
+        if min(options['alumnos'], options['materias'], options['hilos']) < 1 or options['lectores'] < 0:
+            raise CommandError('--alumnos, --materias y --hilos deben ser positivos')
+
+        escenarios = {
+            'por defecto': {},
+            'producción': settings.SQLITE_PERFIL_PRODUCCION,
+        }
+        self.stdout.write(
+            f'{options["alumnos"]} inscripciones en {options["materias"]} materias, '
+            f'{options["hilos"]} hilos escribiendo y {options["lectores"]} leyendo'
+        )
+
+        resultados = {}
+        for nombre, opciones in escenarios.items():
+            with _base_temporal(opciones):
+                alumnos, materias = self._preparar(options['alumnos'], options['materias'])
+                resultados[nombre] = self._cargar(alumnos, materias, options['hilos'], options['lectores'])
+
+        self.stdout.write(
+            f'\n{"Perfil":<14}{"insc/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"máx ms":>10}'
+            f'{"bloqueos":>10}{"lect/s":>10}'
+        )
+        for nombre, (segundos, latencias, bloqueos, lecturas) in resultados.items():
+            latencias.sort()
+            self.stdout.write(
+                f'{nombre:<14}{len(latencias) / segundos:>10.1f}'
+                f'{columna_ms(percentil(latencias, 50))}{columna_ms(percentil(latencias, 95))}'
+                f'{columna_ms(latencias[-1] if latencias else None)}{bloqueos:>10}{lecturas / segundos:>10.1f}'
+            )
+        self.stdout.write(
+            'bloqueos: inscripciones que fallaron con "database is locked" (el alumno tendría que reintentar)'
+        )
+
+    def _preparar(self, cantidad, cantidad_materias):
+        carrera = Carrera.objects.create(nombre='Carrera de prueba', codigo='BENCH', duracion_años=3)
+        materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'BENCH{i:03d}', carrera=carrera,
+                año=1, cuatrimestre=1, cupo_maximo=cantidad
+            ).id
+            for i in range(cantidad_materias)
+        ]
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(username=f'{40000000 + i}', email=f'bench{i}@test.com', password='x')
+            for i in range(cantidad)
+        ])
+        alumnos = Alumno.objects.bulk_create([
+            Alumno(usuario=usuario, legajo=f'{90000000 + i}', carrera=carrera, año_ingreso=2024)
+            for i, usuario in enumerate(usuarios)
+        ])
+        return [alumno.id for alumno in alumnos], materias
+
+    def _cargar(self, alumnos, materias, hilos, lectores):
+        """
+        Retorna (segundos, latencias en ms de las inscripciones exitosas,
+        inscripciones bloqueadas, lecturas completadas)
+        """
+        latencias, bloqueos, lecturas = [], [0], [0]
+        escribiendo = threading.Event()
+        escribiendo.set()
+        barrera = threading.Barrier(hilos + lectores)
+
+        def inscribir(pares):
+            try:
+                barrera.wait()
+                for alumno_id, materia_id in pares:
+                    inicio = time.perf_counter()
+                    try:
+                        InscripcionService.inscribir_alumno(alumno_id, materia_id)
+                        latencias.append((time.perf_counter() - inicio) * 1000)
+                    except OperationalError:
+                        bloqueos[0] += 1
+                    except ValidationError:
+                        pass
+            finally:
+                connection.close()
+
+        def leer():
+            try:
+                barrera.wait()
+                while escribiendo.is_set():
+                    try:
+                        list(Materia.objects.filter(id__in=materias).values('id', 'inscriptos_activos'))
+                        lecturas[0] += 1
+                    except OperationalError:
+                        pass
+            finally:
+                connection.close()
+
+        pares = [(alumno_id, materias[i % len(materias)]) for i, alumno_id in enumerate(alumnos)]
+        escritores = [threading.Thread(target=inscribir, args=(pares[n::hilos],)) for n in range(hilos)]
+        lectura = [threading.Thread(target=leer) for _ in range(lectores)]
+
+        inicio = time.perf_counter()
+        for hilo in escritores + lectura:
+            hilo.start()
+        for hilo in escritores:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+        escribiendo.clear()
+        for hilo in lectura:
+            hilo.join()
+        return segundos, latencias, bloqueos[0], lecturas[0]
+
+
+@contextmanager
+def _base_temporal(opciones):
+    """
+    Apunta la conexión 'default' a una base SQLite nueva, migrada y con
+    las OPTIONS dadas, mientras dura el bloque
+    """
+    original = connections.settings['default']
+    with tempfile.TemporaryDirectory() as directorio:
+        _reconectar({**original, 'NAME': str(Path(directorio) / 'comparar.sqlite3'), 'OPTIONS': dict(opciones)})
+        try:
+            call_command('migrate', verbosity=0)
+            yield
+        finally:
+            _reconectar(original)
+
+
+def _reconectar(configuracion):
+    connection.close()
+    del connections['default']
+    connections.settings['default'] = configuracion
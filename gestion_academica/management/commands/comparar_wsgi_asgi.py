@@ -0,0 +1,211 @@
+"""
+Comando para comparar, con muchas peticiones concurrentes, el handler WSGI
+(vistas sincrónicas) con el ASGI (vistas asíncronas, ver VISTAS_ASYNC).
+Los handlers se ejecutan en este mismo proceso, sin un servidor delante.
+"""
+
+import asyncio
+import importlib
+import io
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import clear_url_caches
+
+from myapp.estadisticas import columna_ms, percentil
+from usuario.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta en este proceso los handlers WSGI y ASGI del proyecto con muchas '
+        'peticiones concurrentes y compara rendimiento y latencias. No levanta '
+        'servidores: no mide gunicorn ni uvicorn bajo carga real'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ruta',
+            action='append',
+            help='Ruta a pedir (se puede repetir; por defecto /materias-publicas/)',
+        )
+        parser.add_argument('--conexiones', type=int, default=1000, help='Conexiones concurrentes (por defecto 1000)')
+        parser.add_argument('--peticiones', type=int, default=5000, help='Total de peticiones por escenario')
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=32,
+            help='Hilos del servidor WSGI simulado, como los workers de un servidor por hilos (por defecto 32)',
+        )
+        parser.add_argument('--email', help='Usuario con el que se autentican las peticiones')
+
+    def handle(self, *args, **options):
+        if options['conexiones'] < 1 or options['peticiones'] < 1 or options['hilos'] < 1:
+            raise CommandError('--conexiones, --peticiones y --hilos deben ser positivos')
+
+        rutas = options['ruta'] or ['/materias-publicas/']
+        cookie = self._cookie_sesion(options['email']) if options['email'] else ''
+
+        self.stdout.write(
+            f'{options["peticiones"]} peticiones, {options["conexiones"]} conexiones concurrentes, '
+            f'rutas: {", ".join(rutas)}'
+        )
+        resultados = {
+            f'WSGI ({options["hilos"]} hilos)': self._escenario(False, lambda: self._cargar_wsgi(rutas, cookie, options)),
+            'ASGI': self._escenario(True, lambda: self._cargar_asgi(rutas, cookie, options)),
+        }
+
+        self.stdout.write(
+            f'\n{"Escenario":<18}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"máx ms":>10}  estados'
+        )
+        for nombre, (segundos, latencias, estados) in resultados.items():
+            latencias.sort()
+            self.stdout.write(
+                f'{nombre:<18}{len(latencias) / segundos:>10.1f}'
+                f'{columna_ms(percentil(latencias, 50))}{columna_ms(percentil(latencias, 95))}'
+                f'{columna_ms(percentil(latencias, 99))}{columna_ms(latencias[-1] if latencias else None)}  '
+                + ', '.join(f'{estado}: {cantidad}' for estado, cantidad in sorted(estados.items()))
+            )
+
+    def _cookie_sesion(self, email):
+        try:
+            usuario = Usuario.objects.get(email__iexact=email)
+        except Usuario.DoesNotExist:
+            raise CommandError(f'El usuario "{email}" no existe')
+        cliente = Client()
+        cliente.force_login(usuario)
+        return f'{settings.SESSION_COOKIE_NAME}={cliente.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    def _escenario(self, vistas_async, cargar):
+        """Ejecuta cargar() con las URLs resueltas a las vistas sincrónicas o asíncronas"""
+        with override_settings(VISTAS_ASYNC=vistas_async):
+            _recargar_urls()
+            try:
+                inicio = time.perf_counter()
+                latencias, estados = asyncio.run(cargar())
+                return time.perf_counter() - inicio, latencias, estados
+            finally:
+                _recargar_urls()
+
+    async def _cargar_wsgi(self, rutas, cookie, options):
+        """
+        Las conexiones esperan en la cola del servidor hasta que uno de sus
+        hilos queda libre, como en un servidor WSGI por hilos.
+        """
+        handler = WSGIHandler()
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=options['hilos']) as hilos:
+            async def pedir(ruta):
+                return await loop.run_in_executor(hilos, _pedir_wsgi, handler, ruta, cookie)
+            return await _generar_carga(pedir, rutas, options['conexiones'], options['peticiones'])
+
+    async def _cargar_asgi(self, rutas, cookie, options):
+        handler = ASGIHandler()
+
+        async def pedir(ruta):
+            return await _pedir_asgi(handler, ruta, cookie)
+        return await _generar_carga(pedir, rutas, options['conexiones'], options['peticiones'])
+
+
+async def _generar_carga(pedir, rutas, conexiones, peticiones):
+    """
+    Cada conexión pide la siguiente ruta apenas recibe la respuesta anterior,
+    hasta completar el total de peticiones.
+    Retorna (latencias en ms, cantidad de respuestas por estado HTTP).
+    """
+    latencias, estados = [], Counter()
+    pendientes = iter(range(peticiones))
+
+    async def conexion():
+        for numero in pendientes:
+            inicio = time.perf_counter()
+            estado = await pedir(rutas[numero % len(rutas)])
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            estados[estado] += 1
+
+    await asyncio.gather(*(conexion() for _ in range(min(conexiones, peticiones))))
+    return latencias, estados
+
+
+def _pedir_wsgi(handler, ruta, cookie):
+    partes = urlsplit(ruta)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': partes.path,
+        'QUERY_STRING': partes.query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': cookie,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    estado = []
+    respuesta = handler(environ, lambda status, headers, exc_info=None: estado.append(int(status.split()[0])))
+    try:
+        for _ in respuesta:
+            pass
+    finally:
+        respuesta.close()
+    return estado[0]
+
+
+async def _pedir_asgi(handler, ruta, cookie):
+    partes = urlsplit(ruta)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': partes.path,
+        'raw_path': partes.path.encode(),
+        'query_string': partes.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    cuerpo_enviado, terminada = False, asyncio.Event()
+    estado = []
+
+    async def recibir():
+        nonlocal cuerpo_enviado
+        if not cuerpo_enviado:
+            cuerpo_enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El cliente se desconecta recién después de recibir la respuesta
+        await terminada.wait()
+        return {'type': 'http.disconnect'}
+
+    async def enviar(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado.append(mensaje['status'])
+        elif mensaje['type'] == 'http.response.body' and not mensaje.get('more_body'):
+            terminada.set()
+
+    await handler(scope, recibir, enviar)
+    return estado[0]
+
+
+def _recargar_urls():
+    """Vuelve a importar las URLs para que tomen el valor actual de VISTAS_ASYNC"""
+    clear_url_caches()
+    importlib.reload(importlib.import_module('gestion_academica.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
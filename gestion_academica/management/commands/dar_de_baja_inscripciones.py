@@ -0,0 +1,103 @@
+"""
+Comando para dar de baja en bloque las inscripciones de una materia,
+una carrera y/o un cuatrimestre (por ejemplo, al cerrar un cuatrimestre)
+"""
+
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from carrera.models import Carrera
+from inscripcion.services import InscripcionService
+from materia.models import Materia
+
+
+class Command(BaseCommand):
+    help = 'Da de baja las inscripciones activas de una materia, una carrera y/o un cuatrimestre'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--materia',
+            help='Código de la materia (junto con --carrera si el código se repite en otras carreras)',
+        )
+        parser.add_argument('--carrera', help='Código de la carrera')
+        parser.add_argument('--cuatrimestre', type=int, choices=[1, 2], help='Cuatrimestre de las materias')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Inscripciones por transacción (por defecto 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa cuántas inscripciones se darían de baja, sin modificarlas',
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser positivo')
+
+        carrera_id = self._buscar(Carrera, options['carrera'], 'La carrera')
+        criterios = {
+            'materia_id': self._buscar_materia(options['materia'], carrera_id),
+            'carrera_id': carrera_id,
+            'cuatrimestre': options['cuatrimestre'],
+        }
+
+        inicio = time.perf_counter()
+        try:
+            inscripciones = InscripcionService.inscripciones_a_dar_de_baja(**criterios)
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        if options['dry_run']:
+            por_materia = inscripciones.values('materia__codigo', 'materia__nombre').annotate(
+                cantidad=Count('id')
+            ).order_by('materia__codigo')
+            total = 0
+            for materia in por_materia:
+                total += materia['cantidad']
+                self.stdout.write(f'{materia["materia__nombre"]} ({materia["materia__codigo"]}): {materia["cantidad"]}')
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(self.style.WARNING(
+                f'{total} inscripciones se darían de baja (sin cambios por --dry-run, {segundos:.2f} s).'
+            ))
+            return
+
+        total = InscripcionService.dar_de_baja_masivo(tamaño_lote=options['lote'], **criterios)
+        segundos = time.perf_counter() - inicio
+        por_segundo = total / segundos if segundos else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'¡{total} inscripciones dadas de baja en {segundos:.2f} s ({por_segundo:.0f} por segundo)!'
+        ))
+
+    @staticmethod
+    def _buscar(modelo, codigo, nombre):
+        if not codigo:
+            return None
+        try:
+            return modelo.objects.get(codigo__iexact=codigo).id
+        except modelo.DoesNotExist:
+            raise CommandError(f'{nombre} "{codigo}" no existe')
+
+    @staticmethod
+    def _buscar_materia(codigo, carrera_id):
+        """El código de materia sólo es único dentro de cada carrera"""
+        if not codigo:
+            return None
+        materias = Materia.objects.filter(codigo__iexact=codigo)
+        if carrera_id is not None:
+            materias = materias.filter(carrera_id=carrera_id)
+        try:
+            return materias.get().id
+        except Materia.DoesNotExist:
+            raise CommandError(f'La materia "{codigo}" no existe' + (' en esa carrera' if carrera_id else ''))
+        except Materia.MultipleObjectsReturned:
+            carreras = materias.order_by('carrera__codigo').values_list('carrera__codigo', flat=True)
+            raise CommandError(
+                f'La materia "{codigo}" existe en varias carreras ({", ".join(carreras)}): '
+                'indica cuál con --carrera'
+            )
@@ -0,0 +1,56 @@
+"""
+Comando para exportar alumnos, materias o inscripciones en CSV o JSON
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from carrera.models import Carrera
+from gestion_academica.services import ExportacionService
+
+
+class Command(BaseCommand):
+    help = 'Exporta alumnos, materias o inscripciones en CSV o JSON sin cargarlos en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidad', choices=sorted(ExportacionService.ENTIDADES))
+        parser.add_argument('--formato', choices=['csv', 'json'], default='csv')
+        parser.add_argument('--carrera', help='Código de la carrera a filtrar')
+        parser.add_argument(
+            '--estado',
+            choices=['activos', 'inactivos', 'todos'],
+            default='activos',
+            help='Registros a exportar según su estado (por defecto, activos)',
+        )
+        parser.add_argument('--salida', help='Archivo de destino (por defecto, la salida estándar)')
+
+    def handle(self, *args, **options):
+        carrera_id = None
+        if options['carrera']:
+            try:
+                carrera_id = Carrera.objects.get(codigo__iexact=options['carrera']).id
+            except Carrera.DoesNotExist:
+                raise CommandError(f'La carrera "{options["carrera"]}" no existe')
+
+        generar = ExportacionService.generar_json if options['formato'] == 'json' else ExportacionService.generar_csv
+        contenido = generar(options['entidad'], carrera_id=carrera_id, estado=options['estado'])
+
+        inicio = time.perf_counter()
+        if options['salida']:
+            with open(options['salida'], 'w', newline='', encoding='utf-8') as salida:
+                lineas = self._escribir(contenido, salida.write)
+            segundos = time.perf_counter() - inicio
+            self.stderr.write(self.style.SUCCESS(
+                f'✓ {lineas} líneas exportadas a {options["salida"]} en {segundos:.2f} s'
+            ))
+        else:
+            self._escribir(contenido, lambda fragmento: self.stdout.write(fragmento, ending=''))
+
+    @staticmethod
+    def _escribir(contenido, escribir):
+        lineas = 0
+        for fragmento in contenido:
+            escribir(fragmento)
+            lineas += 1
+        return lineas
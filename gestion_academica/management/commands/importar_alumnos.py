@@ -0,0 +1,106 @@
+"""
+Comando para importar alumnos en forma masiva desde un archivo CSV o XLSX
+"""
+
+import csv
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from alumno.services import AlumnoService
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa alumnos desde un archivo CSV o XLSX con las columnas '
+        'dni, nombre, apellido, email, legajo, carrera (código) y año_ingreso'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta al archivo .csv o .xlsx')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Cantidad de filas por transacción (por defecto 500)',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=None,
+            help='Procesos para calcular los hashes de contraseña (por defecto, uno por CPU)',
+        )
+        parser.add_argument(
+            '--delimitador',
+            default=',',
+            help='Separador de columnas del CSV (por defecto ",")',
+        )
+        parser.add_argument(
+            '--rechazados',
+            help='Archivo CSV donde guardar las filas rechazadas y el motivo',
+        )
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not os.path.exists(archivo):
+            raise CommandError(f'El archivo "{archivo}" no existe')
+
+        if archivo.lower().endswith('.xlsx'):
+            filas = self._leer_xlsx(archivo)
+        else:
+            filas = self._leer_csv(archivo, options['delimitador'])
+
+        self.stdout.write(f'Importando alumnos desde {archivo}...')
+        try:
+            resumen = AlumnoService.importar_alumnos(
+                filas,
+                tamaño_lote=options['lote'],
+                procesos=options['procesos'],
+            )
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        for linea, motivo in resumen['rechazadas']:
+            self.stdout.write(self.style.WARNING(f'✗ Línea {linea}: {motivo}'))
+
+        if options['rechazados'] and resumen['rechazadas']:
+            with open(options['rechazados'], 'w', newline='', encoding='utf-8') as salida:
+                writer = csv.writer(salida)
+                writer.writerow(['linea', 'motivo'])
+                writer.writerows(resumen['rechazadas'])
+
+        segundos = resumen['segundos']
+        throughput = resumen['importadas'] / segundos if segundos else 0
+        self.stdout.write('\n--- RESUMEN DE IMPORTACIÓN ---')
+        self.stdout.write(f'Filas procesadas: {resumen["procesadas"]}')
+        self.stdout.write(f'Alumnos importados: {resumen["importadas"]}')
+        self.stdout.write(f'Filas rechazadas: {len(resumen["rechazadas"])}')
+        self.stdout.write(f'Tiempo: {segundos:.2f} s ({throughput:.1f} alumnos/s)')
+        self.stdout.write(self.style.SUCCESS('¡Importación finalizada!'))
+
+    def _leer_csv(self, archivo, delimitador):
+        with open(archivo, newline='', encoding='utf-8-sig') as entrada:
+            reader = csv.DictReader(entrada, delimiter=delimitador)
+            reader.fieldnames = [self._normalizar_columna(c) for c in reader.fieldnames or []]
+            for fila in reader:
+                yield reader.line_num, fila
+
+    def _leer_xlsx(self, archivo):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise CommandError('Para importar archivos .xlsx instale openpyxl (pip install openpyxl)')
+
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            columnas = [self._normalizar_columna(str(c or '')) for c in next(filas, ())]
+            for linea, valores in enumerate(filas, start=2):
+                yield linea, dict(zip(columnas, valores))
+        finally:
+            libro.close()
+
+    @staticmethod
+    def _normalizar_columna(nombre):
+        return nombre.strip().lower().replace(' ', '_')
@@ -0,0 +1,80 @@
+"""
+Comando worker de la cola de inscripciones (ver ColaInscripcionService)
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from inscripcion.services import ColaInscripcionService
+
+logger = logging.getLogger('gestion.inscripciones')
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica en orden de llegada las solicitudes de inscripción encoladas. '
+        'Debe ejecutarse un único worker a la vez.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help='Solicitudes por transacción (por defecto 100)')
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=0.5,
+            help='Segundos de espera cuando la cola está vacía (por defecto 0.5)',
+        )
+        parser.add_argument(
+            '--metricas-cada',
+            type=float,
+            default=30,
+            help='Segundos entre cada informe de rendimiento (por defecto 30)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Vacía la cola y termina, en lugar de quedar esperando solicitudes nuevas',
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser positivo')
+
+        self.stdout.write('Procesando solicitudes de inscripción...')
+        total, ultimo_informe = 0, time.monotonic()
+        try:
+            while True:
+                try:
+                    procesadas = ColaInscripcionService.procesar_pendientes(options['lote'])
+                except OperationalError:
+                    # Base bloqueada o conexión perdida: el lote se revirtió
+                    # completo y se reintenta con una conexión nueva
+                    logger.exception('Error de base de datos procesando la cola; se reintenta')
+                    connection.close()
+                    time.sleep(options['intervalo'])
+                    continue
+                total += procesadas
+
+                if time.monotonic() - ultimo_informe >= options['metricas_cada']:
+                    self._informar(options['metricas_cada'])
+                    ultimo_informe = time.monotonic()
+
+                if not procesadas:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} solicitudes procesadas'))
+
+    def _informar(self, ventana):
+        metricas = ColaInscripcionService.metricas(max(int(ventana), 1))
+        espera = metricas['espera_ms']
+        self.stdout.write(
+            f'{metricas["por_segundo"]} solicitudes/s, {metricas["pendientes"]} pendientes, '
+            f'espera p50 {espera["p50"]} ms, p95 {espera["p95"]} ms, p99 {espera["p99"]} ms'
+        )
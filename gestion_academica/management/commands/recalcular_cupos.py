@@ -0,0 +1,53 @@
+"""
+Comando para reparar el contador de inscriptos activos de las materias
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from materia.models import Materia
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el contador de inscriptos activos de cada materia a partir de las inscripciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa las diferencias, sin corregirlas',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Verificando contadores de inscriptos...')
+
+        materias = Materia.objects.annotate(
+            activas=Count('inscripciones', filter=Q(inscripciones__activa=True))
+        ).select_related('carrera').order_by('carrera__nombre', 'nombre')
+
+        desfasadas = []
+        for materia in materias:
+            if materia.inscriptos_activos != materia.activas:
+                desfasadas.append(materia.id)
+                self.stdout.write(
+                    f'✗ {materia.nombre} ({materia.codigo}): '
+                    f'contador {materia.inscriptos_activos}, inscripciones activas {materia.activas}'
+                )
+
+        if not desfasadas:
+            self.stdout.write(self.style.SUCCESS('Todos los contadores están al día.'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'{len(desfasadas)} materias con diferencias (sin cambios por --dry-run).')
+            )
+            return
+
+        with transaction.atomic():
+            Materia.recalcular_inscriptos(desfasadas)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'¡{len(desfasadas)} contadores recalculados exitosamente!')
+        )
@@ -0,0 +1,80 @@
+"""
+Comando para resumir los perfiles de requests guardados por
+PerfiladoMiddleware (ver myapp/perfilado.py)
+"""
+
+import pstats
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.perfilado import directorio_perfiles, nombre_url
+
+ORDENES = {
+    'propio': 2,      # tiempo dentro de la función, sin lo que llama
+    'acumulado': 3,   # tiempo de la función y de todo lo que llama
+    'llamadas': 1,
+}
+
+
+class Command(BaseCommand):
+    help = 'Muestra las funciones que más tiempo consumieron sumando todos los perfiles de requests guardados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', help='Directorio de los perfiles (por defecto PERFILADO_DIRECTORIO)')
+        parser.add_argument('--url', help='Sólo los perfiles de este nombre de URL')
+        parser.add_argument('--top', type=int, default=25, help='Funciones a mostrar (por defecto 25)')
+        parser.add_argument(
+            '--orden',
+            choices=list(ORDENES),
+            default='propio',
+            help='propio: tiempo en la función; acumulado: incluye lo que llama (por defecto propio)',
+        )
+
+    def handle(self, *args, **options):
+        if options['top'] < 1:
+            raise CommandError('--top debe ser positivo')
+
+        directorio = Path(options['directorio']) if options['directorio'] else directorio_perfiles()
+        archivos = sorted(directorio.glob('*.prof'))
+        if options['url']:
+            archivos = [archivo for archivo in archivos if nombre_url(archivo) == options['url']]
+        if not archivos:
+            raise CommandError(f'No hay perfiles en {directorio}')
+
+        estadisticas = pstats.Stats(*map(str, archivos)).stats
+        por_url = Counter(nombre_url(archivo) or '?' for archivo in archivos)
+        self.stdout.write(
+            f'{len(archivos)} perfiles: '
+            + ', '.join(f'{nombre} ({cantidad})' for nombre, cantidad in por_url.most_common())
+        )
+
+        indice = ORDENES[options['orden']]
+        filas = sorted(estadisticas.items(), key=lambda item: item[1][indice], reverse=True)[:options['top']]
+        self.stdout.write(
+            f'\n{"llamadas":>10}{"propio ms":>12}{"acumulado ms":>14}{"ms/perfil":>11}  función'
+        )
+        for funcion, (_, llamadas, propio, acumulado, _) in filas:
+            por_perfil = (propio if indice == 2 else acumulado) * 1000 / len(archivos)
+            self.stdout.write(
+                f'{llamadas:>10}{propio * 1000:>12.1f}{acumulado * 1000:>14.1f}{por_perfil:>11.1f}  '
+                f'{_describir(funcion)}'
+            )
+
+        total = sum(propio for _, _, propio, _, _ in estadisticas.values())
+        self.stdout.write(f'\nTiempo total perfilado: {total * 1000:.1f} ms ({total * 1000 / len(archivos):.1f} ms por perfil)')
+
+
+def _describir(funcion):
+    """archivo:línea(función), con la ruta relativa al proyecto o al paquete instalado"""
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        return nombre
+    ruta = Path(archivo)
+    if 'site-packages' in ruta.parts:
+        archivo = '/'.join(ruta.parts[ruta.parts.index('site-packages') + 1:])
+    elif ruta.is_relative_to(settings.BASE_DIR):
+        archivo = str(ruta.relative_to(settings.BASE_DIR))
+    return f'{archivo}:{linea}({nombre})'
@@ -0,0 +1,212 @@
+"""
+Paginación por cursor (keyset) para los listados del panel y la API
+"""
+
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class PaginaCursor:
+    """Página de un listado paginado por cursor"""
+
+    def __init__(self, object_list, cursor_anterior, cursor_siguiente, total_aproximado, parametros, nombre_parametro):
+        self.object_list = object_list
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+        self.total_aproximado = total_aproximado
+        self._parametros = parametros
+        self._nombre_parametro = nombre_parametro
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def _url(self, cursor):
+        parametros = self._parametros.copy()
+        parametros.pop(self._nombre_parametro, None)
+        parametros.pop('page', None)
+        if cursor:
+            parametros[self._nombre_parametro] = cursor
+        return f'?{parametros.urlencode()}'
+
+    @property
+    def url_primera(self):
+        return self._url(None)
+
+    @property
+    def url_anterior(self):
+        return self._url(self.cursor_anterior)
+
+    @property
+    def url_siguiente(self):
+        return self._url(self.cursor_siguiente)
+
+
+class PaginadorCursor:
+    """
+    Paginación por cursor sobre un orden fijo.
+
+    Cada página se obtiene filtrando a partir de la última fila mostrada
+    (WHERE sobre orden) en lugar de con OFFSET, así que una página
+    profunda cuesta lo mismo que la primera. orden debe terminar en un
+    campo único (normalmente 'id') y ninguno de sus campos puede ser
+    nulo. Acepta querysets de instancias o de values(); en este último
+    caso la proyección debe incluir los campos del orden.
+    """
+
+    def __init__(self, orden, tamaño):
+        self.orden = tuple(orden)
+        self.tamaño = tamaño
+
+    def paginar(self, queryset, cursor=None):
+        """
+        Retorna (filas, cursor_anterior, cursor_siguiente).
+        Lanza ValidationError si el cursor no es válido.
+        """
+        valores, hacia_atras = None, False
+        if cursor:
+            valores, hacia_atras = self._decodificar_cursor(queryset.model, cursor)
+
+        filas, hay_mas = self._obtener_filas(queryset, valores, hacia_atras)
+        if hacia_atras and not hay_mas:
+            # Al volver hasta el principio se muestra la primera página completa
+            valores, hacia_atras = None, False
+            filas, hay_mas = self._obtener_filas(queryset, None, False)
+
+        if hacia_atras:
+            hay_anterior, hay_siguiente = hay_mas, True
+        else:
+            hay_anterior, hay_siguiente = valores is not None, hay_mas
+
+        return (
+            filas,
+            self._codificar_cursor(filas[0], True) if hay_anterior and filas else None,
+            self._codificar_cursor(filas[-1], False) if hay_siguiente and filas else None,
+        )
+
+    def _obtener_filas(self, queryset, valores, hacia_atras):
+        orden = [_invertir(campo) for campo in self.orden] if hacia_atras else list(self.orden)
+        queryset = queryset.order_by(*orden)
+        if valores is not None:
+            queryset = queryset.filter(_filtro_desde(orden, valores))
+
+        # Una fila de más indica si hay otra página sin necesidad de contar
+        filas = list(queryset[:self.tamaño + 1])
+        hay_mas = len(filas) > self.tamaño
+        filas = filas[:self.tamaño]
+        if hacia_atras:
+            filas.reverse()
+        return filas, hay_mas
+
+    def _codificar_cursor(self, fila, hacia_atras):
+        valores = []
+        for campo in self.orden:
+            campo = campo.lstrip('-')
+            if isinstance(fila, dict):
+                valor = fila[campo]
+            else:
+                valor = reduce(getattr, campo.split('__'), fila)
+            if isinstance(valor, (datetime.date, datetime.time)):
+                valor = valor.isoformat()
+            valores.append(valor)
+        contenido = json.dumps({'v': valores, 'a': hacia_atras}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(contenido.encode()).decode().rstrip('=')
+
+    def _decodificar_cursor(self, modelo, cursor):
+        try:
+            contenido = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            valores = contenido['v']
+            if len(valores) != len(self.orden):
+                raise ValueError
+            valores = [
+                _resolver_campo(modelo, campo.lstrip('-')).to_python(valor)
+                for campo, valor in zip(self.orden, valores)
+            ]
+            return valores, bool(contenido.get('a'))
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise ValidationError('Cursor de paginación inválido')
+
+
+class CursorPaginationMixin:
+    """
+    Reemplaza el Paginator por desplazamiento de ListView por un
+    PaginadorCursor sobre orden_cursor. El total se toma de un COUNT
+    cacheado, así que una página profunda no ejecuta ni OFFSET ni COUNT.
+    """
+    orden_cursor = ('id',)
+    parametro_cursor = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            filas, cursor_anterior, cursor_siguiente = PaginadorCursor(self.orden_cursor, page_size).paginar(
+                queryset, self.request.GET.get(self.parametro_cursor)
+            )
+        except ValidationError:
+            raise Http404('Página inválida')
+
+        pagina = PaginaCursor(
+            filas,
+            cursor_anterior,
+            cursor_siguiente,
+            self._total_aproximado(queryset),
+            self.request.GET,
+            self.parametro_cursor,
+        )
+        return None, pagina, filas, pagina.has_other_pages()
+
+    def _total_aproximado(self, queryset):
+        """Total del listado, recalculado como mucho una vez por TTL para cada filtro"""
+        sql, parametros = queryset.order_by().query.sql_with_params()
+        clave = 'paginacion:total:' + hashlib.md5(f'{sql}{parametros}'.encode()).hexdigest()
+        return cache.get_or_set(
+            clave,
+            queryset.count,
+            getattr(settings, 'PAGINACION_TOTAL_CACHE_TTL', 60)
+        )
+
+
+def _invertir(campo):
+    return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+
+def _resolver_campo(modelo, ruta):
+    *relaciones, nombre = ruta.split('__')
+    for relacion in relaciones:
+        modelo = modelo._meta.get_field(relacion).related_model
+    return modelo._meta.get_field(nombre)
+
+
+def _filtro_desde(orden, valores):
+    """
+    Condición "fila posterior a valores" según orden:
+    (a > va) OR (a = va AND b > vb) OR ...
+    """
+    condicion = Q()
+    iguales = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        condicion |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+        iguales[nombre] = valor
+    return condicion
@@ -3,12 +3,25 @@ Servicios para la lógica de negocio del sistema académico.
 Implementa la separación de capas y abstracción de la lógica.
 """
 
+import csv
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CharField, DateTimeField, F, Func, IntegerField, Prefetch, Value
+from django.utils import timezone
 
 from carrera.models import Carrera
 from materia.models import Materia
 from alumno.models import Alumno
 from usuario.models import Usuario
 from inscripcion.models import Inscripcion
+from myapp.replica import lectura_en_replica, registrar_invalidacion
 
 
 class ReportesService:
@@ -16,30 +29,289 @@ class ReportesService:
     Servicio para generar reportes y consultas específicas
     """
     
+    CACHE_KEY_REPORTE_GENERAL = 'reportes:general'
+    
     @staticmethod
+    @lectura_en_replica(cache_llenada='reporte_general')
     def reporte_general():
         """
-        Genera un reporte general del sistema
+        Genera un reporte general del sistema.
+        El resultado se guarda en caché y se invalida ante cambios
+        en los modelos (ver gestion_academica.signals).
+        """
+        reporte = cache.get(ReportesService.CACHE_KEY_REPORTE_GENERAL)
+        if reporte is None:
+            reporte = ReportesService._calcular_reporte_general()
+            cache.set(
+                ReportesService.CACHE_KEY_REPORTE_GENERAL,
+                reporte,
+                getattr(settings, 'REPORTE_GENERAL_CACHE_TTL', 300)
+            )
+        return reporte
+    
+    @staticmethod
+    def invalidar_reporte_general():
+        """Descarta el reporte general guardado en caché"""
+        cache.delete(ReportesService.CACHE_KEY_REPORTE_GENERAL)
+        registrar_invalidacion('reporte_general')
+    
+    @staticmethod
+    def _calcular_reporte_general():
+        """
+        Calcula todos los totales en una sola consulta (UNION ALL de conteos)
         """
-        return {
-            'total_carreras': Carrera.objects.filter(activa=True).count(),
-            'total_materias': Materia.objects.filter(activa=True).count(),
-            'total_alumnos': Alumno.objects.filter(activo=True).count(),
-            'total_inscripciones': Inscripcion.objects.filter(activa=True).count(),     
-            'materias_con_cupo': Materia.objects.filter(activa=True).count(),
-            'total_usuarios': Usuario.objects.filter(is_active=True).count(),
+        totales = {
+            'total_carreras': Carrera.objects.filter(activa=True),
+            'total_materias': Materia.objects.filter(activa=True),
+            'total_alumnos': Alumno.objects.filter(activo=True),
+            'total_inscripciones': Inscripcion.objects.filter(activa=True),
+            'materias_con_cupo': Materia.objects.filter(activa=True, inscriptos_activos__lt=F('cupo_maximo')),
+            'total_usuarios': Usuario.objects.filter(is_active=True),
         }
+        conteos = [
+            queryset.order_by().annotate(
+                clave=Value(clave, output_field=CharField()),
+                total=Func('id', function='COUNT', output_field=IntegerField()),
+            ).values('clave', 'total')
+            for clave, queryset in totales.items()
+        ]
+        consulta = conteos[0].union(*conteos[1:], all=True)
+        return {fila['clave']: fila['total'] for fila in consulta}
     
     @staticmethod
+    @lectura_en_replica
     def materias_con_cupo_por_carrera():
         """
-        Retorna materias con cupo agrupadas por carrera
+        Retorna materias con cupo agrupadas por carrera.
+        Usa dos consultas fijas (carreras + prefetch de materias con cupo)
+        sin importar la cantidad de carreras o materias.
+        """
+        materias_con_cupo = Materia.objects.filter(
+            activa=True,
+            inscriptos_activos__lt=F('cupo_maximo')
+        ).order_by('año', 'cuatrimestre', 'nombre')
+        
+        carreras = Carrera.objects.filter(activa=True).prefetch_related(
+            Prefetch('materias', queryset=materias_con_cupo, to_attr='materias_con_cupo')
+        )
+        return {carrera: carrera.materias_con_cupo for carrera in carreras}
+
+
+class CatalogoService:
+    """
+    Versión del catálogo público (carreras y materias).
+    Las claves de caché de páginas y fragmentos incluyen la generación
+    actual, así que incrementarla invalida todo lo cacheado a la vez.
+    """
+    
+    CACHE_KEY_GENERACION = 'catalogo:generacion'
+    CACHE_KEY_PUBLICACION = 'catalogo:publicacion'
+    
+    @staticmethod
+    def generacion():
+        generacion = cache.get(CatalogoService.CACHE_KEY_GENERACION)
+        if generacion is None:
+            CatalogoService._iniciar_generacion()
+            generacion = cache.get(CatalogoService.CACHE_KEY_GENERACION, 1)
+        return generacion
+    
+    @staticmethod
+    def _iniciar_generacion():
+        # Empieza en la hora actual y no en 1: si la caché se vacía, las
+        # generaciones nuevas no repiten las anteriores ni sus ETags
+        cache.add(CatalogoService.CACHE_KEY_GENERACION, time.time_ns() // 1000, None)
+    
+    @staticmethod
+    def incrementar_generacion():
+        """Publica una nueva versión del catálogo (ver gestion_academica.signals)"""
+        registrar_invalidacion('catalogo')
+        cache.set(CatalogoService.CACHE_KEY_PUBLICACION, timezone.now(), None)
+        try:
+            return cache.incr(CatalogoService.CACHE_KEY_GENERACION)
+        except ValueError:
+            CatalogoService._iniciar_generacion()
+            return cache.incr(CatalogoService.CACHE_KEY_GENERACION)
+    
+    @staticmethod
+    def clave(*partes):
+        return ':'.join(['catalogo', str(CatalogoService.generacion()), *map(str, partes)])
+    
+    @staticmethod
+    def version_publicada(usuario):
+        """
+        ETag y Last-Modified de una página que sólo muestra el catálogo
+        (sin cupos ni inscripciones), a partir de la generación vigente.
+        A diferencia de version(), no cambia con cada inscripción (las
+        reservas de cupo actualizan fecha_modificacion de la materia) y
+        no consulta la base.
+        """
+        generacion = CatalogoService.generacion()
+        publicacion = cache.get(CatalogoService.CACHE_KEY_PUBLICACION)
+        if publicacion is None:
+            cache.add(CatalogoService.CACHE_KEY_PUBLICACION, timezone.now(), None)
+            publicacion = cache.get(CatalogoService.CACHE_KEY_PUBLICACION)
+        partes = [str(usuario.pk) if usuario.is_authenticated else 'anonimo', str(generacion)]
+        return hashlib.md5('|'.join(partes).encode()).hexdigest(), publicacion
+    
+    @staticmethod
+    def version(usuario, *querysets):
+        """
+        ETag y Last-Modified de una página armada con los querysets dados,
+        a partir de la cantidad de filas (detecta borrados) y la última
+        fecha_modificacion de cada uno. El ETag incluye al usuario porque
+        la barra de navegación cambia según quién mira.
+        Todo se resuelve en una sola consulta (UNION ALL de agregados).
+        """
+        agregados = [
+            queryset.order_by().annotate(
+                clave=Value(str(indice), output_field=CharField()),
+                cantidad=Func('pk', function='COUNT', output_field=IntegerField()),
+                ultima=Func('fecha_modificacion', function='MAX', output_field=DateTimeField()),
+            ).values('clave', 'cantidad', 'ultima')
+            for indice, queryset in enumerate(querysets)
+        ]
+        filas = sorted(agregados[0].union(*agregados[1:], all=True), key=lambda fila: int(fila['clave']))
+        
+        partes = [str(usuario.pk) if usuario.is_authenticated else 'anonimo']
+        partes += [f"{fila['cantidad']}:{fila['ultima'].timestamp() if fila['ultima'] else 0}" for fila in filas]
+        fechas = [fila['ultima'] for fila in filas if fila['ultima']]
+        return hashlib.md5('|'.join(partes).encode()).hexdigest(), max(fechas, default=None)
+
+
+class MetricasService:
+    """
+    Contadores en memoria del proceso para ajustar cachés y colas.
+    Cada worker lleva sus propios contadores.
+    """
+    
+    _lock = threading.Lock()
+    _contadores = Counter()
+    
+    @staticmethod
+    def incrementar(nombre, cantidad=1):
+        with MetricasService._lock:
+            MetricasService._contadores[nombre] += cantidad
+    
+    @staticmethod
+    def registrar_cache(nombre, acierto):
+        MetricasService.incrementar(f'cache.{nombre}.{"aciertos" if acierto else "fallos"}')
+    
+    @staticmethod
+    def obtener(prefijo=''):
+        with MetricasService._lock:
+            return {
+                nombre: valor
+                for nombre, valor in sorted(MetricasService._contadores.items())
+                if nombre.startswith(prefijo)
+            }
+    
+    @staticmethod
+    def resumen_cache():
+        """Aciertos, fallos y tasa de aciertos de cada caché"""
+        resumen = {}
+        for nombre, valor in MetricasService.obtener('cache.').items():
+            cache_nombre, tipo = nombre[len('cache.'):].rsplit('.', 1)
+            resumen.setdefault(cache_nombre, {'aciertos': 0, 'fallos': 0})[tipo] = valor
+        for valores in resumen.values():
+            total = valores['aciertos'] + valores['fallos']
+            valores['tasa_aciertos'] = round(valores['aciertos'] / total, 3) if total else None
+        return resumen
+    
+    @staticmethod
+    def reiniciar(prefijo=''):
+        with MetricasService._lock:
+            for nombre in [n for n in MetricasService._contadores if n.startswith(prefijo)]:
+                del MetricasService._contadores[nombre]
+
+
+class _EchoBuffer:
+    """Buffer que devuelve lo escrito, para usar csv.writer en streaming"""
+    def write(self, valor):
+        return valor
+
+
+class ExportacionService:
+    """
+    Servicio para exportar datos en CSV o JSON en memoria constante.
+    Las filas se leen con QuerySet.iterator() y proyecciones values(),
+    y se generan de a una para poder enviarlas mientras se consultan.
+    """
+    
+    TAMAÑO_LOTE = 2000
+    
+    # entidad -> (modelo, campo de estado, campo de carrera, [(columna, campo)])
+    ENTIDADES = {
+        'alumnos': (Alumno, 'activo', 'carrera_id', [
+            ('legajo', 'legajo'),
+            ('dni', 'usuario__username'),
+            ('apellido', 'usuario__last_name'),
+            ('nombre', 'usuario__first_name'),
+            ('email', 'usuario__email'),
+            ('carrera', 'carrera__codigo'),
+            ('año_ingreso', 'año_ingreso'),
+            ('activo', 'activo'),
+        ]),
+        'materias': (Materia, 'activa', 'carrera_id', [
+            ('codigo', 'codigo'),
+            ('nombre', 'nombre'),
+            ('carrera', 'carrera__codigo'),
+            ('año', 'año'),
+            ('cuatrimestre', 'cuatrimestre'),
+            ('cupo_maximo', 'cupo_maximo'),
+            ('inscriptos', 'inscriptos_activos'),
+            ('activa', 'activa'),
+        ]),
+        'inscripciones': (Inscripcion, 'activa', 'materia__carrera_id', [
+            ('id', 'id'),
+            ('legajo', 'alumno__legajo'),
+            ('apellido', 'alumno__usuario__last_name'),
+            ('nombre', 'alumno__usuario__first_name'),
+            ('materia', 'materia__codigo'),
+            ('materia_nombre', 'materia__nombre'),
+            ('carrera', 'materia__carrera__codigo'),
+            ('fecha_inscripcion', 'fecha_inscripcion'),
+            ('fecha_baja', 'fecha_baja'),
+            ('activa', 'activa'),
+        ]),
+    }
+    
+    @staticmethod
+    def obtener_filas(entidad, carrera_id=None, estado='activos'):
+        """
+        Retorna un iterador de tuplas con las columnas de la entidad.
+        estado: 'activos', 'inactivos' o 'todos'
         """
-        resultado = {}
-        for carrera in Carrera.objects.filter(activa=True):
-            materias_con_cupo = []
-            for materia in carrera.materias.filter(activa=True):
-                if materia.tiene_cupo:
-                    materias_con_cupo.append(materia)
-            resultado[carrera] = materias_con_cupo
-        return resultado
+        modelo, campo_estado, campo_carrera, columnas = ExportacionService.ENTIDADES[entidad]
+        
+        queryset = modelo.objects.all()
+        if estado != 'todos':
+            queryset = queryset.filter(**{campo_estado: estado == 'activos'})
+        if carrera_id:
+            queryset = queryset.filter(**{campo_carrera: carrera_id})
+        
+        campos = [campo for _, campo in columnas]
+        return queryset.order_by('id').values_list(*campos).iterator(
+            chunk_size=ExportacionService.TAMAÑO_LOTE
+        )
+    
+    @staticmethod
+    def columnas(entidad):
+        return [columna for columna, _ in ExportacionService.ENTIDADES[entidad][3]]
+    
+    @staticmethod
+    def generar_csv(entidad, **filtros):
+        """Genera el CSV línea por línea"""
+        writer = csv.writer(_EchoBuffer())
+        yield writer.writerow(ExportacionService.columnas(entidad))
+        for fila in ExportacionService.obtener_filas(entidad, **filtros):
+            yield writer.writerow(fila)
+    
+    @staticmethod
+    def generar_json(entidad, **filtros):
+        """Genera un arreglo JSON, un objeto por línea"""
+        columnas = ExportacionService.columnas(entidad)
+        separador = '[\n'
+        for fila in ExportacionService.obtener_filas(entidad, **filtros):
+            yield separador + json.dumps(dict(zip(columnas, fila)), cls=DjangoJSONEncoder, ensure_ascii=False)
+            separador = ',\n'
+        yield '[]\n' if separador == '[\n' else '\n]\n'
@@ -0,0 +1,93 @@
+"""
+Signals para invalidar la información cacheada cuando cambian los datos.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from inscripcion.models import Inscripcion, inscripciones_en_bloque
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.models import Usuario
+
+from .services import CatalogoService, ReportesService
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_delete, sender=Carrera)
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+@receiver(post_save, sender=Alumno)
+@receiver(post_delete, sender=Alumno)
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_reporte_general(sender, **kwargs):
+    """
+    Signal que descarta el reporte general ante cualquier alta,
+    modificación o baja de los modelos que lo componen.
+    Se ejecuta al confirmar la transacción para no cachear datos viejos.
+    """
+    transaction.on_commit(ReportesService.invalidar_reporte_general)
+
+
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+def invalidar_oferta_por_materia(sender, instance, **kwargs):
+    """Signal que descarta la oferta académica de la carrera de la materia"""
+    carrera_id = instance.carrera_id
+    transaction.on_commit(lambda: MateriaService.invalidar_oferta_academica(carrera_id))
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def invalidar_oferta_por_inscripcion(sender, instance, **kwargs):
+    """
+    Signal que descarta la oferta académica cuando una inscripción
+    cambia el cupo de una materia. Si la materia no está cargada su
+    carrera se busca al confirmar la transacción, y sólo entonces.
+    """
+    materia = instance._state.fields_cache.get('materia')
+    if materia is not None:
+        carrera_id = materia.carrera_id
+        transaction.on_commit(lambda: MateriaService.invalidar_oferta_academica(carrera_id))
+    else:
+        materia_id = instance.materia_id
+        transaction.on_commit(lambda: _invalidar_oferta_de_materia(materia_id))
+
+
+def _invalidar_oferta_de_materia(materia_id):
+    # Una materia borrada ya invalidó su oferta (invalidar_oferta_por_materia)
+    for carrera_id in Materia.objects.filter(id=materia_id).values_list('carrera_id', flat=True):
+        MateriaService.invalidar_oferta_academica(carrera_id)
+
+
+@receiver(inscripciones_en_bloque)
+def invalidar_por_inscripciones_en_bloque(sender, materia_ids, **kwargs):
+    """
+    Signal que descarta el reporte general y la oferta académica de las
+    carreras afectadas por altas o bajas en bloque de inscripciones
+    """
+    carrera_ids = set(Materia.objects.filter(id__in=materia_ids).values_list('carrera_id', flat=True))
+    
+    def invalidar():
+        ReportesService.invalidar_reporte_general()
+        for carrera_id in carrera_ids:
+            MateriaService.invalidar_oferta_academica(carrera_id)
+    transaction.on_commit(invalidar)
+
+
+@receiver(post_save, sender=Carrera)
+@receiver(post_delete, sender=Carrera)
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+def publicar_catalogo(sender, **kwargs):
+    """
+    Signal que incrementa la generación del catálogo al cambiar
+    carreras o materias, descartando páginas y fragmentos cacheados
+    """
+    transaction.on_commit(CatalogoService.incrementar_generacion)
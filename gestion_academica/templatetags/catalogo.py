@@ -0,0 +1,61 @@
+"""
+Caché de fragmentos versionada por la generación del catálogo
+"""
+
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from gestion_academica.services import CatalogoService, MetricasService
+
+register = template.Library()
+
+
+class FragmentoCatalogoNode(template.Node):
+    def __init__(self, nodelist, timeout, nombre, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.nombre = nombre
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'"fragmento_catalogo" tag got a non-integer timeout value: {self.timeout.token!r}'
+            )
+        clave = make_template_fragment_key(
+            CatalogoService.clave(self.nombre),
+            [var.resolve(context) for var in self.vary_on]
+        )
+        fragmento = cache.get(clave)
+        MetricasService.registrar_cache(f'fragmento.{self.nombre}', acierto=fragmento is not None)
+        if fragmento is None:
+            fragmento = self.nodelist.render(context)
+            cache.set(clave, fragmento, timeout)
+        return fragmento
+
+
+@register.tag('fragmento_catalogo')
+def do_fragmento_catalogo(parser, token):
+    """
+    Igual que {% cache %}, pero la clave incluye la generación del
+    catálogo y se registran aciertos y fallos:
+
+        {% load catalogo %}
+        {% fragmento_catalogo [timeout] [nombre] [var1] [var2] ... %}
+            .. fragmento ..
+        {% endfragmento_catalogo %}
+    """
+    nodelist = parser.parse(('endfragmento_catalogo',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(f"'{tokens[0]}' tag requires at least 2 arguments.")
+    return FragmentoCatalogoNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
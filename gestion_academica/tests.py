@@ -1,3 +1,1312 @@
-from django.test import TestCase
+import gzip
+import importlib
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Group
+from django.contrib.messages import get_messages
+from django.core import checks
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, clear_url_caches, get_resolver, resolve, reverse
+from django.utils import timezone
+
+from alumno.models import Alumno
+from alumno.services import AlumnoService
+from carrera.models import Carrera
+from inscripcion.models import Inscripcion, SolicitudInscripcion
+from inscripcion.services import (
+    ColaInscripcionService,
+    InscripcionIdempotenteService,
+    InscripcionService,
+    ListaEsperaService,
+)
+from materia.models import Materia
+from materia.services import MateriaService
+from myapp import urls as myapp_urls
+from myapp.basedatos import configuracion_postgresql
+from myapp.consultas import PresupuestoConsultasExcedido, PresupuestoConsultasMixin, huella
+from myapp.perfilado import nombre_url
+from myapp.replica import COOKIE_LECTURA_PROPIA, ReplicaMiddleware, ReplicaRouter, leer_de_replica
+from myapp.tiempos import medir
+from usuario.models import Usuario
+
+from . import urls as gestion_academica_urls, views, views_async
+from .api import ApiListView, MateriasApiView
+from .services import CatalogoService, ExportacionService, MetricasService, ReportesService
+from .views import OfertaAcademicaView
+
+
+class ReporteGeneralTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        for i, inscriptos in enumerate([0, 5, 10]):
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=self.carrera,
+                año=1, cuatrimestre=1, cupo_maximo=10, inscriptos_activos=inscriptos
+            )
+
+    def test_totales_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            reporte = ReportesService.reporte_general()
+        self.assertEqual(reporte, {
+            'total_carreras': 1,
+            'total_materias': 3,
+            'total_alumnos': 0,
+            'total_inscripciones': 0,
+            'materias_con_cupo': 2,
+            'total_usuarios': 0,
+        })
+
+    def test_reporte_cacheado(self):
+        ReportesService.reporte_general()
+        with self.assertNumQueries(0):
+            ReportesService.reporte_general()
+
+    def test_cambios_invalidan_cache(self):
+        ReportesService.reporte_general()
+        with self.captureOnCommitCallbacks(execute=True):
+            Carrera.objects.create(nombre='Otra', codigo='OT2024', duracion_años=2)
+        self.assertEqual(ReportesService.reporte_general()['total_carreras'], 2)
+
+
+class MateriasConCupoPorCarreraTest(TestCase):
+
+    def crear_catalogo(self, cantidad_materias, cantidad_carreras=5):
+        carreras = Carrera.objects.bulk_create([
+            Carrera(nombre=f'Carrera {i}', codigo=f'CA{i:04d}', duracion_años=3)
+            for i in range(cantidad_carreras)
+        ])
+        Materia.objects.bulk_create([
+            Materia(
+                nombre=f'Materia {i}', codigo=f'MAT{i:04d}', carrera=carreras[i % cantidad_carreras],
+                año=1, cuatrimestre=1, cupo_maximo=10,
+                inscriptos_activos=10 if i % 2 else 0
+            )
+            for i in range(cantidad_materias)
+        ])
+
+    def test_agrupa_solo_materias_con_cupo(self):
+        self.crear_catalogo(10)
+        resultado = ReportesService.materias_con_cupo_por_carrera()
+        self.assertEqual(len(resultado), 5)
+        self.assertEqual(sum(len(materias) for materias in resultado.values()), 5)
+        for carrera, materias in resultado.items():
+            self.assertTrue(all(m.carrera_id == carrera.id and m.tiene_cupo for m in materias))
+
+    def test_consultas_constantes_de_10_a_10000_materias(self):
+        consultas = {}
+        for cantidad in (10, 10000):
+            Materia.objects.all().delete()
+            Carrera.objects.all().delete()
+            self.crear_catalogo(cantidad)
+            with CaptureQueriesContext(connection) as capturadas:
+                resultado = ReportesService.materias_con_cupo_por_carrera()
+                for materias in resultado.values():
+                    [m.cupo_disponible for m in materias]
+            consultas[cantidad] = len(capturadas)
+        self.assertEqual(consultas[10], 2)
+        self.assertEqual(consultas[10000], 2)
+
+
+class ExportacionTest(TestCase):
+
+    def setUp(self):
+        grupo = Group.objects.create(name='Administradores')
+        self.admin = Usuario.objects.create(username='12345678', email='admin@test.com', password='x', primer_login=False)
+        self.admin.groups.add(grupo)
+        self.carreras = [
+            Carrera.objects.create(nombre=f'Carrera {i}', codigo=f'CA{i:04d}', duracion_años=3)
+            for i in range(2)
+        ]
+        for i in range(6):
+            usuario = Usuario.objects.create(username=f'{30000000 + i}', email=f'a{i}@test.com', password='x')
+            alumno = Alumno.objects.create(
+                usuario=usuario, legajo=f'{20240000 + i}', carrera=self.carreras[i % 2], año_ingreso=2024
+            )
+            materia = Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=self.carreras[i % 2],
+                año=1, cuatrimestre=1, cupo_maximo=10
+            )
+            inscripcion = Inscripcion.objects.create(alumno=alumno, materia=materia)
+            if i == 0:
+                inscripcion.dar_de_baja()
+        self.client.force_login(self.admin)
+
+    def exportar(self, entidad, **parametros):
+        respuesta = self.client.get(reverse('exportar', args=[entidad]), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        return b''.join(respuesta.streaming_content).decode()
+
+    def test_csv_solo_activos_por_defecto(self):
+        lineas = self.exportar('inscripciones').splitlines()
+        self.assertEqual(lineas[0].split(',')[:3], ['id', 'legajo', 'apellido'])
+        self.assertEqual(len(lineas), 1 + 5)
+
+    def test_json_con_filtros(self):
+        datos = json.loads(self.exportar(
+            'alumnos', formato='json', carrera=self.carreras[1].id, estado='todos'
+        ))
+        self.assertEqual([a['legajo'] for a in datos], ['20240001', '20240003', '20240005'])
+        self.assertEqual(json.loads(self.exportar('inscripciones', formato='json', estado='inactivos'))[0]['legajo'], '20240000')
+        self.assertEqual(json.loads(self.exportar('materias', formato='json', estado='inactivos')), [])
+
+    def test_consultas_independientes_de_las_filas(self):
+        with self.assertNumQueries(1):
+            filas = list(ExportacionService.generar_csv('inscripciones', estado='todos'))
+        self.assertEqual(len(filas), 1 + 6)
+
+    def test_entidad_inexistente(self):
+        respuesta = self.client.get(reverse('exportar', args=['usuarios']))
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class PaginacionCursorTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grupo = Group.objects.create(name='Administradores')
+        self.admin = Usuario.objects.create(username='12345678', email='admin@test.com', password='x', primer_login=False)
+        self.admin.groups.add(grupo)
+        carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=carrera,
+                año=1, cuatrimestre=1, cupo_maximo=100
+            )
+            for i in range(5)
+        ]
+        for i in range(9):
+            usuario = Usuario.objects.create(
+                username=f'{30000000 + i}', email=f'a{i}@test.com', password='x',
+                first_name=f'Nombre {i}', last_name='Repetido' if i % 3 else f'Apellido {i}'
+            )
+            alumno = Alumno.objects.create(
+                usuario=usuario, legajo=f'{20240000 + i}', carrera=carrera, año_ingreso=2024
+            )
+            for materia in materias:
+                Inscripcion.objects.create(alumno=alumno, materia=materia)
+        # Fechas repetidas para que el desempate por id sea necesario
+        Inscripcion.objects.filter(id__lte=20).update(fecha_inscripcion=timezone.now())
+        self.client.force_login(self.admin)
+
+    def recorrer(self, nombre_url, clave):
+        """Avanza hasta la última página y vuelve, devolviendo los ids vistos en cada sentido"""
+        url = reverse(nombre_url)
+        adelante, paginas = [], []
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            pagina = respuesta.context['page_obj']
+            paginas.append(pagina)
+            adelante.extend(obj.id for obj in respuesta.context[clave])
+            url = reverse(nombre_url) + pagina.url_siguiente if pagina.has_next() else None
+
+        atras = [obj.id for obj in paginas[-1]]
+        pagina = paginas[-1]
+        while pagina.has_previous():
+            respuesta = self.client.get(reverse(nombre_url) + pagina.url_anterior)
+            pagina = respuesta.context['page_obj']
+            atras = [obj.id for obj in pagina] + atras
+        return adelante, atras, len(paginas)
+
+    def test_inscripciones_en_orden_y_sin_repetidos(self):
+        adelante, atras, paginas = self.recorrer('inscripcion_list', 'inscripciones')
+        esperado = list(
+            Inscripcion.objects.filter(activa=True).order_by('-fecha_inscripcion', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(paginas, 5)
+        self.assertEqual(adelante, esperado)
+        self.assertEqual(atras, esperado)
+
+    def test_alumnos_con_apellidos_repetidos(self):
+        adelante, atras, _ = self.recorrer('alumno_list', 'alumnos')
+        esperado = list(
+            Alumno.objects.order_by('usuario__last_name', 'usuario__first_name', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(adelante, esperado)
+        self.assertEqual(atras, esperado)
+
+    def test_pagina_profunda_sin_offset_ni_count(self):
+        primera = self.client.get(reverse('inscripcion_list')).context['page_obj']
+        self.assertEqual(primera.total_aproximado, 45)
+        url = reverse('inscripcion_list') + primera.url_siguiente
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(url)
+        sql = ' '.join(c['sql'] for c in consultas.captured_queries).upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_conserva_filtros(self):
+        respuesta = self.client.get(reverse('materia_list'), {'carrera': Carrera.objects.get().id})
+        self.assertIn('carrera=', respuesta.context['page_obj'].url_primera)
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get(reverse('inscripcion_list'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(respuesta.status_code, 404)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Los planes esperados corresponden al planificador de SQLite')
+class IndicesTest(TestCase):
+    """Las consultas más frecuentes usan los índices definidos para ellas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        cls.materia = Materia.objects.create(
+            nombre='Materia', codigo='MAT001', carrera=cls.carrera, año=1, cuatrimestre=1, cupo_maximo=10
+        )
+        usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x')
+        cls.alumno = Alumno.objects.create(usuario=usuario, legajo='20240000', carrera=cls.carrera, año_ingreso=2024)
+
+    def assertUsaIndice(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(indice, plan)
+
+    def test_inscripciones_por_materia(self):
+        self.assertUsaIndice(InscripcionService.obtener_alumnos_materia(self.materia.id), 'insc_activa_materia_idx')
+
+    def test_inscripciones_por_alumno(self):
+        self.assertUsaIndice(InscripcionService.obtener_inscripciones_alumno(self.alumno.id), 'insc_activa_alumno_idx')
+
+    def test_listado_de_inscripciones(self):
+        queryset = Inscripcion.objects.filter(activa=True).order_by('-fecha_inscripcion', 'id')[:11]
+        self.assertUsaIndice(queryset, 'insc_activa_fecha_idx')
+
+    def test_materias_por_carrera(self):
+        self.assertUsaIndice(MateriaService.obtener_materias_por_carrera(self.carrera.id), 'materia_activa_carrera_idx')
+
+    def test_alumnos_por_carrera(self):
+        self.assertUsaIndice(AlumnoService.obtener_alumnos_por_carrera(self.carrera.id), 'alumno_activo_carrera_idx')
+
+    def test_listado_de_usuarios(self):
+        queryset = Usuario.objects.filter(is_active=True).order_by('last_name', 'first_name', 'id')[:11]
+        self.assertUsaIndice(queryset, 'usuario_apellido_nombre_idx')
+
+
+class OfertaAcademicaTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=self.carrera,
+                año=1 + i // 4, cuatrimestre=1 + i % 2, cupo_maximo=2
+            )
+            for i in range(8)
+        ]
+        self.usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.usuario.groups.add(grupo)
+        self.alumno = Alumno.objects.create(usuario=self.usuario, legajo='20240000', carrera=self.carrera, año_ingreso=2024)
+        for materia in self.materias[:3]:
+            Inscripcion.objects.create(alumno=self.alumno, materia=materia)
+
+    def renderizar(self):
+        request = RequestFactory().get(reverse('oferta_academica'))
+        request.user = self.usuario
+        respuesta = OfertaAcademicaView.as_view()(request)
+        respuesta.render()
+        return respuesta
+
+    def test_dos_consultas_con_la_oferta_en_cache(self):
+        self.usuario.nombres_grupos  # Rol ya resuelto por la sesión
+        self.renderizar()
+        # Una consulta para los validadores HTTP y tres para renderizar
+        # (alumno, listas de espera e inscripciones)
+        with self.assertNumQueries(4):
+            respuesta = self.renderizar()
+        self.assertEqual(respuesta.context_data['materias_inscripto'], {m.id for m in self.materias[:3]})
+        self.assertEqual(respuesta.context_data['materias_disponibles'], 5)
+        self.assertEqual(respuesta.context_data['materias_sin_cupo'], 0)
+
+    def test_inscripcion_invalida_la_oferta(self):
+        otro = Alumno.objects.create(
+            usuario=Usuario.objects.create(username='30000001', email='b@test.com', password='x'),
+            legajo='20240001', carrera=self.carrera, año_ingreso=2024
+        )
+        self.assertTrue(MateriaService.obtener_oferta_academica(self.carrera.id)[0]['tiene_cupo'])
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_alumno(otro.id, self.materias[0].id)
+
+        oferta = MateriaService.obtener_oferta_academica(self.carrera.id)
+        self.assertEqual(oferta[0]['cupo_disponible'], 0)
+        self.assertFalse(oferta[0]['tiene_cupo'])
+        self.assertEqual(self.renderizar().context_data['materias_sin_cupo'], 1)
+
+    def test_borrado_en_cascada_invalida_la_oferta(self):
+        MateriaService.obtener_oferta_academica(self.carrera.id)
+        alumno = Alumno.objects.get(pk=self.alumno.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            alumno.delete()
+        self.assertIsNone(cache.get(MateriaService.clave_oferta_academica(self.carrera.id)))
+
+    def test_transaccion_revertida_no_invalida_la_oferta(self):
+        MateriaService.obtener_oferta_academica(self.carrera.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Inscripcion.objects.filter(alumno=self.alumno).delete()
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(cache.get(MateriaService.clave_oferta_academica(self.carrera.id)))
+
+
+class CacheCatalogoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        MetricasService.reiniciar()
+        self.carrera = Carrera.objects.create(nombre='Carrera Inicial', codigo='TP2024', duracion_años=3)
+        Materia.objects.create(
+            nombre='Programación I', codigo='PROG101', carrera=self.carrera, año=1, cuatrimestre=1, cupo_maximo=10
+        )
+
+    def test_pagina_anonima_desde_cache(self):
+        url = reverse('carreras_publicas')
+        self.assertContains(self.client.get(url), 'Carrera Inicial')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'Carrera Inicial')
+        self.assertEqual(
+            MetricasService.resumen_cache()['pagina.carreras_publicas'],
+            {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5}
+        )
+
+    def test_cambio_en_catalogo_publica_nueva_version(self):
+        url = reverse('materias_publicas')
+        self.client.get(url)
+        generacion = CatalogoService.generacion()
+        with self.captureOnCommitCallbacks(execute=True):
+            Materia.objects.create(
+                nombre='Bases de Datos', codigo='BD101', carrera=self.carrera, año=1, cuatrimestre=2, cupo_maximo=10
+            )
+        self.assertEqual(CatalogoService.generacion(), generacion + 1)
+        self.assertContains(self.client.get(url), 'Bases de Datos')
+
+    def test_filtro_forma_parte_de_la_clave(self):
+        otra = Carrera.objects.create(nombre='Otra Carrera', codigo='OT2024', duracion_años=3)
+        url = reverse('materias_publicas')
+        self.assertContains(self.client.get(url), 'Programación I')
+        self.assertNotContains(self.client.get(url, {'carrera': otra.id}), 'Programación I')
+
+    def test_usuario_autenticado_no_usa_la_pagina_cacheada(self):
+        usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.client.force_login(usuario)
+        self.client.get(reverse('carreras_publicas'))
+        self.client.get(reverse('carreras_publicas'))
+        resumen = MetricasService.resumen_cache()
+        self.assertNotIn('pagina.carreras_publicas', resumen)
+        self.assertEqual(resumen['fragmento.publico_carreras']['aciertos'], 1)
+
+    def test_estadisticas_del_dashboard_cacheadas(self):
+        admin = Usuario.objects.create(username='12345678', email='admin@test.com', password='x', primer_login=False)
+        admin.groups.add(Group.objects.create(name='Administradores'))
+        self.client.force_login(admin)
+        self.assertContains(self.client.get(reverse('dashboard')), 'Estadísticas Generales')
+
+        with mock.patch.object(ReportesService, 'reporte_general') as reporte_general:
+            self.assertContains(self.client.get(reverse('dashboard')), 'Estadísticas Generales')
+        reporte_general.assert_not_called()
+        self.assertEqual(MetricasService.resumen_cache()['fragmento.dashboard_estadisticas']['aciertos'], 1)
+
+    def test_listado_con_cupo_cambia_con_cada_cupo(self):
+        usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.client.force_login(usuario)
+        primera = Materia.objects.get(codigo='PROG101')
+        segunda = Materia.objects.create(
+            nombre='Bases de Datos', codigo='BD101', carrera=self.carrera, año=1, cuatrimestre=2, cupo_maximo=10
+        )
+        Materia.reservar_cupo(primera.id)
+        self.client.get(reverse('materias_con_cupo'))
+
+        # Mismas materias y mismos cupos libres, pero repartidos distinto
+        Materia.liberar_cupo(primera.id)
+        Materia.reservar_cupo(segunda.id)
+        Materia.objects.filter(pk=segunda.pk).update(fecha_modificacion=timezone.now() + timedelta(seconds=1))
+        self.client.get(reverse('materias_con_cupo'))
+        fragmento = MetricasService.resumen_cache()['fragmento.materias_con_cupo']
+        self.assertEqual((fragmento['aciertos'], fragmento['fallos']), (0, 2))
+
+    def test_metricas_solo_para_administradores(self):
+        usuario = Usuario.objects.create(username='12345678', email='admin@test.com', password='x', primer_login=False)
+        self.client.force_login(usuario)
+        self.assertNotEqual(self.client.get(reverse('metricas_cache')).status_code, 200)
+
+        usuario.groups.add(Group.objects.create(name='Administradores'))
+        self.client.get(reverse('carreras_publicas'))
+        datos = self.client.get(reverse('metricas_cache')).json()
+        self.assertEqual(datos['generacion_catalogo'], CatalogoService.generacion())
+        self.assertEqual(datos['caches']['fragmento.publico_carreras']['fallos'], 1)
+
+
+class GetCondicionalTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materia = Materia.objects.create(
+            nombre='Programación I', codigo='PROG101', carrera=self.carrera, año=1, cuatrimestre=1, cupo_maximo=10
+        )
+
+    def revalidar(self, url, respuesta, **parametros):
+        return self.client.get(url, parametros, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+
+    def test_304_sin_renderizar(self):
+        url = reverse('carreras_publicas')
+        respuesta = self.client.get(url)
+        self.assertTrue(respuesta.has_header('ETag'))
+        self.assertTrue(respuesta.has_header('Last-Modified'))
+
+        cache.delete(CatalogoService.clave('pagina', url))  # Sin la página anónima cacheada, la vista se ejecuta
+        with self.assertNumQueries(0):
+            revalidada = self.revalidar(url, respuesta)
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertEqual(revalidada.templates, [])
+
+    def test_304_desde_la_pagina_cacheada(self):
+        url = reverse('carreras_publicas')
+        respuesta = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidar(url, respuesta).status_code, 304)
+
+    def test_if_modified_since(self):
+        url = reverse('materias_publicas')
+        respuesta = self.client.get(url)
+        cache.delete(CatalogoService.clave('pagina', url))
+        revalidada = self.client.get(url, HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified'])
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_cambio_en_materia_genera_nueva_version(self):
+        url = reverse('materias_publicas')
+        respuesta = self.client.get(url, {'carrera': self.carrera.id})
+        self.materia.descripcion = 'Nueva descripción'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.materia.save()
+        revalidada = self.revalidar(url, respuesta, carrera=self.carrera.id)
+        self.assertEqual(revalidada.status_code, 200)
+        self.assertNotEqual(revalidada['ETag'], respuesta['ETag'])
+
+    def test_borrado_genera_nueva_version(self):
+        otra = Carrera.objects.create(nombre='Otra', codigo='OT2024', duracion_años=3)
+        url = reverse('carreras_publicas')
+        respuesta = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            otra.delete()
+        self.assertEqual(self.revalidar(url, respuesta).status_code, 200)
+
+    def test_inscripciones_no_cambian_la_version_del_catalogo(self):
+        Group.objects.create(name='Alumnos')
+        alumno = Alumno.objects.create(
+            usuario=Usuario.objects.create(username='30000000', email='a@test.com', password='x'),
+            legajo='20240000', carrera=self.carrera, año_ingreso=2024
+        )
+        publica = reverse('materias_publicas')
+        respuesta = self.client.get(publica)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_alumno(alumno.id, self.materia.id)
+        self.assertEqual(self.revalidar(publica, respuesta).status_code, 304)
+
+        # La consulta por carrera muestra los inscriptos: ahí sí cambia
+        admin = Usuario.objects.create(username='admin', email='admin@test.com', password='x', primer_login=False)
+        self.client.force_login(admin)
+        por_carrera = reverse('materias_por_carrera')
+        respuesta = self.client.get(por_carrera, {'carrera': self.carrera.id})
+        InscripcionService.dar_de_baja_inscripcion(Inscripcion.objects.get().id)
+        self.assertEqual(self.revalidar(por_carrera, respuesta, carrera=self.carrera.id).status_code, 200)
+
+    def test_vaciar_la_cache_no_repite_versiones(self):
+        url = reverse('carreras_publicas')
+        respuesta = self.client.get(url)
+        cache.clear()
+        self.assertNotEqual(self.client.get(url)['ETag'], respuesta['ETag'])
+
+    def test_oferta_academica_por_alumno_y_cupo(self):
+        Group.objects.create(name='Alumnos')
+        alumnos = []
+        for i in range(2):
+            usuario = Usuario.objects.create(username=f'{30000000 + i}', email=f'a{i}@test.com', password='x', primer_login=False)
+            usuario.groups.add(Group.objects.get(name='Alumnos'))
+            alumnos.append(Alumno.objects.create(
+                usuario=usuario, legajo=f'{20240000 + i}', carrera=self.carrera, año_ingreso=2024
+            ))
+        url = reverse('oferta_academica')
+        self.client.force_login(alumnos[0].usuario)
+        respuesta = self.client.get(url)
+        self.assertEqual(self.revalidar(url, respuesta).status_code, 304)
+
+        # Otro alumno ocupa un lugar: cambia el cupo mostrado
+        InscripcionService.inscribir_alumno(alumnos[1].id, self.materia.id)
+        self.assertEqual(self.revalidar(url, respuesta).status_code, 200)
+
+        # El mismo contenido visto por otro usuario no comparte ETag
+        self.client.force_login(alumnos[1].usuario)
+        self.assertEqual(self.revalidar(url, respuesta).status_code, 200)
+
+
+class ApiCatalogoTest(TestCase):
+
+    def setUp(self):
+        self.carreras = [
+            Carrera.objects.create(nombre=f'Carrera {i}', codigo=f'CA{i:04d}', duracion_años=3)
+            for i in range(2)
+        ]
+        self.materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i:02d}', codigo=f'MAT{i:03d}', carrera=self.carreras[i % 2],
+                año=1 + i % 3, cuatrimestre=1 + i % 2, cupo_maximo=2, inscriptos_activos=2 if i % 4 == 0 else 0
+            )
+            for i in range(10)
+        ]
+
+    def recorrer(self, url, **parametros):
+        resultados = []
+        respuesta = self.client.get(url, parametros).json()
+        resultados.extend(respuesta['resultados'])
+        while respuesta['siguiente']:
+            with self.assertNumQueries(1):
+                respuesta = self.client.get(respuesta['siguiente']).json()
+            resultados.extend(respuesta['resultados'])
+        return resultados
+
+    @mock.patch.object(MateriasApiView, 'paginate_by', 3)
+    def test_paginacion_y_campos(self):
+        materias = self.recorrer(reverse('api_materias'), fields='id,cupo_disponible')
+        self.assertEqual(sorted(m['id'] for m in materias), sorted(m.id for m in self.materias))
+        self.assertEqual(len(materias), len({m['id'] for m in materias}))
+        self.assertEqual(set(materias[0]), {'id', 'cupo_disponible'})
+        self.assertEqual(sum(1 for m in materias if m['cupo_disponible'] == 0), 3)
+
+    @mock.patch.object(MateriasApiView, 'paginate_by', 3)
+    def test_filtros(self):
+        materias = self.recorrer(reverse('api_materias'), carrera=self.carreras[0].id, con_cupo=1)
+        esperadas = [m.id for m in self.materias if m.carrera == self.carreras[0] and m.inscriptos_activos == 0]
+        self.assertEqual(sorted(m['id'] for m in materias), sorted(esperadas))
+        self.assertEqual(materias[0]['carrera_nombre'], 'Carrera 0')
+
+    def test_carreras_activas(self):
+        Carrera.objects.filter(pk=self.carreras[1].pk).update(activa=False)
+        datos = self.client.get(reverse('api_carreras'), {'fields': 'codigo'}).json()
+        self.assertEqual(datos['resultados'], [{'codigo': 'CA0000'}])
+
+    def test_listado_sin_queryset(self):
+        vista = ApiListView()
+        with self.assertRaisesMessage(ImproperlyConfigured, 'A ApiListView le falta el queryset'):
+            vista.get_queryset()
+        vista.model = Carrera
+        self.assertEqual(vista.get_queryset().count(), 2)
+
+    def test_campo_desconocido(self):
+        respuesta = self.client.get(reverse('api_materias'), {'fields': 'id,password'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'error': 'Campos desconocidos: password'})
+
+    def test_gzip(self):
+        respuesta = self.client.get(reverse('api_materias'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        datos = json.loads(gzip.decompress(respuesta.content))
+        self.assertEqual(len(datos['resultados']), 10)
+
+    def test_mis_inscripciones(self):
+        self.assertEqual(self.client.get(reverse('api_mis_inscripciones')).status_code, 403)
+
+        usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x')
+        usuario.groups.add(Group.objects.create(name='Alumnos'))
+        alumno = Alumno.objects.create(usuario=usuario, legajo='20240000', carrera=self.carreras[1], año_ingreso=2024)
+        InscripcionService.inscribir_alumno(alumno.id, self.materias[1].id)
+        self.client.force_login(usuario)
+        datos = self.client.get(reverse('api_mis_inscripciones'), {'fields': 'materia_codigo'}).json()
+        self.assertEqual(datos['resultados'], [{'materia_codigo': 'MAT001'}])
+
+
+class VistasAsyncTest(TestCase):
+    """Variantes asíncronas servidas con VISTAS_ASYNC (como bajo ASGI)"""
+
+    def setUp(self):
+        cache.clear()
+        with self.settings(VISTAS_ASYNC=True):
+            recargar_urls()
+        self.addCleanup(recargar_urls)
+
+        grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=self.carrera,
+                año=1, cuatrimestre=1, cupo_maximo=1
+            )
+            for i in range(3)
+        ]
+        self.usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.usuario.groups.add(grupo)
+        self.alumno = Alumno.objects.create(usuario=self.usuario, legajo='20240000', carrera=self.carrera, año_ingreso=2024)
+        Inscripcion.objects.create(alumno=self.alumno, materia=self.materias[0])
+
+    def test_urls_resuelven_a_las_vistas_async(self):
+        for nombre, kwargs in [('oferta_academica', {}), ('mis_materias', {}), ('materias_publicas', {}),
+                               ('materias_con_cupo', {}), ('inscribirse', {'materia_id': 1})]:
+            vista = resolve(reverse(nombre, kwargs=kwargs)).func.view_class
+            self.assertIs(vista, getattr(views_async, vista.__name__))
+            self.assertTrue(vista.view_is_async)
+
+    async def test_oferta_academica_y_304(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('oferta_academica'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['materias_inscripto'], {self.materias[0].id})
+        self.assertEqual(respuesta.context['materias_disponibles'], 2)
+        self.assertEqual(respuesta.context['materias_sin_cupo'], 1)
+
+        revalidada = await self.async_client.get(
+            reverse('oferta_academica'), headers={'if-none-match': respuesta['ETag']}
+        )
+        self.assertEqual(revalidada.status_code, 304)
+
+    async def test_mis_materias(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('mis_materias'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([i.materia_id for i in respuesta.context['inscripciones']], [self.materias[0].id])
+
+    async def test_inscribirse(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.post(reverse('inscribirse', args=[self.materias[1].id]))
+        self.assertRedirects(respuesta, reverse('oferta_academica'), fetch_redirect_response=False)
+        self.assertTrue(await Inscripcion.objects.filter(alumno=self.alumno, materia=self.materias[1]).aexists())
+        materia = await Materia.objects.aget(id=self.materias[1].id)
+        self.assertEqual(materia.inscriptos_activos, 1)
+
+    async def test_sin_grupo_alumnos_redirige(self):
+        otro = await Usuario.objects.acreate(username='30000001', email='b@test.com', password='x', primer_login=False)
+        await self.async_client.aforce_login(otro)
+        respuesta = await self.async_client.get(reverse('oferta_academica'))
+        self.assertRedirects(respuesta, reverse('dashboard'), fetch_redirect_response=False)
+
+    async def test_materias_publicas_cacheada_para_anonimos(self):
+        MetricasService.reiniciar()
+        url = reverse('materias_publicas')
+        primera = await self.async_client.get(url)
+        segunda = await self.async_client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(segunda.content, primera.content)
+        self.assertEqual(MetricasService.resumen_cache()['pagina.materias_publicas'], {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5})
+
+    async def test_materias_con_cupo(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('materias_con_cupo'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['paginator'].count, 2)
+        self.assertEqual(respuesta.context['cupos_totales'], 2)
+
+
+def recargar_urls():
+    """Vuelve a importar las URLs para que tomen el valor actual de VISTAS_ASYNC"""
+    clear_url_caches()
+    importlib.reload(gestion_academica_urls)
+    importlib.reload(myapp_urls)
+
+
+class ColaInscripcionVistasTest(TestCase):
+
+    def setUp(self):
+        grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materia = Materia.objects.create(
+            nombre='Programación I', codigo='PROG101', carrera=self.carrera, año=1, cuatrimestre=1, cupo_maximo=10
+        )
+        self.usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.usuario.groups.add(grupo)
+        self.alumno = Alumno.objects.create(usuario=self.usuario, legajo='20240000', carrera=self.carrera, año_ingreso=2024)
+        self.client.force_login(self.usuario)
+
+    @override_settings(COLA_INSCRIPCION_ACTIVA=True)
+    def test_inscribirse_encola_y_devuelve_ticket(self):
+        respuesta = self.client.post(reverse('inscribirse', args=[self.materia.id]))
+        solicitud = SolicitudInscripcion.objects.get()
+        self.assertRedirects(respuesta, reverse('solicitud_inscripcion', args=[solicitud.ticket]))
+        self.assertFalse(Inscripcion.objects.exists())
+
+        api = reverse('api_solicitud_inscripcion', args=[solicitud.ticket])
+        pendiente = self.client.get(api)
+        self.assertEqual(pendiente.json()['estado'], 'pendiente')
+        self.assertEqual(pendiente.json()['posicion'], 1)
+        self.assertEqual(pendiente['Retry-After'], '1')
+
+        ColaInscripcionService.procesar_pendientes()
+        resultado = self.client.get(api).json()
+        self.assertEqual(resultado['estado'], 'aceptada')
+        self.assertIsNone(resultado['posicion'])
+        self.assertTrue(Inscripcion.objects.filter(alumno=self.alumno, materia=self.materia, activa=True).exists())
+        self.assertContains(self.client.get(reverse('solicitud_inscripcion', args=[solicitud.ticket])), 'Programación I')
+
+    def test_sin_cola_inscribe_en_el_momento(self):
+        self.client.post(reverse('inscribirse', args=[self.materia.id]))
+        self.assertTrue(Inscripcion.objects.filter(alumno=self.alumno, materia=self.materia).exists())
+        self.assertFalse(SolicitudInscripcion.objects.exists())
+
+    def test_ticket_de_otro_alumno(self):
+        otro = Alumno.objects.create(
+            usuario=Usuario.objects.create(username='30000001', email='b@test.com', password='x'),
+            legajo='20240001', carrera=self.carrera, año_ingreso=2024
+        )
+        solicitud = ColaInscripcionService.encolar(otro.id, self.materia.id)
+        self.assertEqual(self.client.get(reverse('api_solicitud_inscripcion', args=[solicitud.ticket])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('solicitud_inscripcion', args=[solicitud.ticket])).status_code, 404)
+
+
+class ListaEsperaVistasTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materia = Materia.objects.create(
+            nombre='Programación I', codigo='PROG101', carrera=self.carrera, año=1, cuatrimestre=1, cupo_maximo=1
+        )
+        alumnos = []
+        for i in range(2):
+            usuario = Usuario.objects.create(
+                username=f'3000000{i}', email=f'a{i}@test.com', password='x', primer_login=False
+            )
+            usuario.groups.add(grupo)
+            alumnos.append(Alumno.objects.create(
+                usuario=usuario, legajo=f'2024000{i}', carrera=self.carrera, año_ingreso=2024
+            ))
+        self.inscripcion = InscripcionService.inscribir_alumno(alumnos[0].id, self.materia.id)
+        self.alumno = alumnos[1]
+        self.client.force_login(self.alumno.usuario)
+
+    def test_anotarse_y_consultar_posicion(self):
+        self.assertContains(self.client.get(reverse('oferta_academica')), reverse('anotarse_lista_espera', args=[self.materia.id]))
+
+        respuesta = self.client.post(reverse('anotarse_lista_espera', args=[self.materia.id]), follow=True)
+        self.assertContains(respuesta, 'En espera (1°)')
+
+        espera = self.client.get(reverse('api_mi_lista_espera')).json()['resultados']
+        self.assertEqual([(e['materia_id'], e['estado'], e['posicion']) for e in espera], [(self.materia.id, 'en_espera', 1)])
+
+        InscripcionService.dar_de_baja_inscripcion(self.inscripcion.id)
+        espera = self.client.get(reverse('api_mi_lista_espera')).json()['resultados']
+        self.assertEqual([(e['estado'], e['posicion']) for e in espera], [('promovida', None)])
+
+    def test_salir_de_la_lista(self):
+        ListaEsperaService.anotar(self.alumno.id, self.materia.id)
+        self.client.post(reverse('salir_lista_espera', args=[self.materia.id]))
+        self.assertEqual(ListaEsperaService.posiciones_alumno(self.alumno.id), {})
+
+
+@override_settings(DEBUG=True)  # Con LocMemCache la idempotencia sólo se admite en desarrollo
+class InscripcionIdempotenteTest(TransactionTestCase):
+    """Pedidos repetidos de inscripción con la misma clave de idempotencia"""
+
+    def setUp(self):
+        cache.clear()
+        grupo = Group.objects.create(name='Alumnos')
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materia = Materia.objects.create(
+            nombre='Programación I', codigo='PROG101', carrera=self.carrera, año=1, cuatrimestre=1, cupo_maximo=10
+        )
+        self.usuario = Usuario.objects.create(username='30000000', email='a@test.com', password='x', primer_login=False)
+        self.usuario.groups.add(grupo)
+        self.alumno = Alumno.objects.create(usuario=self.usuario, legajo='20240000', carrera=self.carrera, año_ingreso=2024)
+        self.client.force_login(self.usuario)
+        self.url = reverse('inscribirse', args=[self.materia.id])
+
+    def _inscribirse(self, cliente=None, **kwargs):
+        """Mensajes con los que vuelve el alumno a la oferta académica"""
+        respuesta = (cliente or self.client).post(self.url, follow=True, **kwargs)
+        return [str(mensaje) for mensaje in get_messages(respuesta.wsgi_request)]
+
+    def test_oferta_incluye_la_clave(self):
+        respuesta = self.client.get(reverse('oferta_academica'))
+        self.assertContains(respuesta, f'name="clave_idempotencia" value="{respuesta.context["clave_idempotencia"]}"')
+
+    def test_clave_ligada_a_la_version_de_la_oferta(self):
+        url = reverse('oferta_academica')
+        primera = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 304)
+        # El HTML que el navegador reutiliza tiene la clave de la versión vigente
+        self.assertEqual(self.client.get(url).context['clave_idempotencia'], primera.context['clave_idempotencia'])
+
+        self._inscribirse(data={'clave_idempotencia': primera.context['clave_idempotencia']})
+        nueva = self.client.get(url)
+        self.assertNotEqual(nueva['ETag'], primera['ETag'])
+        self.assertNotEqual(nueva.context['clave_idempotencia'], primera.context['clave_idempotencia'])
+
+    def test_pedido_repetido_devuelve_el_resultado_original(self):
+        primera = self._inscribirse(data={'clave_idempotencia': 'abc'})
+        with mock.patch.object(InscripcionService, 'inscribir_alumno') as inscribir, \
+                CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.url, {'clave_idempotencia': 'abc'})
+        segunda = [str(mensaje) for mensaje in get_messages(self.client.get(reverse('oferta_academica')).wsgi_request)]
+
+        inscribir.assert_not_called()
+        self.assertFalse([c for c in consultas if 'inscripcion_inscripcion' in c['sql'] or 'materia_materia' in c['sql']])
+        self.assertEqual(segunda, primera)
+        self.assertEqual(segunda, ['Te has inscripto exitosamente a Programación I.'])
+        self.assertEqual(Inscripcion.objects.count(), 1)
+
+    def test_cabecera_idempotency_key(self):
+        self._inscribirse(headers={'Idempotency-Key': 'reintento-1'})
+        repetida = self._inscribirse(headers={'Idempotency-Key': 'reintento-1'})
+        self.assertEqual(repetida, ['Te has inscripto exitosamente a Programación I.'])
+
+    def test_clave_nueva_vuelve_a_validar(self):
+        self._inscribirse(data={'clave_idempotencia': 'abc'})
+        otra = self._inscribirse(data={'clave_idempotencia': 'def'})
+        self.assertEqual(otra, ['El alumno ya está inscripto en esta materia'])
+
+    def test_error_inesperado_permite_reintentar(self):
+        with mock.patch.object(InscripcionService, 'inscribir_alumno', side_effect=RuntimeError):
+            fallida = self._inscribirse(data={'clave_idempotencia': 'abc'})
+        self.assertEqual(fallida, ['Error al procesar la inscripción.'])
+
+        reintento = self._inscribirse(data={'clave_idempotencia': 'abc'})
+        self.assertEqual(reintento, ['Te has inscripto exitosamente a Programación I.'])
+
+    def test_pedidos_duplicados_concurrentes(self):
+        inscribir_alumno = InscripcionService.inscribir_alumno
+        llamadas = []
+
+        def inscribir_lento(*args):
+            llamadas.append(args)
+            time.sleep(0.2)
+            return inscribir_alumno(*args)
+
+        pedidos = 8
+        barrera = threading.Barrier(pedidos)
+        mensajes = []
+
+        def pedir(cliente):
+            try:
+                barrera.wait(timeout=10)
+                mensajes.append(self._inscribirse(cliente, data={'clave_idempotencia': 'doble-clic'}))
+            finally:
+                connection.close()
+
+        with mock.patch.object(InscripcionService, 'inscribir_alumno', side_effect=inscribir_lento):
+            clientes = [Client() for _ in range(pedidos)]
+            for cliente in clientes:
+                cliente.force_login(self.usuario)
+            hilos = [threading.Thread(target=pedir, args=(cliente,)) for cliente in clientes]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        self.assertEqual(len(llamadas), 1)
+        # Los repetidos no esperan al original: reciben su resultado o el aviso de que sigue en curso
+        exitosa = ['Te has inscripto exitosamente a Programación I.']
+        en_curso = ['Tu inscripción todavía se está procesando. Revisa tus materias en unos segundos.']
+        self.assertEqual(len(mensajes), pedidos)
+        self.assertIn(exitosa, mensajes)
+        self.assertEqual([m for m in mensajes if m not in (exitosa, en_curso)], [])
+        self.assertEqual(Inscripcion.objects.filter(alumno=self.alumno, materia=self.materia).count(), 1)
+
+    def test_pedido_en_curso_no_espera(self):
+        clave = InscripcionIdempotenteService.clave(self.alumno.id, self.materia.id, 'abc')
+        cache.add(clave, InscripcionIdempotenteService.EN_CURSO)
+        with self.assertNumQueries(0):
+            resultado = InscripcionIdempotenteService.inscribir(self.alumno.id, self.materia.id, 'abc')
+        self.assertEqual(resultado['nivel'], 'info')
+        self.assertFalse(Inscripcion.objects.exists())
+
+    @override_settings(DEBUG=False)
+    def test_cache_local_fuera_de_debug(self):
+        self.assertFalse(InscripcionIdempotenteService.activa())
+        self.assertEqual(
+            [error.id for error in checks.run_checks(tags=[checks.Tags.caches], include_deployment_checks=True)],
+            ['inscripcion.W001']
+        )
+        # La clave se ignora: el pedido repetido vuelve a validar
+        self._inscribirse(data={'clave_idempotencia': 'abc'})
+        repetida = self._inscribirse(data={'clave_idempotencia': 'abc'})
+        self.assertEqual(repetida, ['El alumno ya está inscripto en esta materia'])
+        self.assertIsNone(cache.get(InscripcionIdempotenteService.clave(self.alumno.id, self.materia.id, 'abc')))
+
+    @override_settings(DEBUG=False)
+    def test_advierte_al_iniciar_sin_cache_compartida(self):
+        with self.assertLogs('gestion.inscripciones', 'WARNING') as registro:
+            InscripcionIdempotenteService.advertir_si_inactiva()
+        self.assertIn('GESTION_CACHE_REDIS_URL', registro.output[0])
+
+        with override_settings(DEBUG=True), self.assertNoLogs('gestion.inscripciones'):
+            InscripcionIdempotenteService.advertir_si_inactiva()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Perfil específico de SQLite')
+class PerfilSqliteTest(SimpleTestCase):
+
+    def test_perfil_de_produccion(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            conexion = connections['default'].__class__({
+                **connection.settings_dict,
+                'NAME': str(Path(directorio) / 'perfil.sqlite3'),
+                'OPTIONS': settings.SQLITE_PERFIL_PRODUCCION,
+            }, alias='perfil')
+            try:
+                with conexion.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ['journal_mode', 'synchronous', 'busy_timeout', 'temp_store', 'cache_size']:
+                        pragmas[pragma] = cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+            finally:
+                conexion.close()
+
+        # synchronous NORMAL = 1, temp_store MEMORY = 2
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'temp_store': 2, 'cache_size': -65536,
+        })
+        self.assertEqual(conexion.transaction_mode, 'IMMEDIATE')
+
+
+class ConfiguracionPostgresqlTest(SimpleTestCase):
+
+    def test_conexiones_persistentes(self):
+        configuracion = configuracion_postgresql({'GESTION_DB_NOMBRE': 'gestion', 'GESTION_DB_CONN_MAX_AGE': '300'})
+        self.assertEqual(configuracion['NAME'], 'gestion')
+        self.assertEqual(configuracion['CONN_MAX_AGE'], 300)
+        self.assertTrue(configuracion['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', configuracion['OPTIONS'])
+
+    def test_pool(self):
+        configuracion = configuracion_postgresql({'GESTION_DB_POOL': '1', 'GESTION_DB_POOL_MAX': '20'})
+        # El pool de Django no admite conexiones persistentes
+        self.assertEqual(configuracion['CONN_MAX_AGE'], 0)
+        self.assertEqual(configuracion['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10.0})
+
+
+@override_settings(REPLICA_LECTURA='replica')
+class ReplicaLecturaTest(SimpleTestCase):
+    """Qué lecturas se envían a la réplica (sin consultar ninguna base)"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _base_de_lectura(self, request, vista, usuario=None):
+        """Base a la que el router envía las lecturas de la vista"""
+        request.user = usuario or AnonymousUser()
+        bases = []
+
+        def get_response(request):
+            middleware.process_view(request, vista.as_view(), (), {})
+            bases.append(self.router.db_for_read(Materia))
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(get_response)
+        middleware(request)
+        return bases[0]
+
+    def test_catalogo_anonimo_lee_de_la_replica(self):
+        self.assertEqual(self._base_de_lectura(self.factory.get('/'), views.MateriasPublicasView), 'replica')
+        self.assertEqual(self._base_de_lectura(self.factory.get('/'), views_async.MateriasPublicasView), 'replica')
+        self.assertEqual(self._base_de_lectura(self.factory.get('/'), views.CarrerasPublicasView), 'replica')
+
+    def test_catalogo_autenticado_lee_de_la_principal(self):
+        usuario = Usuario(username='30000000')
+        self.assertIsNone(self._base_de_lectura(self.factory.get('/'), views.MateriasPublicasView, usuario))
+        self.assertEqual(self._base_de_lectura(self.factory.get('/'), views.AlumnosPorMateriaView, usuario), 'replica')
+
+    def test_vistas_no_declaradas_y_escrituras_leen_de_la_principal(self):
+        self.assertIsNone(self._base_de_lectura(self.factory.get('/'), views.OfertaAcademicaView))
+        self.assertIsNone(self._base_de_lectura(self.factory.post('/'), views.MateriasPublicasView))
+        self.assertEqual(self.router.db_for_write(Materia), 'default')
+
+    def test_lectura_propia_despues_de_escribir(self):
+        response = ReplicaMiddleware(lambda request: HttpResponse())(self.factory.post('/inscribirse/1/'))
+        cookie = response.cookies[COOKIE_LECTURA_PROPIA]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_LECTURA_PROPIA_SEGUNDOS)
+
+        request = self.factory.get('/')
+        request.COOKIES[COOKIE_LECTURA_PROPIA] = cookie.value
+        self.assertIsNone(self._base_de_lectura(request, views.MateriasPublicasView))
+
+    def test_servicios_de_solo_lectura(self):
+        with mock.patch.object(ReportesService, '_calcular_reporte_general', lambda: self.router.db_for_read(Materia)):
+            cache.delete(ReportesService.CACHE_KEY_REPORTE_GENERAL)
+            self.assertEqual(ReportesService.reporte_general(), 'replica')
+        cache.delete(ReportesService.CACHE_KEY_REPORTE_GENERAL)
+        self.assertIsNone(self.router.db_for_read(Materia))
+
+    @override_settings(REPLICA_LECTURA=None)
+    def test_sin_replica_configurada(self):
+        with leer_de_replica():
+            self.assertIsNone(self.router.db_for_read(Materia))
+
+
+@override_settings(REPLICA_LECTURA='replica')
+class ReplicaAtrasadaTest(TransactionTestCase):
+    """
+    Réplica que no recibe los cambios de la principal (otra base SQLite en
+    memoria): lo que se cachea al reconstruir después de una invalidación
+    sale de la principal
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # La réplica se agrega acá y no en settings para que el runner no la cree como espejo
+        connections.settings['replica'] = {**connections['default'].settings_dict, 'NAME': ':memory:'}
+        call_command('migrate', database='replica', verbosity=0, skip_checks=True)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def setUp(self):
+        datos = {'codigo': 'TP2024', 'duracion_años': 3}
+        self.carrera = Carrera.objects.create(nombre='Carrera Principal', **datos)
+        Carrera.objects.using('replica').create(id=self.carrera.id, nombre='Carrera Replica', **datos)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_pagina_del_catalogo(self):
+        url = reverse('carreras_publicas')
+        self.assertContains(self.client.get(url), 'Carrera Replica')
+
+        self.carrera.nombre = 'Carrera Renombrada'
+        self.carrera.save()
+        self.assertContains(self.client.get(url), 'Carrera Renombrada')
+        # La página nueva quedó en caché con los datos de la principal
+        self.assertContains(self.client.get(url), 'Carrera Renombrada')
+
+    def test_reporte_general(self):
+        def calcular():
+            return list(Carrera.objects.values_list('nombre', flat=True))
+
+        with mock.patch.object(ReportesService, '_calcular_reporte_general', calcular):
+            self.assertEqual(ReportesService.reporte_general(), ['Carrera Replica'])
+            ReportesService.invalidar_reporte_general()
+            self.assertEqual(ReportesService.reporte_general(), ['Carrera Principal'])
+
+            with override_settings(REPLICA_RETRASO_MAXIMO_SEGUNDOS=0):
+                # Sin invalidaciones recientes se asume la réplica al día
+                ReportesService.invalidar_reporte_general()
+                self.assertEqual(ReportesService.reporte_general(), ['Carrera Replica'])
+
+
+def urls_con_nombre(patrones):
+    """Patrones con nombre de las URLs del proyecto, sin las del admin de Django"""
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            if patron.namespace != 'admin':
+                yield from urls_con_nombre(patron.url_patterns)
+        elif patron.name:
+            yield patron
+
+
+class PresupuestoConsultasTest(PresupuestoConsultasMixin, TestCase):
+    """Cada URL del proyecto dentro de su presupuesto de consultas y sin N+1"""
+
+    # URLs del portal de alumnos; las demás se recorren como administrador
+    URLS_DE_ALUMNO = {
+        'cambiar_password_primer_login', 'mis_materias', 'oferta_academica', 'inscribirse',
+        'solicitud_inscripcion', 'anotarse_lista_espera', 'salir_lista_espera',
+        'api_mis_inscripciones', 'api_solicitud_inscripcion', 'api_mi_lista_espera',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        alumnos = Group.objects.create(name='Alumnos')
+        cls.admin = Usuario.objects.create(username='admin', email='admin@test.com', password='x', primer_login=False)
+        cls.admin.groups.add(Group.objects.create(name='Administradores'))
+        cls.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        cls.materias = [
+            Materia.objects.create(
+                nombre=f'Materia {i}', codigo=f'MAT{i:03d}', carrera=cls.carrera,
+                año=1 + i % 3, cuatrimestre=1 + i % 2, cupo_maximo=8 if i else 1
+            )
+            for i in range(8)
+        ]
+        cls.alumnos = []
+        for i in range(8):
+            usuario = Usuario.objects.create(
+                username=f'3000000{i}', first_name=f'Nombre {i}', last_name='Apellido',
+                email=f'a{i}@test.com', password='x', primer_login=False
+            )
+            usuario.groups.add(alumnos)
+            cls.alumnos.append(Alumno.objects.create(
+                usuario=usuario, legajo=f'2024000{i}', carrera=cls.carrera, año_ingreso=2024
+            ))
+        for alumno in cls.alumnos:
+            for materia in cls.materias[1:4]:
+                InscripcionService.inscribir_alumno(alumno.id, materia.id)
+        cls.alumno = cls.alumnos[0]
+        cls.inscripcion = InscripcionService.inscribir_alumno(cls.alumno.id, cls.materias[0].id)
+        ListaEsperaService.anotar(cls.alumnos[1].id, cls.materias[0].id)
+        cls.solicitud = ColaInscripcionService.encolar(cls.alumno.id, cls.materias[4].id)
+
+    def setUp(self):
+        cache.clear()
+
+    def argumentos(self, patron):
+        """Argumentos de ejemplo para los parámetros de la URL"""
+        por_prefijo = {
+            'usuario': self.alumnos[2].usuario, 'carrera': self.carrera, 'materia': self.materias[0],
+            'alumno': self.alumno, 'inscripcion': self.inscripcion,
+        }
+        valores = {
+            'materia_id': self.materias[0].id,
+            'ticket': self.solicitud.ticket,
+            'entidad': 'inscripciones',
+        }
+        kwargs = {}
+        for parametro in patron.pattern.converters:
+            if parametro == 'pk':
+                kwargs[parametro] = por_prefijo[patron.name.split('_')[0]].pk
+            else:
+                kwargs[parametro] = valores[parametro]
+        return kwargs
+
+    def pedir(self, patron):
+        """GET de la URL, o POST si la vista sólo acepta POST"""
+        url = reverse(patron.name, kwargs=self.argumentos(patron))
+        filtros = {
+            'materias_por_carrera': {'carrera': self.carrera.id},
+            'alumnos_por_materia': {'materia': self.materias[1].id},
+        }
+        usuario = self.alumnos[1].usuario if patron.name in self.URLS_DE_ALUMNO else self.admin
+        self.client.force_login(usuario)
+
+        with self.assertPresupuestoConsultas(patron.name):
+            if hasattr(patron.callback.view_class, 'get'):
+                return self.client.get(url, filtros.get(patron.name))
+            return self.client.post(url)
+
+    def test_todas_las_urls(self):
+        patrones = {patron.name: patron for patron in urls_con_nombre(get_resolver().url_patterns)}
+        self.assertGreater(len(patrones), 40)
+        for nombre, patron in patrones.items():
+            with self.subTest(url=nombre):
+                respuesta = self.pedir(patron)
+                self.assertLess(respuesta.status_code, 500)
+
+    @override_settings(PRESUPUESTO_CONSULTAS_SIMILARES=3)
+    def test_detecta_n_mas_1(self):
+        with self.assertRaisesMessage(self.failureException, 'posible N+1, 3 consultas'):
+            with self.assertPresupuestoConsultas('inscripcion_list'):
+                [str(inscripcion) for inscripcion in Inscripcion.objects.filter(alumno=self.alumno)[:3]]
+
+        with self.assertPresupuestoConsultas('inscripcion_list'):
+            [str(inscripcion) for inscripcion in Inscripcion.objects.filter(alumno=self.alumno).select_related(
+                'alumno__usuario', 'materia'
+            )]
+
+
+@override_settings(PRESUPUESTO_CONSULTAS_ACTIVO=True, PRESUPUESTO_CONSULTAS={'api_materias': 0})
+class PresupuestoConsultasMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        Materia.objects.create(nombre='Materia', codigo='MAT001', carrera=carrera, año=1, cuatrimestre=1, cupo_maximo=10)
+
+    def test_cabecera_y_warning(self):
+        with self.assertLogs('gestion.consultas', 'WARNING') as logs:
+            respuesta = Client().get(reverse('api_materias'))
+        self.assertTrue(respuesta['X-Consultas'].startswith('1; tiempo='))
+        self.assertEqual(logs.output, ['WARNING:gestion.consultas:api_materias: 1 consultas, el presupuesto es 0'])
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+    def test_modo_estricto(self):
+        with self.assertLogs('gestion.consultas', 'WARNING'), self.assertRaises(PresupuestoConsultasExcedido):
+            Client().get(reverse('api_materias'))
+
+    @override_settings(PRESUPUESTO_CONSULTAS_ACTIVO=False)
+    def test_inactivo(self):
+        self.assertNotIn('X-Consultas', Client().get(reverse('api_materias')))
+
+    def test_huella(self):
+        self.assertEqual(
+            huella("SELECT * FROM t WHERE id IN (%s, %s) AND nombre = 'x''y' LIMIT 21"),
+            huella('SELECT *  FROM t WHERE id IN (%s) AND nombre = %s LIMIT 1'),
+        )
+
+
+class ServerTimingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create(username='30000000', email='a@test.com', primer_login=False)
+
+    def metricas(self, respuesta):
+        return dict(metrica.split(';')[0:2] for metrica in respuesta['Server-Timing'].split(', '))
+
+    def test_db_render_y_total(self):
+        metricas = self.metricas(self.client.get(reverse('carreras_publicas')))
+        self.assertEqual(list(metricas), ['db', 'render', 'total'])
+        self.assertTrue(all(valor.startswith('dur=') for valor in metricas.values()))
+
+    def test_auth_en_el_login(self):
+        respuesta = self.client.post(reverse('login'), {'username': 'a@test.com', 'password': '30000000'})
+        self.assertRedirects(respuesta, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertIn('auth', self.metricas(respuesta))
+
+    def test_medir_fuera_de_un_request(self):
+        with medir('auth'):
+            pass
+
+    @override_settings(SERVER_TIMING_ACTIVO=False)
+    def test_inactivo(self):
+        self.assertNotIn('Server-Timing', Client().get(reverse('carreras_publicas')))
+
+
+class PerfiladoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        configuracion = override_settings(PERFILADO_ACTIVO=True, PERFILADO_DIRECTORIO=self.directorio)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+        self.admin = Usuario.objects.create(username='admin', email='admin@test.com', password='x', primer_login=False)
+        self.admin.groups.add(Group.objects.create(name='Administradores'))
+        self.client = Client()
+
+    def test_perfil_a_pedido_de_un_administrador(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('carrera_list'), {'perfilar': '1'})
+        self.assertEqual([archivo.name for archivo in self.directorio.iterdir()], [respuesta['X-Perfil']])
+        self.assertEqual(nombre_url(self.directorio / respuesta['X-Perfil']), 'carrera_list')
+
+        salida = StringIO()
+        call_command('resumir_perfiles', '--top', '5', stdout=salida)
+        self.assertIn('1 perfiles: carrera_list (1)', salida.getvalue())
+
+    def test_otros_usuarios_no_pueden_perfilar(self):
+        self.client.force_login(Usuario.objects.create(username='30000000', email='a@test.com', password='x'))
+        self.assertNotIn('X-Perfil', self.client.get(reverse('carreras_publicas'), {'perfilar': '1'}))
+        self.assertNotIn('X-Perfil', Client().get(reverse('carreras_publicas'), {'perfilar': '1'}))
+        self.assertFalse(any(self.directorio.iterdir()))
+
+    @override_settings(PERFILADO_MUESTREO=1)
+    def test_muestreo(self):
+        self.assertIn('X-Perfil', self.client.get(reverse('carreras_publicas')))
+
+    def test_resumir_sin_perfiles(self):
+        with self.assertRaisesMessage(CommandError, 'No hay perfiles'):
+            call_command('resumir_perfiles')
@@ -2,8 +2,12 @@
 URLs para la aplicación de gestión académica
 """
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views, views_async
+
+# Vistas con variante asíncrona (ver VISTAS_ASYNC)
+vistas = views_async if settings.VISTAS_ASYNC else views
 
 urlpatterns = [
     # Página principal
@@ -13,19 +17,34 @@ urlpatterns = [
     path('cambiar-password-primer-login/', views.CambiarPasswordPrimerLoginView.as_view(), name='cambiar_password_primer_login'),
     
     # Vistas específicas para alumnos
-    path('mis-materias/', views.MisMateriaView.as_view(), name='mis_materias'),
-    path('oferta-academica/', views.OfertaAcademicaView.as_view(), name='oferta_academica'),
-    path('inscribirse/<int:materia_id>/', views.InscribirseView.as_view(), name='inscribirse'),
+    path('mis-materias/', vistas.MisMateriaView.as_view(), name='mis_materias'),
+    path('oferta-academica/', vistas.OfertaAcademicaView.as_view(), name='oferta_academica'),
+    path('inscribirse/<int:materia_id>/', vistas.InscribirseView.as_view(), name='inscribirse'),
+    path('solicitudes-inscripcion/<uuid:ticket>/', views.SolicitudInscripcionView.as_view(), name='solicitud_inscripcion'),
+    path('lista-espera/<int:materia_id>/', views.AnotarseListaEsperaView.as_view(), name='anotarse_lista_espera'),
+    path('lista-espera/<int:materia_id>/salir/', views.SalirListaEsperaView.as_view(), name='salir_lista_espera'),
     
     # Vistas para invitados
     path('carreras-publicas/', views.CarrerasPublicasView.as_view(), name='carreras_publicas'),
-    path('materias-publicas/', views.MateriasPublicasView.as_view(), name='materias_publicas'),
+    path('materias-publicas/', vistas.MateriasPublicasView.as_view(), name='materias_publicas'),
     
     # Filtros y consultas
     path('materias-por-carrera/', views.MateriasPorCarreraView.as_view(), name='materias_por_carrera'),
     path('alumnos-por-materia/', views.AlumnosPorMateriaView.as_view(), name='alumnos_por_materia'),
-    path('materias-con-cupo/', views.MateriasConCupoView.as_view(), name='materias_con_cupo'),
+    path('materias-con-cupo/', vistas.MateriasConCupoView.as_view(), name='materias_con_cupo'),
     
     # Reportes
     path('reportes/', views.ReportesView.as_view(), name='reportes'),
+    path('metricas/cache/', views.MetricasCacheView.as_view(), name='metricas_cache'),
+    path('metricas/cola-inscripcion/', views.MetricasColaInscripcionView.as_view(), name='metricas_cola_inscripcion'),
+    
+    # Exportaciones (CSV/JSON)
+    path('exportar/<str:entidad>/', views.ExportarView.as_view(), name='exportar'),
+    
+    # API JSON para el portal de alumnos
+    path('api/carreras/', api.CarrerasApiView.as_view(), name='api_carreras'),
+    path('api/materias/', api.MateriasApiView.as_view(), name='api_materias'),
+    path('api/mis-inscripciones/', api.MisInscripcionesApiView.as_view(), name='api_mis_inscripciones'),
+    path('api/solicitudes-inscripcion/<uuid:ticket>/', api.SolicitudInscripcionApiView.as_view(), name='api_solicitud_inscripcion'),
+    path('api/mi-lista-espera/', api.MiListaEsperaApiView.as_view(), name='api_mi_lista_espera'),
 ]
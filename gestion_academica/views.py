@@ -1,21 +1,38 @@
+import hashlib
+import uuid
+
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 from django.contrib import messages
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import condition
 from django.shortcuts import redirect, render
 from django.views import View
-from django.views.generic import TemplateView
+from django.views.generic import ListView, TemplateView
 from django.core.exceptions import ValidationError
 
+from alumno.models import Alumno
 from carrera.models import Carrera
-from inscripcion.models import Inscripcion
-from inscripcion.services import InscripcionService
+from inscripcion.models import EsperaInscripcion, Inscripcion
+from inscripcion.services import (
+    ColaInscripcionService,
+    InscripcionIdempotenteService,
+    InscripcionService,
+    ListaEsperaService,
+)
 from materia.models import Materia
 from materia.services import MateriaService
 from usuario.views import AdminRequiredMixin, AlumnoRequiredMixin
 
-from .services import ReportesService
-from .forms import FiltroMateriaForm
+from .services import CatalogoService, ExportacionService, MetricasService, ReportesService
+from .forms import ExportacionForm, FiltroMateriaForm
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'gestion_academica/dashboard.html'
@@ -32,9 +49,11 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         context['user'] = user
         
-        if user.groups.filter(name='Administradores').exists():
-            context['stats'] = ReportesService.reporte_general()
-        elif user.groups.filter(name='Alumnos').exists():
+        if user.tiene_grupo('Administradores'):
+            # Se calcula sólo si el fragmento de estadísticas no está en caché
+            context['mostrar_stats'] = True
+            context['stats'] = SimpleLazyObject(ReportesService.reporte_general)
+        elif user.tiene_grupo('Alumnos'):
             try:
                 alumno = user.perfil_alumno
                 context['alumno'] = alumno
@@ -80,8 +99,102 @@ class CambiarPasswordPrimerLoginView(LoginRequiredMixin, AlumnoRequiredMixin, Vi
         return render(request, self.template_name, {'form': form})
 
 
-class CarrerasPublicasView(TemplateView):
+def version_catalogo(request, obtener_querysets=None):
+    """
+    (etag, last_modified) de los querysets que devuelve
+    obtener_querysets(request), calculado una sola vez por request.
+    Sin obtener_querysets es la versión publicada del catálogo, para
+    páginas que no muestran cupos ni inscripciones.
+    """
+    if not hasattr(request, '_version_catalogo'):
+        if len(messages.get_messages(request)):
+            # Hay mensajes pendientes: la página debe renderizarse
+            request._version_catalogo = (None, None)
+        elif obtener_querysets is None:
+            request._version_catalogo = CatalogoService.version_publicada(request.user)
+        else:
+            request._version_catalogo = CatalogoService.version(request.user, *obtener_querysets(request))
+    return request._version_catalogo
+
+
+def validadores_catalogo(obtener_querysets=None):
+    """
+    Decorador con ETag y Last-Modified derivados de los querysets que
+    devuelve obtener_querysets(request) (ver CatalogoService.version), o
+    de la generación del catálogo si no se indican (ver
+    CatalogoService.version_publicada). Si el cliente ya tiene la versión vigente se responde 304 sin armar
+    el contexto ni renderizar la plantilla.
+    """
+    return condition(
+        etag_func=lambda request, *args, **kwargs: version_catalogo(request, obtener_querysets)[0],
+        last_modified_func=lambda request, *args, **kwargs: version_catalogo(request, obtener_querysets)[1],
+    )
+
+
+def _materias_y_carreras(request):
+    materias = Materia.objects.all()
+    carrera_id = request.GET.get('carrera', '')
+    if carrera_id.isdigit():
+        materias = materias.filter(carrera_id=carrera_id)
+    return [materias, Carrera.objects.all()]
+
+
+def _oferta_del_alumno(request):
+    return [
+        Materia.objects.filter(carrera__alumnos__usuario=request.user),
+        Carrera.objects.filter(alumnos__usuario=request.user),
+        Inscripcion.objects.filter(alumno__usuario=request.user),
+        # Las posiciones en las listas de espera cambian con las de los demás
+        EsperaInscripcion.objects.filter(materia__carrera__alumnos__usuario=request.user),
+    ]
+
+
+class CachePaginaAnonimaMixin:
+    """
+    Sirve la página completa desde la caché a los usuarios anónimos.
+    La clave incluye la generación del catálogo, por lo que cualquier
+    cambio en carreras o materias publica enseguida la versión nueva.
+    Si la vista lee de la réplica, la página nueva se arma desde la
+    principal hasta que la réplica tenga el cambio (ver myapp/replica.py).
+    """
+    cache_llenada = 'catalogo'
+    
+    def dispatch(self, request, *args, **kwargs):
+        if not self.pagina_cacheable(request, request.user):
+            return super().dispatch(request, *args, **kwargs)
+        
+        clave = CatalogoService.clave('pagina', request.get_full_path())
+        response = cache.get(clave)
+        if response is not None:
+            return self.respuesta_cacheada(request, response)
+        
+        return self.guardar_al_renderizar(clave, super().dispatch(request, *args, **kwargs))
+    
+    def pagina_cacheable(self, request, usuario):
+        return (request.method == 'GET' and not usuario.is_authenticated
+                and not len(messages.get_messages(request)))
+    
+    def respuesta_cacheada(self, request, response):
+        MetricasService.registrar_cache(f'pagina.{request.resolver_match.url_name}', acierto=True)
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified')),
+            response=response,
+        )
+    
+    def guardar_al_renderizar(self, clave, response):
+        MetricasService.registrar_cache(f'pagina.{self.request.resolver_match.url_name}', acierto=False)
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            timeout = getattr(settings, 'CATALOGO_CACHE_TTL', 600)
+            response.add_post_render_callback(lambda r: cache.set(clave, r, timeout))
+        return response
+
+
+@method_decorator(validadores_catalogo(), name='get')
+class CarrerasPublicasView(CachePaginaAnonimaMixin, TemplateView):
     template_name = 'gestion_academica/publico/carreras.html'
+    leer_de_replica = 'anonimos'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -89,8 +202,10 @@ class CarrerasPublicasView(TemplateView):
         return context
 
 
-class MateriasPublicasView(TemplateView):
+@method_decorator(validadores_catalogo(), name='get')
+class MateriasPublicasView(CachePaginaAnonimaMixin, TemplateView):
     template_name = 'gestion_academica/publico/materias.html'
+    leer_de_replica = 'anonimos'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -107,6 +222,7 @@ class MateriasPublicasView(TemplateView):
         return context
 
 
+@method_decorator(validadores_catalogo(_materias_y_carreras), name='get')
 class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
     template_name = 'gestion_academica/filtros/materias_por_carrera.html'
     
@@ -118,8 +234,9 @@ class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
         
         if carrera_id:
             try:
-                context['materias'] = MateriaService.obtener_materias_por_carrera(carrera_id)
-                context['carrera_seleccionada'] = Carrera.objects.get(id=carrera_id)
+                context['carrera_seleccionada'], context['materias'] = (
+                    MateriaService.obtener_carrera_y_materias(carrera_id)
+                )
             except ValidationError as e:
                 messages.error(self.request, str(e))
         
@@ -128,6 +245,7 @@ class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
 
 class AlumnosPorMateriaView(LoginRequiredMixin, TemplateView):
     template_name = 'gestion_academica/filtros/alumnos_por_materia.html'
+    leer_de_replica = True
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -136,8 +254,9 @@ class AlumnosPorMateriaView(LoginRequiredMixin, TemplateView):
         
         if materia_id:
             try:
-                context['inscripciones'] = InscripcionService.obtener_alumnos_materia(materia_id)
-                context['materia_seleccionada'] = Materia.objects.get(id=materia_id)
+                context['materia_seleccionada'], context['inscripciones'] = (
+                    InscripcionService.obtener_materia_y_alumnos(materia_id)
+                )
             except ValidationError as e:
                 messages.error(self.request, str(e))
         
@@ -146,12 +265,17 @@ class AlumnosPorMateriaView(LoginRequiredMixin, TemplateView):
         return context
 
 
-class MateriasConCupoView(LoginRequiredMixin, TemplateView):
-    template_name = 'gestion_academica/filtros/materias_con_cupo.html'
+class MateriasConCupoView(LoginRequiredMixin, ListView):
+    template_name = 'gestion_academica/publico/materias_con_cupo.html'
+    context_object_name = 'materias_con_cupo'
+    paginate_by = 10
+    
+    def get_queryset(self):
+        return MateriaService.obtener_materias_con_cupo()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['materias'] = MateriaService.obtener_materias_con_cupo()
+        context.update(MateriaService.resumen_materias_con_cupo(self.object_list))
         return context
 
 
@@ -164,6 +288,46 @@ class ReportesView(AdminRequiredMixin, TemplateView):
         context['materias_por_carrera'] = ReportesService.materias_con_cupo_por_carrera()
         return context
 
+
+class MetricasCacheView(AdminRequiredMixin, View):
+    """Aciertos y fallos de las cachés de páginas y fragmentos de este proceso"""
+    def get(self, request):
+        return JsonResponse({
+            'generacion_catalogo': CatalogoService.generacion(),
+            'caches': MetricasService.resumen_cache(),
+        })
+
+
+class ExportarView(AdminRequiredMixin, View):
+    """Exporta alumnos, materias o inscripciones en CSV o JSON sin cargarlos en memoria"""
+    def get(self, request, entidad):
+        if entidad not in ExportacionService.ENTIDADES:
+            raise Http404('Entidad de exportación inexistente')
+        
+        form = ExportacionForm(request.GET)
+        if not form.is_valid():
+            messages.error(request, 'Los filtros de exportación no son válidos.')
+            return redirect('dashboard')
+        
+        carrera = form.cleaned_data['carrera']
+        filtros = {
+            'carrera_id': carrera.id if carrera else None,
+            'estado': form.cleaned_data['estado'] or 'activos',
+        }
+        formato = form.cleaned_data['formato'] or 'csv'
+        
+        if formato == 'json':
+            contenido = ExportacionService.generar_json(entidad, **filtros)
+            content_type = 'application/json'
+        else:
+            contenido = ExportacionService.generar_csv(entidad, **filtros)
+            content_type = 'text/csv; charset=utf-8'
+        
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{entidad}.{formato}"'
+        return response
+
+
 class MisMateriaView(AlumnoRequiredMixin, TemplateView):
     """Vista para que el alumno vea sus materias"""
     template_name = 'gestion_academica/alumno/mis_materias.html'
@@ -186,6 +350,7 @@ class MisMateriaView(AlumnoRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(validadores_catalogo(_oferta_del_alumno), name='get')
 class OfertaAcademicaView(AlumnoRequiredMixin, TemplateView):
     """Vista para que el alumno vea la oferta académica de su carrera"""
     template_name = 'gestion_academica/alumno/oferta_academica.html'
@@ -199,13 +364,25 @@ class OfertaAcademicaView(AlumnoRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         try:
-            alumno = self.request.user.perfil_alumno
-            context['alumno'] = alumno
-            context['materias'] = MateriaService.obtener_materias_por_carrera(alumno.carrera.id)
+            alumno = Alumno.objects.select_related('carrera', 'usuario').get(usuario=self.request.user)
+            materias = con_posicion_en_espera(
+                MateriaService.obtener_oferta_academica(alumno.carrera_id),
+                ListaEsperaService.posiciones_alumno(alumno.id)
+            )
             
             # Materias en las que ya está inscripto
-            inscripciones = Inscripcion.objects.filter(alumno=alumno, activa=True)
-            context['materias_inscripto'] = [i.materia.id for i in inscripciones]
+            inscripto = set(
+                Inscripcion.objects.filter(alumno=alumno, activa=True).values_list('materia_id', flat=True)
+            )
+            
+            context['alumno'] = alumno
+            context['materias'] = materias
+            context['materias_inscripto'] = inscripto
+            context['materias_disponibles'] = sum(
+                1 for m in materias if m['tiene_cupo'] and m['id'] not in inscripto
+            )
+            context['materias_sin_cupo'] = sum(1 for m in materias if not m['tiene_cupo'])
+            context['clave_idempotencia'] = clave_idempotencia_de_pagina(self.request, _oferta_del_alumno)
             
         except Exception as e:
             messages.error(self.request, 'No se pudo cargar la oferta académica.')
@@ -213,17 +390,127 @@ class OfertaAcademicaView(AlumnoRequiredMixin, TemplateView):
         return context
 
 
+def con_posicion_en_espera(materias, posiciones):
+    """
+    Copia de la oferta académica (compartida en la caché) con la posición
+    del alumno en la lista de espera de cada materia en la que está anotado
+    """
+    if not posiciones:
+        return materias
+    return [
+        {**materia, 'posicion_espera': posiciones[materia['id']]} if materia['id'] in posiciones else materia
+        for materia in materias
+    ]
+
+
 class InscribirseView(AlumnoRequiredMixin, View):
-    """Vista para que el alumno se inscriba a una materia"""
+    """
+    Vista para que el alumno se inscriba a una materia.
+    Con la cola de inscripción activa sólo encola la solicitud y redirige
+    a la página que muestra su resultado. Los pedidos repetidos con la
+    misma clave de idempotencia reciben el resultado del primero.
+    """
     def post(self, request, materia_id):
         try:
             alumno = request.user.perfil_alumno
-            inscripcion = InscripcionService.inscribir_alumno(alumno.id, materia_id)
-            messages.success(request, f'Te has inscripto exitosamente a {inscripcion.materia.nombre}.')
+            resultado = InscripcionIdempotenteService.inscribir(
+                alumno.id, materia_id, clave_idempotencia(request)
+            )
+        except Exception as e:
+            messages.error(request, 'Error al procesar la inscripción.')
+            return redirect('oferta_academica')
+        return respuesta_inscripcion(request, resultado)
+
+
+def clave_idempotencia(request):
+    """
+    Clave de idempotencia del pedido: el campo oculto del formulario de la
+    oferta académica o la cabecera Idempotency-Key de otros clientes
+    """
+    clave = request.POST.get('clave_idempotencia') or request.headers.get('Idempotency-Key', '')
+    return clave if 0 < len(clave) <= 64 else None
+
+
+def clave_idempotencia_de_pagina(request, obtener_querysets):
+    """
+    Clave de idempotencia del formulario, derivada del ETag de la página:
+    un 304 reutiliza el HTML que ya tiene el navegador y con él la clave,
+    que así sigue siendo la de esa versión. Cuando la página cambia (por
+    ejemplo, después de inscribirse) la clave también cambia.
+    """
+    etag = version_catalogo(request, obtener_querysets)[0]
+    if etag is None:  # Página sin ETag: el navegador no la revalida
+        return uuid.uuid4().hex
+    return hashlib.sha256(f'{request.user.pk}:{etag}'.encode()).hexdigest()[:32]
+
+
+def respuesta_inscripcion(request, resultado):
+    """Redirección con el mensaje del resultado de InscripcionIdempotenteService.inscribir"""
+    if resultado.get('ticket'):
+        return redirect('solicitud_inscripcion', ticket=resultado['ticket'])
+    if resultado['nivel'] == 'success':
+        messages.success(request, resultado['mensaje'])
+    elif resultado['nivel'] == 'info':
+        messages.info(request, resultado['mensaje'])
+    else:
+        messages.error(request, resultado['mensaje'], extra_tags='danger')
+    return redirect('oferta_academica')
+
+
+class AnotarseListaEsperaView(AlumnoRequiredMixin, View):
+    """Vista para que el alumno se anote en la lista de espera de una materia sin cupo"""
+    def post(self, request, materia_id):
+        try:
+            espera = ListaEsperaService.anotar(request.user.perfil_alumno.id, materia_id)
+            if espera.posicion is None:
+                messages.success(request, f'Se liberó un lugar: te has inscripto a {espera.materia.nombre}.')
+            else:
+                messages.success(
+                    request,
+                    f'Estás en la lista de espera de {espera.materia.nombre} (posición {espera.posicion}). '
+                    'Si se libera un lugar te inscribiremos automáticamente.'
+                )
         except ValidationError as e:
             messages.error(request, str(e.message), extra_tags='danger')
         except Exception as e:
-            messages.error(request, 'Error al procesar la inscripción.')
+            messages.error(request, 'Error al anotarse en la lista de espera.')
+        
+        return redirect('oferta_academica')
+
+
+class SalirListaEsperaView(AlumnoRequiredMixin, View):
+    """Vista para que el alumno deje la lista de espera de una materia"""
+    def post(self, request, materia_id):
+        try:
+            ListaEsperaService.cancelar(request.user.perfil_alumno.id, materia_id)
+            messages.success(request, 'Has salido de la lista de espera.')
+        except ValidationError as e:
+            messages.error(request, str(e.message), extra_tags='danger')
+        except Exception as e:
+            messages.error(request, 'Error al salir de la lista de espera.')
         
         return redirect('oferta_academica')
 
+
+class SolicitudInscripcionView(AlumnoRequiredMixin, TemplateView):
+    """Resultado de una solicitud de inscripción encolada"""
+    template_name = 'gestion_academica/alumno/solicitud_inscripcion.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            solicitud = ColaInscripcionService.obtener_solicitud(
+                kwargs['ticket'], self.request.user.perfil_alumno.id
+            )
+        except (Alumno.DoesNotExist, ValidationError):
+            raise Http404('La solicitud de inscripción no existe')
+        
+        context['solicitud'] = solicitud
+        context['posicion'] = ColaInscripcionService.posicion(solicitud)
+        return context
+
+
+class MetricasColaInscripcionView(AdminRequiredMixin, View):
+    """Rendimiento de la cola de inscripción en el último minuto"""
+    def get(self, request):
+        return JsonResponse(ColaInscripcionService.metricas())
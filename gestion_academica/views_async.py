@@ -0,0 +1,217 @@
+"""
+Variantes asíncronas de las vistas de lectura del portal de alumnos y del
+catálogo, y de la inscripción. Se sirven en lugar de las de views.py
+cuando VISTAS_ASYNC está activo (myapp/asgi.py lo activa).
+
+Las consultas usan el ORM asíncrono (aget, acount, async for) y los
+servicios sincrónicos se invocan con sync_to_async, que los ejecuta en el
+hilo de base de datos sin bloquear el event loop. Las plantillas se
+renderizan fuera del event loop (Django las renderiza con sync_to_async),
+así que los querysets que sólo se leen dentro de fragmentos cacheados se
+dejan perezosos, igual que en las vistas sincrónicas.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.views import View
+from django.views.generic import ListView, TemplateView
+
+from alumno.models import Alumno
+from inscripcion.models import Inscripcion
+from inscripcion.services import InscripcionIdempotenteService, InscripcionService, ListaEsperaService
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.views import AsyncAlumnoRequiredMixin, AsyncLoginRequiredMixin
+
+from .forms import FiltroMateriaForm
+from .services import CatalogoService
+from .views import (
+    CachePaginaAnonimaMixin,
+    _oferta_del_alumno,
+    clave_idempotencia,
+    clave_idempotencia_de_pagina,
+    con_posicion_en_espera,
+    respuesta_inscripcion,
+    version_catalogo,
+)
+
+
+class CachePaginaAnonimaAsyncMixin(CachePaginaAnonimaMixin):
+    """CachePaginaAnonimaMixin para vistas asíncronas"""
+    async def dispatch(self, request, *args, **kwargs):
+        # Se saltea el dispatch sincrónico de CachePaginaAnonimaMixin
+        dispatch = super(CachePaginaAnonimaMixin, self).dispatch
+
+        request.user = await request.auser()
+        if not self.pagina_cacheable(request, request.user):
+            return await dispatch(request, *args, **kwargs)
+
+        clave = CatalogoService.clave('pagina', request.get_full_path())
+        response = await cache.aget(clave)
+        if response is not None:
+            return self.respuesta_cacheada(request, response)
+
+        return self.guardar_al_renderizar(clave, await dispatch(request, *args, **kwargs))
+
+
+class CatalogoCondicionalAsyncMixin:
+    """
+    Equivalente asíncrono de validadores_catalogo: ETag y Last-Modified
+    de querysets_catalogo(request), o de la generación del catálogo si es
+    None, y 304 sin armar el contexto si el cliente ya tiene la versión
+    vigente. Las vistas implementan aget_context_data en lugar de
+    get_context_data.
+    """
+    querysets_catalogo = None
+
+    async def get(self, request, *args, **kwargs):
+        etag, ultima_modificacion = await sync_to_async(version_catalogo)(request, self.querysets_catalogo)
+        etag = quote_etag(etag) if etag else None
+        ultima_modificacion = int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if response is None:
+            response = self.render_to_response(await self.aget_context_data(**kwargs))
+
+        if ultima_modificacion and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(ultima_modificacion)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        return response
+
+
+class MateriasPublicasView(CachePaginaAnonimaAsyncMixin, CatalogoCondicionalAsyncMixin, TemplateView):
+    template_name = 'gestion_academica/publico/materias.html'
+    leer_de_replica = 'anonimos'
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+
+        carrera_id = self.request.GET.get('carrera')
+        materias = Materia.objects.filter(activa=True).select_related('carrera')
+
+        if carrera_id:
+            materias = materias.filter(carrera_id=carrera_id)
+
+        # Se lee al renderizar, sólo si el fragmento del listado no está en caché
+        context['materias'] = materias.order_by('carrera__nombre', 'año', 'cuatrimestre', 'nombre')
+        context['filtro_form'] = FiltroMateriaForm(self.request.GET or None)
+
+        return context
+
+
+class MateriasConCupoView(AsyncLoginRequiredMixin, ListView):
+    template_name = 'gestion_academica/publico/materias_con_cupo.html'
+    context_object_name = 'materias_con_cupo'
+    paginate_by = 10
+
+    def get_queryset(self):
+        return MateriaService.obtener_materias_con_cupo()
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+
+        paginator = Paginator(self.object_list, self.paginate_by)
+        paginator.count = await self.object_list.acount()
+        pagina = paginator.get_page(request.GET.get('page'))
+
+        context = {
+            'paginator': paginator,
+            'page_obj': pagina,
+            'is_paginated': pagina.has_other_pages(),
+            # Las filas de la página se leen al renderizar, sólo si el
+            # fragmento del listado no está en caché
+            'object_list': pagina.object_list,
+            self.context_object_name: pagina.object_list,
+            'view': self,
+        }
+        context.update(await sync_to_async(MateriaService.resumen_materias_con_cupo)(self.object_list))
+        return self.render_to_response(context)
+
+
+class MisMateriaView(AsyncAlumnoRequiredMixin, TemplateView):
+    """Vista para que el alumno vea sus materias"""
+    template_name = 'gestion_academica/alumno/mis_materias.html'
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Si el usuario debe cambiar la contraseña, redirigir
+        usuario = await request.auser()
+        if usuario.is_authenticated and usuario.primer_login:
+            return redirect('cambiar_password_primer_login')
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        try:
+            alumno = await Alumno.objects.select_related('carrera').aget(usuario=request.user)
+            inscripciones = await sync_to_async(InscripcionService.obtener_inscripciones_alumno)(alumno.id)
+            context['alumno'] = alumno
+            context['inscripciones'] = [inscripcion async for inscripcion in inscripciones]
+        except (Alumno.DoesNotExist, ValidationError):
+            messages.error(request, 'No se encontró información del alumno.')
+
+        return self.render_to_response(context)
+
+
+class OfertaAcademicaView(AsyncAlumnoRequiredMixin, CatalogoCondicionalAsyncMixin, TemplateView):
+    """Vista para que el alumno vea la oferta académica de su carrera"""
+    template_name = 'gestion_academica/alumno/oferta_academica.html'
+    querysets_catalogo = staticmethod(_oferta_del_alumno)
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Si el usuario debe cambiar la contraseña, redirigir
+        usuario = await request.auser()
+        if usuario.is_authenticated and usuario.primer_login:
+            return redirect('cambiar_password_primer_login')
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        try:
+            alumno = await Alumno.objects.select_related('carrera', 'usuario').aget(usuario=self.request.user)
+            materias = con_posicion_en_espera(
+                await sync_to_async(MateriaService.obtener_oferta_academica)(alumno.carrera_id),
+                await sync_to_async(ListaEsperaService.posiciones_alumno)(alumno.id)
+            )
+
+            # Materias en las que ya está inscripto
+            inscripto = {
+                materia_id async for materia_id in
+                Inscripcion.objects.filter(alumno=alumno, activa=True).values_list('materia_id', flat=True)
+            }
+
+            context['alumno'] = alumno
+            context['materias'] = materias
+            context['materias_inscripto'] = inscripto
+            context['materias_disponibles'] = sum(
+                1 for m in materias if m['tiene_cupo'] and m['id'] not in inscripto
+            )
+            context['materias_sin_cupo'] = sum(1 for m in materias if not m['tiene_cupo'])
+            context['clave_idempotencia'] = await sync_to_async(clave_idempotencia_de_pagina)(
+                self.request, self.querysets_catalogo
+            )
+
+        except Exception as e:
+            messages.error(self.request, 'No se pudo cargar la oferta académica.')
+
+        return context
+
+
+class InscribirseView(AsyncAlumnoRequiredMixin, View):
+    """Vista para que el alumno se inscriba a una materia (o encole la solicitud)"""
+    async def post(self, request, materia_id):
+        try:
+            alumno = await Alumno.objects.aget(usuario=request.user)
+            resultado = await sync_to_async(InscripcionIdempotenteService.inscribir)(
+                alumno.id, materia_id, clave_idempotencia(request)
+            )
+        except Exception as e:
+            messages.error(request, 'Error al procesar la inscripción.')
+            return redirect('oferta_academica')
+        return respuesta_inscripcion(request, resultado)
@@ -1,13 +1,32 @@
 from django.contrib import admin
 
-from inscripcion.models import Inscripcion
+from inscripcion.models import EsperaInscripcion, Inscripcion, SolicitudInscripcion
 
 # Register your models here.
 
 class InscripcionAdmin(admin.ModelAdmin):
     list_display = ('alumno', 'materia', 'fecha_inscripcion', 'activa')
+    list_select_related = ('alumno__usuario', 'materia__carrera')
     list_filter = ('activa', 'materia__carrera')
     search_fields = ('alumno__nombre_completo', 'materia__nombre')
     ordering = ('-fecha_inscripcion',)
 
-admin.site.register(Inscripcion, InscripcionAdmin)
\ No newline at end of file
+admin.site.register(Inscripcion, InscripcionAdmin)
+
+
+class SolicitudInscripcionAdmin(admin.ModelAdmin):
+    list_display = ('ticket', 'alumno', 'materia', 'estado', 'fecha_solicitud', 'fecha_proceso')
+    list_select_related = ('alumno__usuario', 'materia__carrera')
+    list_filter = ('estado', 'materia__carrera')
+    ordering = ('-id',)
+
+admin.site.register(SolicitudInscripcion, SolicitudInscripcionAdmin)
+
+
+class EsperaInscripcionAdmin(admin.ModelAdmin):
+    list_display = ('alumno', 'materia', 'estado', 'fecha_alta', 'fecha_modificacion')
+    list_select_related = ('alumno__usuario', 'materia__carrera')
+    list_filter = ('estado', 'materia__carrera')
+    ordering = ('materia', 'id')
+
+admin.site.register(EsperaInscripcion, EsperaInscripcionAdmin)
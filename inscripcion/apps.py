@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class InscripcionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inscripcion'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .services import InscripcionIdempotenteService
+
+        # Los servidores (gunicorn, uvicorn) no corren los checks al iniciar
+        InscripcionIdempotenteService.advertir_si_inactiva()
@@ -0,0 +1,23 @@
+"""
+Checks de configuración de las inscripciones (manage.py check --deploy)
+"""
+
+from django.conf import settings
+from django.core import checks
+
+from .services import InscripcionIdempotenteService
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def cache_de_idempotencia(app_configs, **kwargs):
+    """La idempotencia de las inscripciones necesita una cache compartida entre procesos"""
+    if settings.DEBUG or InscripcionIdempotenteService.cache_compartida():
+        return []
+    return [
+        checks.Warning(
+            'La cache "default" es local de cada proceso: las claves de idempotencia '
+            'de las inscripciones se ignoran.',
+            hint='Define GESTION_CACHE_REDIS_URL o configura otra cache compartida en CACHES["default"].',
+            id='inscripcion.W001',
+        )
+    ]
@@ -1,5 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from carrera.models import Carrera
+
 from .models import Materia, Alumno, Inscripcion
 
 class InscripcionForm(forms.ModelForm):
@@ -24,11 +26,14 @@ class InscripcionForm(forms.ModelForm):
         
         if carrera_id:
             # Filtrar alumnos y materias de la misma carrera
-            self.fields['alumno'].queryset = Alumno.objects.filter(carrera_id=carrera_id, activo=True)
-            self.fields['materia'].queryset = Materia.objects.filter(carrera_id=carrera_id, activa=True)
+            alumnos = Alumno.objects.filter(carrera_id=carrera_id, activo=True)
+            materias = Materia.objects.filter(carrera_id=carrera_id, activa=True)
         else:
-            self.fields['alumno'].queryset = Alumno.objects.filter(activo=True)
-            self.fields['materia'].queryset = Materia.objects.filter(activa=True)
+            alumnos = Alumno.objects.filter(activo=True)
+            materias = Materia.objects.filter(activa=True)
+        # Las opciones usan __str__, que lee el usuario del alumno y la carrera de la materia
+        self.fields['alumno'].queryset = alumnos.select_related('usuario')
+        self.fields['materia'].queryset = materias.select_related('carrera')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -49,3 +54,50 @@ class InscripcionForm(forms.ModelForm):
                 raise ValidationError('No hay cupo disponible en esta materia.')
 
         return cleaned_data
+
+
+class InscripcionMasivaForm(forms.Form):
+    """
+    Formulario para inscribir una cohorte (alumnos de una carrera con el
+    mismo año de ingreso) en las materias de un año de la carrera
+    """
+    carrera = forms.ModelChoiceField(queryset=Carrera.objects.filter(activa=True), label='Carrera')
+    año_ingreso = forms.IntegerField(min_value=1900, label='Año de Ingreso (cohorte)')
+    año = forms.IntegerField(min_value=1, initial=1, label='Año de las Materias')
+    cuatrimestre = forms.TypedChoiceField(
+        choices=[('', 'Ambos cuatrimestres'), (1, 'Primer Cuatrimestre'), (2, 'Segundo Cuatrimestre')],
+        coerce=int,
+        empty_value=None,
+        required=False,
+        label='Cuatrimestre'
+    )
+    observaciones = forms.CharField(
+        required=False,
+        label='Observaciones',
+        widget=forms.Textarea(attrs={'rows': 3, 'placeholder': 'Observaciones (opcional)...'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        carrera = cleaned_data.get('carrera')
+        año_ingreso = cleaned_data.get('año_ingreso')
+        año = cleaned_data.get('año')
+
+        if carrera and año_ingreso and año:
+            alumnos = list(Alumno.objects.filter(
+                carrera=carrera, año_ingreso=año_ingreso, activo=True
+            ).select_related('usuario').order_by('legajo'))
+            materias = Materia.objects.filter(carrera=carrera, año=año, activa=True)
+            if cleaned_data.get('cuatrimestre'):
+                materias = materias.filter(cuatrimestre=cleaned_data['cuatrimestre'])
+            materias = list(materias.order_by('cuatrimestre', 'nombre'))
+
+            if not alumnos:
+                raise ValidationError('No hay alumnos activos de esa carrera con ese año de ingreso.')
+            if not materias:
+                raise ValidationError('La carrera no tiene materias activas para ese año.')
+
+            cleaned_data['alumnos'] = alumnos
+            cleaned_data['materias'] = materias
+
+        return cleaned_data
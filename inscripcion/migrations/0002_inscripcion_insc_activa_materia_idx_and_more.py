@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0002_alumno_alumno_activo_carrera_idx'),
+        ('inscripcion', '0001_initial'),
+        ('materia', '0002_materia_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['materia'], name='insc_activa_materia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['alumno'], name='insc_activa_alumno_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['-fecha_inscripcion', 'id'], name='insc_activa_fecha_idx'),
+        ),
+    ]
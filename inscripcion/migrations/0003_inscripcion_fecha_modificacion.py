@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def copiar_ultima_fecha(apps, schema_editor):
+    Inscripcion = apps.get_model('inscripcion', 'Inscripcion')
+    Inscripcion.objects.update(fecha_modificacion=Coalesce(F('fecha_baja'), F('fecha_inscripcion')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0002_inscripcion_insc_activa_materia_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscripcion',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=timezone.now, verbose_name='Fecha de Modificación'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copiar_ultima_fecha, migrations.RunPython.noop),
+    ]
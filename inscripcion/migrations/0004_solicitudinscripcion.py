@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:14
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0002_alumno_alumno_activo_carrera_idx'),
+        ('inscripcion', '0003_inscripcion_fecha_modificacion'),
+        ('materia', '0004_materia_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Ticket')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aceptada', 'Aceptada'), ('rechazada', 'Rechazada')], default='pendiente', max_length=10, verbose_name='Estado')),
+                ('mensaje', models.CharField(blank=True, max_length=255, verbose_name='Mensaje')),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Solicitud')),
+                ('fecha_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Proceso')),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_inscripcion', to='alumno.alumno', verbose_name='Alumno')),
+                ('inscripcion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inscripcion.inscripcion', verbose_name='Inscripción')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_inscripcion', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Solicitud de Inscripción',
+                'verbose_name_plural': 'Solicitudes de Inscripción',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'pendiente')), fields=['id'], name='solicitud_pendiente_idx'), models.Index(condition=models.Q(('estado', 'pendiente')), fields=['alumno', 'materia'], name='solicitud_pend_alumno_idx'), models.Index(fields=['fecha_proceso'], name='solicitud_proceso_idx')],
+            },
+        ),
+    ]
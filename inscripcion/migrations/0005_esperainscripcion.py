@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0002_alumno_alumno_activo_carrera_idx'),
+        ('inscripcion', '0004_solicitudinscripcion'),
+        ('materia', '0004_materia_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EsperaInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('en_espera', 'En espera'), ('promovida', 'Promovida'), ('cancelada', 'Cancelada')], default='en_espera', max_length=10, verbose_name='Estado')),
+                ('fecha_alta', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Alta')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='esperas_inscripcion', to='alumno.alumno', verbose_name='Alumno')),
+                ('inscripcion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inscripcion.inscripcion', verbose_name='Inscripción')),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='esperas_inscripcion', to='materia.materia', verbose_name='Materia')),
+            ],
+            options={
+                'verbose_name': 'Lugar en Lista de Espera',
+                'verbose_name_plural': 'Lista de Espera',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'en_espera')), fields=['materia', 'id'], name='espera_materia_orden_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado', 'en_espera')), fields=('alumno', 'materia'), name='espera_unica_alumno_materia')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumno', '0002_alumno_alumno_activo_carrera_idx'),
+        ('inscripcion', '0005_esperainscripcion'),
+        ('materia', '0004_materia_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='solicitudinscripcion',
+            name='solicitud_pend_alumno_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='solicitudinscripcion',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'pendiente')), fields=('alumno', 'materia'), name='solicitud_pendiente_unica'),
+        ),
+    ]
@@ -1,10 +1,58 @@
-from django.db import models
+import uuid
+
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
 from django.utils import timezone
 
 from alumno.models import Alumno
 from materia.models import Materia
 # Create your models here.
+
+# Enviada por las altas y bajas en bloque, que no disparan post_save.
+# Argumento: materia_ids, las materias cuyo cupo cambió.
+inscripciones_en_bloque = Signal()
+
+
+class InscripcionQuerySet(models.QuerySet):
+    """
+    Operaciones en bloque que mantienen consistente el contador
+    de inscriptos activos de cada materia
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Inserta las inscripciones y recalcula el contador de sus materias.
+        Lanza ValidationError, sin insertar nada, si alguna materia queda
+        por encima de su cupo máximo.
+        """
+        with transaction.atomic(using=self.db):
+            inscripciones = super().bulk_create(objs, *args, **kwargs)
+            materia_ids = {i.materia_id for i in inscripciones if i.activa}
+            Materia.recalcular_inscriptos(materia_ids)
+            excedidas = list(Materia.objects.filter(
+                id__in=materia_ids, inscriptos_activos__gt=models.F('cupo_maximo')
+            ).values_list('nombre', flat=True)[:1])
+            if excedidas:
+                raise ValidationError(f'No hay cupo disponible en {excedidas[0]}')
+            inscripciones_en_bloque.send(sender=self.model, materia_ids=materia_ids)
+        return inscripciones
+
+    def dar_de_baja(self):
+        """Da de baja en bloque las inscripciones activas del queryset"""
+        activas = self.filter(activa=True)
+        with transaction.atomic(using=self.db):
+            materia_ids = list(activas.values_list('materia_id', flat=True).distinct())
+            ahora = timezone.now()
+            cantidad = activas.update(activa=False, fecha_baja=ahora, fecha_modificacion=ahora)
+            Materia.recalcular_inscriptos(materia_ids)
+            EsperaInscripcion.promover(materia_ids)
+            inscripciones_en_bloque.send(sender=self.model, materia_ids=materia_ids)
+        return cantidad
+
+
 class Inscripcion(models.Model):
     """
     Modelo para gestionar las inscripciones de alumnos a materias.
@@ -24,14 +72,25 @@ class Inscripcion(models.Model):
     )
     fecha_inscripcion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Inscripción')
     fecha_baja = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de Baja')
+    fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')
     activa = models.BooleanField(default=True, verbose_name='Activa')
     observaciones = models.TextField(blank=True, verbose_name='Observaciones')
 
+    objects = InscripcionQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Inscripción'
         verbose_name_plural = 'Inscripciones'
         unique_together = ['alumno', 'materia']  # Un alumno no puede inscribirse dos veces a la misma materia
         ordering = ['-fecha_inscripcion']
+        indexes = [
+            # Cupo por materia y listado de inscriptos de una materia
+            models.Index(fields=['materia'], condition=models.Q(activa=True), name='insc_activa_materia_idx'),
+            # Materias en curso de un alumno
+            models.Index(fields=['alumno'], condition=models.Q(activa=True), name='insc_activa_alumno_idx'),
+            # Listado del panel, paginado por (-fecha_inscripcion, id)
+            models.Index(fields=['-fecha_inscripcion', 'id'], condition=models.Q(activa=True), name='insc_activa_fecha_idx'),
+        ]
 
     def __str__(self):
         estado = "Activa" if self.activa else "Dada de baja"
@@ -48,15 +107,260 @@ class Inscripcion(models.Model):
             if self.materia.cupo_disponible <= 0 and self.activa:
                 raise ValidationError('No hay cupo disponible en esta materia')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._activa_original = instancia.__dict__.get('activa')
+        return instancia
+
     def save(self, *args, **kwargs):
         """
-        Sobrescribe save para manejar la lógica de baja
+        Sobrescribe save para manejar la lógica de baja.
+        Toda alta o reactivación reserva su lugar en la materia y toda
+        baja lo libera, dentro de la misma transacción que el guardado.
+        El lugar liberado pasa al primero de la lista de espera.
         """
-        if not self.pk:  # Nueva inscripción
-            self.fecha_inscripcion = timezone.now()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            liberado = False
+            if not self.pk:  # Nueva inscripción
+                self.fecha_inscripcion = timezone.now()
+                if self.activa:
+                    self._reservar_cupo()
+            elif self.activa != getattr(self, '_activa_original', self.activa):
+                liberado = self._aplicar_cambio_de_estado()
+            super().save(*args, **kwargs)
+            if liberado:
+                self._ajustar_materia_en_memoria(EsperaInscripcion.promover([self.materia_id]))
+        self._activa_original = self.activa
+
+    def _reservar_cupo(self):
+        if not Materia.reservar_cupo(self.materia_id):
+            raise ValidationError('No hay cupo disponible en esta materia')
+        self._ajustar_materia_en_memoria(1)
+
+    def _aplicar_cambio_de_estado(self):
+        # Solo el guardado que efectivamente cambia el estado ajusta el contador
+        cambiada = Inscripcion.objects.filter(
+            pk=self.pk, activa=not self.activa
+        ).update(activa=self.activa)
+        if not cambiada:
+            return False
+        if self.activa:
+            self._reservar_cupo()
+            return False
+        Materia.liberar_cupo(self.materia_id)
+        self._ajustar_materia_en_memoria(-1)
+        return True
+
+    def _ajustar_materia_en_memoria(self, delta):
+        """Mantiene al día la materia ya cargada sin volver a consultarla"""
+        materia = self._state.fields_cache.get('materia')
+        if materia is not None:
+            materia.inscriptos_activos = max(materia.inscriptos_activos + delta, 0)
 
     def dar_de_baja(self):
         """Método para dar de baja la inscripción"""
         self.activa = False
+        self.fecha_baja = timezone.now()
         self.save()
+
+
+@receiver(post_delete, sender=Inscripcion)
+def liberar_cupo_al_eliminar(sender, instance, **kwargs):
+    """
+    Signal que libera el cupo cuando se elimina una inscripción activa,
+    incluyendo borrados en cascada y QuerySet.delete(). El lugar pasa a
+    la lista de espera después del commit, cuando el borrado terminó.
+    """
+    if instance.activa:
+        Materia.liberar_cupo(instance.materia_id)
+        materia_id = instance.materia_id
+        transaction.on_commit(lambda: EsperaInscripcion.promover([materia_id]), using=kwargs.get('using'))
+
+
+class SolicitudInscripcion(models.Model):
+    """
+    Solicitud de inscripción encolada durante el período de inscripción.
+    El worker (comando procesar_inscripciones) las aplica en orden de
+    llegada y deja el resultado para que el alumno lo consulte con el ticket.
+    """
+    PENDIENTE = 'pendiente'
+    ACEPTADA = 'aceptada'
+    RECHAZADA = 'rechazada'
+
+    ticket = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name='Ticket')
+    alumno = models.ForeignKey(
+        Alumno,
+        on_delete=models.CASCADE,
+        related_name='solicitudes_inscripcion',
+        verbose_name='Alumno'
+    )
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='solicitudes_inscripcion',
+        verbose_name='Materia'
+    )
+    estado = models.CharField(
+        max_length=10,
+        choices=[(PENDIENTE, 'Pendiente'), (ACEPTADA, 'Aceptada'), (RECHAZADA, 'Rechazada')],
+        default=PENDIENTE,
+        verbose_name='Estado'
+    )
+    mensaje = models.CharField(max_length=255, blank=True, verbose_name='Mensaje')
+    inscripcion = models.ForeignKey(
+        Inscripcion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Inscripción'
+    )
+    fecha_solicitud = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Solicitud')
+    fecha_proceso = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de Proceso')
+
+    class Meta:
+        verbose_name = 'Solicitud de Inscripción'
+        verbose_name_plural = 'Solicitudes de Inscripción'
+        ordering = ['id']
+        indexes = [
+            # Cola del worker (orden de llegada) y posición de cada ticket
+            models.Index(fields=['id'], condition=models.Q(estado='pendiente'), name='solicitud_pendiente_idx'),
+            # Métricas de la cola sobre una ventana de tiempo
+            models.Index(fields=['fecha_proceso'], name='solicitud_proceso_idx'),
+        ]
+        constraints = [
+            # Una sola solicitud pendiente por alumno y materia (también indexa esa búsqueda)
+            models.UniqueConstraint(
+                fields=['alumno', 'materia'],
+                condition=models.Q(estado='pendiente'),
+                name='solicitud_pendiente_unica'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket} - {self.get_estado_display()}"
+
+
+class EsperaInscripcion(models.Model):
+    """
+    Lugar de un alumno en la lista de espera de una materia sin cupo.
+    Cada lugar que se libera pasa, en la misma transacción que la baja,
+    al primero de la lista (orden de llegada).
+    """
+    EN_ESPERA = 'en_espera'
+    PROMOVIDA = 'promovida'
+    CANCELADA = 'cancelada'
+
+    alumno = models.ForeignKey(
+        Alumno,
+        on_delete=models.CASCADE,
+        related_name='esperas_inscripcion',
+        verbose_name='Alumno'
+    )
+    materia = models.ForeignKey(
+        Materia,
+        on_delete=models.CASCADE,
+        related_name='esperas_inscripcion',
+        verbose_name='Materia'
+    )
+    estado = models.CharField(
+        max_length=10,
+        choices=[(EN_ESPERA, 'En espera'), (PROMOVIDA, 'Promovida'), (CANCELADA, 'Cancelada')],
+        default=EN_ESPERA,
+        verbose_name='Estado'
+    )
+    inscripcion = models.ForeignKey(
+        Inscripcion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Inscripción'
+    )
+    fecha_alta = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Alta')
+    fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name='Fecha de Modificación')
+
+    class Meta:
+        verbose_name = 'Lugar en Lista de Espera'
+        verbose_name_plural = 'Lista de Espera'
+        ordering = ['id']
+        constraints = [
+            # Un alumno ocupa a lo sumo un lugar en la lista de cada materia
+            models.UniqueConstraint(
+                fields=['alumno', 'materia'],
+                condition=models.Q(estado='en_espera'),
+                name='espera_unica_alumno_materia'
+            ),
+        ]
+        indexes = [
+            # Primero de la lista de cada materia y posición de cada lugar
+            models.Index(fields=['materia', 'id'], condition=models.Q(estado='en_espera'), name='espera_materia_orden_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.alumno} - {self.materia.nombre} ({self.get_estado_display()})"
+
+    @classmethod
+    def promover(cls, materia_ids):
+        """
+        Inscribe a los primeros de la lista de espera de cada materia
+        mientras haya cupo. Se ejecuta en la transacción de quien liberó
+        los lugares. Retorna la cantidad de alumnos promovidos.
+        
+        Los lugares a promover se leen en una sola consulta, a lo sumo
+        tantos por materia como cupo libre tenga, y sus estados se guardan
+        con un único UPDATE. Sólo se vuelve a leer si algún lugar se canceló
+        y dejó cupo sin ocupar.
+        """
+        promovidos = 0
+        pendientes, sin_cupo = set(materia_ids), set()
+        with transaction.atomic():
+            while pendientes:
+                esperas = list(cls.primeros_en_espera(pendientes))
+                pendientes = set()
+                actualizadas = []
+                for espera in esperas:
+                    if espera.materia_id in sin_cupo:
+                        continue
+                    try:
+                        with transaction.atomic():
+                            espera.inscripcion = Inscripcion.objects.create(
+                                alumno_id=espera.alumno_id, materia_id=espera.materia_id, activa=True
+                            )
+                        espera.estado = cls.PROMOVIDA
+                        promovidos += 1
+                    except ValidationError:
+                        sin_cupo.add(espera.materia_id)  # Otro ocupó el lugar: el resto sigue esperando
+                        continue
+                    except IntegrityError:
+                        # Ya tiene una inscripción en la materia: su lugar pasa al siguiente
+                        espera.estado = cls.CANCELADA
+                        pendientes.add(espera.materia_id)
+                    espera.fecha_modificacion = timezone.now()
+                    actualizadas.append(espera)
+                cls.objects.bulk_update(actualizadas, ['estado', 'inscripcion', 'fecha_modificacion'])
+                pendientes -= sin_cupo
+        return promovidos
+
+    @classmethod
+    def primeros_en_espera(cls, materia_ids):
+        """Primeros lugares en espera de cada materia, tantos como cupo libre tenga"""
+        return cls.objects.filter(materia_id__in=materia_ids, estado=cls.EN_ESPERA).annotate(
+            orden=models.Window(RowNumber(), partition_by=[models.F('materia_id')], order_by=models.F('id').asc()),
+            libres=models.F('materia__cupo_maximo') - models.F('materia__inscriptos_activos'),
+        ).filter(orden__lte=models.F('libres')).order_by('materia_id', 'id')
+
+
+@receiver(post_save, sender=Materia)
+def promover_al_ampliar_cupo(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Signal que ocupa con la lista de espera el cupo agregado a una materia.
+    Sólo actúa si cupo_maximo aumentó respecto del valor leído de la base.
+    """
+    if created or (update_fields is not None and 'cupo_maximo' not in update_fields):
+        return
+    original = instance._cupo_maximo_original
+    instance._cupo_maximo_original = instance.cupo_maximo
+    if original is None or instance.cupo_maximo > original:
+        EsperaInscripcion.promover([instance.pk])
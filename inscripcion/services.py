@@ -1,6 +1,22 @@
-from django.db import transaction, IntegrityError
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models.functions import Now
 from django.core.exceptions import ValidationError
-from .models import Materia, Alumno, Inscripcion
+from django.utils import timezone
+
+from django.db.models import Case, Count, OuterRef, Subquery, When
+
+from myapp.estadisticas import percentil
+
+from .models import Materia, Alumno, Inscripcion, SolicitudInscripcion, EsperaInscripcion
+
+logger = logging.getLogger('gestion.inscripciones')
 
 class InscripcionService:
     """
@@ -10,26 +26,31 @@ class InscripcionService:
     @staticmethod
     def inscribir_alumno(alumno_id, materia_id):
         """
-        Inscribe un alumno a una materia con todas las validaciones
+        Inscribe un alumno a una materia con todas las validaciones.
+        El cupo se reserva con un UPDATE condicional sobre el contador
+        de la materia, por lo que inscripciones concurrentes no pueden
+        superar el cupo máximo.
         """
         try:
             with transaction.atomic():
                 alumno = Alumno.objects.get(id=alumno_id)
                 materia = Materia.objects.get(id=materia_id)
                 
+                # Validar que ninguno de los dos esté dado de baja
+                if not alumno.activo:
+                    raise ValidationError('El alumno no está activo')
+                if not materia.activa:
+                    raise ValidationError('La materia no está activa')
+                
                 # Validar que la materia pertenezca a la carrera del alumno
-                if alumno.carrera != materia.carrera:
+                if alumno.carrera_id != materia.carrera_id:
                     raise ValidationError('El alumno no puede inscribirse a una materia de otra carrera')
                 
                 # Validar que no esté ya inscripto
                 if Inscripcion.objects.filter(alumno=alumno, materia=materia).exists():
                     raise ValidationError('El alumno ya está inscripto en esta materia')
                 
-                # Validar cupo disponible
-                if not materia.tiene_cupo:
-                    raise ValidationError('No hay cupo disponible en esta materia')
-                
-                # Crear inscripción
+                # Crear inscripción (reserva el cupo o falla si no hay lugar)
                 inscripcion = Inscripcion.objects.create(
                     alumno=alumno,
                     materia=materia,
@@ -41,8 +62,87 @@ class InscripcionService:
         except (Alumno.DoesNotExist, Materia.DoesNotExist):
             raise ValidationError('El alumno o la materia especificados no existen')
         except IntegrityError as e:
+            # Una solicitud concurrente del mismo alumno ganó la carrera
+            if Inscripcion.objects.filter(alumno_id=alumno_id, materia_id=materia_id).exists():
+                raise ValidationError('El alumno ya está inscripto en esta materia')
             raise ValidationError(f'Error de integridad: {str(e)}')
     
+    @staticmethod
+    def inscribir_masivo(alumno_ids, materia_ids, observaciones=''):
+        """
+        Inscribe a cada alumno en cada materia con las mismas validaciones
+        que inscribir_alumno, resueltas por conjunto: una consulta para
+        alumnos, una para materias, una para inscripciones existentes y un
+        bulk_create, todo en una transacción. Los lugares libres se asignan
+        primero a las listas de espera de las materias y el resto en el
+        orden de alumno_ids.
+        Retorna el resultado de cada par: una lista de diccionarios con
+        alumno_id, materia_id, inscripta y mensaje.
+        """
+        alumno_ids = list(dict.fromkeys(alumno_ids))
+        materia_ids = list(dict.fromkeys(materia_ids))
+        resultados, nuevas = [], []
+        
+        with transaction.atomic():
+            # Bloquea las materias una sola vez: el UPDATE toma sus filas en
+            # PostgreSQL y el bloqueo de escritura de la base en SQLite, así
+            # ninguna inscripción concurrente consume cupo hasta el commit
+            Materia.objects.filter(id__in=materia_ids).update(fecha_modificacion=Now())
+            # Quien ya esperaba tiene prioridad sobre la carga del administrador
+            EsperaInscripcion.promover(materia_ids)
+            
+            materias = {
+                materia['id']: materia for materia in Materia.objects.filter(
+                    id__in=materia_ids
+                ).values('id', 'carrera_id', 'activa', 'cupo_maximo', 'inscriptos_activos')
+            }
+            disponibles = {
+                materia_id: materia['cupo_maximo'] - materia['inscriptos_activos']
+                for materia_id, materia in materias.items()
+            }
+            alumnos = {
+                alumno['id']: alumno
+                for alumno in Alumno.objects.filter(id__in=alumno_ids).values('id', 'carrera_id', 'activo')
+            }
+            existentes = set(
+                Inscripcion.objects.filter(
+                    alumno_id__in=alumno_ids, materia_id__in=materia_ids
+                ).values_list('alumno_id', 'materia_id')
+            )
+            
+            for alumno_id in alumno_ids:
+                for materia_id in materia_ids:
+                    alumno, materia = alumnos.get(alumno_id), materias.get(materia_id)
+                    if alumno is None or materia is None:
+                        mensaje = 'El alumno o la materia especificados no existen'
+                    elif not alumno['activo']:
+                        mensaje = 'El alumno no está activo'
+                    elif not materia['activa']:
+                        mensaje = 'La materia no está activa'
+                    elif alumno['carrera_id'] != materia['carrera_id']:
+                        mensaje = 'El alumno no puede inscribirse a una materia de otra carrera'
+                    elif (alumno_id, materia_id) in existentes:
+                        mensaje = 'El alumno ya está inscripto en esta materia'
+                    elif disponibles[materia_id] <= 0:
+                        mensaje = 'No hay cupo disponible en esta materia'
+                    else:
+                        mensaje = None
+                        disponibles[materia_id] -= 1
+                        nuevas.append(Inscripcion(
+                            alumno_id=alumno_id, materia_id=materia_id, activa=True, observaciones=observaciones
+                        ))
+                    resultados.append({
+                        'alumno_id': alumno_id,
+                        'materia_id': materia_id,
+                        'inscripta': mensaje is None,
+                        'mensaje': mensaje or 'Inscripción creada',
+                    })
+            
+            # Recalcula los contadores de cupo de las materias afectadas
+            Inscripcion.objects.bulk_create(nuevas)
+        
+        return resultados
+    
     @staticmethod
     def dar_de_baja_inscripcion(inscripcion_id):
         """
@@ -55,6 +155,54 @@ class InscripcionService:
         except Inscripcion.DoesNotExist:
             raise ValidationError('La inscripción no existe o ya está dada de baja')
     
+    @staticmethod
+    def inscripciones_a_dar_de_baja(materia_id=None, carrera_id=None, cuatrimestre=None):
+        """
+        Inscripciones activas de una materia, una carrera y/o un cuatrimestre.
+        Lanza ValidationError si no se indica ningún criterio.
+        """
+        return Inscripcion.objects.filter(
+            activa=True, **InscripcionService._criterios_baja(materia_id, carrera_id, cuatrimestre)
+        )
+    
+    @staticmethod
+    def _criterios_baja(materia_id, carrera_id, cuatrimestre):
+        if materia_id is None and carrera_id is None and cuatrimestre is None:
+            raise ValidationError('Debe indicar una materia, una carrera o un cuatrimestre')
+        
+        criterios = {}
+        if materia_id is not None:
+            criterios['materia_id'] = materia_id
+        if carrera_id is not None:
+            criterios['materia__carrera_id'] = carrera_id
+        if cuatrimestre is not None:
+            criterios['materia__cuatrimestre'] = cuatrimestre
+        return criterios
+    
+    @staticmethod
+    def dar_de_baja_masivo(materia_id=None, carrera_id=None, cuatrimestre=None, tamaño_lote=1000):
+        """
+        Da de baja las inscripciones activas que indican los criterios (ver
+        inscripciones_a_dar_de_baja) con UPDATE por lotes de tamaño_lote.
+        Cada lote es una transacción que también recalcula el cupo de sus
+        materias y descarta las cachés afectadas, así el bloqueo de
+        escritura se libera entre lotes.
+        Las listas de espera de esas materias se cancelan antes, para que
+        los lugares liberados no se asignen a alumnos que se darían de baja
+        en el lote siguiente.
+        Retorna la cantidad de inscripciones dadas de baja.
+        """
+        inscripciones = InscripcionService.inscripciones_a_dar_de_baja(materia_id, carrera_id, cuatrimestre)
+        EsperaInscripcion.objects.filter(
+            estado=EsperaInscripcion.EN_ESPERA, **InscripcionService._criterios_baja(materia_id, carrera_id, cuatrimestre)
+        ).update(estado=EsperaInscripcion.CANCELADA, fecha_modificacion=timezone.now())
+        total = 0
+        while True:
+            ids = list(inscripciones.order_by('id').values_list('id', flat=True)[:tamaño_lote])
+            if not ids:
+                return total
+            total += Inscripcion.objects.filter(id__in=ids).dar_de_baja()
+    
     @staticmethod
     def obtener_inscripciones_alumno(alumno_id):
         """
@@ -62,7 +210,7 @@ class InscripcionService:
         """
         try:
             alumno = Alumno.objects.get(id=alumno_id)
-            return Inscripcion.objects.filter(alumno=alumno, activa=True).select_related('materia')
+            return Inscripcion.objects.filter(alumno=alumno, activa=True).select_related('materia__carrera')
         except Alumno.DoesNotExist:
             raise ValidationError('El alumno especificado no existe')
     
@@ -71,8 +219,313 @@ class InscripcionService:
         """
         Obtiene todos los alumnos inscritos en una materia
         """
+        return InscripcionService.obtener_materia_y_alumnos(materia_id)[1]
+    
+    @staticmethod
+    def obtener_materia_y_alumnos(materia_id):
+        """
+        Retorna la materia y sus inscripciones activas, con el alumno, su
+        usuario y la materia ya cargados (__str__ y nombre_completo los leen)
+        """
         try:
-            materia = Materia.objects.get(id=materia_id)
-            return Inscripcion.objects.filter(materia=materia, activa=True).select_related('alumno')
+            materia = Materia.objects.select_related('carrera').get(id=materia_id)
         except Materia.DoesNotExist:
             raise ValidationError('La materia especificada no existe')
+        inscripciones = Inscripcion.objects.filter(materia=materia, activa=True).select_related(
+            'alumno__usuario', 'materia__carrera'
+        )
+        return materia, inscripciones
+
+
+class ColaInscripcionService:
+    """
+    Cola de inscripciones para el período de inscripción.
+    Las vistas sólo encolan solicitudes (un INSERT) y un único worker las
+    aplica con InscripcionService.inscribir_alumno en orden de llegada, de
+    modo que las altas no compiten entre sí por el bloqueo de escritura.
+    """
+    
+    @staticmethod
+    def activa():
+        return getattr(settings, 'COLA_INSCRIPCION_ACTIVA', False)
+    
+    @staticmethod
+    def encolar(alumno_id, materia_id):
+        """
+        Registra una solicitud de inscripción y la retorna con su ticket.
+        Si el alumno ya tiene una pendiente para la materia se retorna esa
+        (la restricción solicitud_pendiente_unica lo garantiza aun con
+        pedidos simultáneos). Lanza ValidationError si la cola está llena.
+        """
+        pendientes = SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PENDIENTE)
+        existente = pendientes.filter(alumno_id=alumno_id, materia_id=materia_id).first()
+        if existente:
+            return existente
+        
+        maximo = getattr(settings, 'COLA_INSCRIPCION_MAXIMO_PENDIENTES', 10000)
+        if pendientes.count() >= maximo:
+            raise ValidationError(
+                'Hay demasiadas solicitudes de inscripción en espera. Intenta nuevamente en unos minutos.'
+            )
+        try:
+            with transaction.atomic():
+                return SolicitudInscripcion.objects.create(alumno_id=alumno_id, materia_id=materia_id)
+        except IntegrityError:
+            # Otro pedido del mismo alumno la encoló entre la búsqueda y el INSERT
+            existente = pendientes.filter(alumno_id=alumno_id, materia_id=materia_id).first()
+            if existente is None:
+                raise
+            return existente
+    
+    @staticmethod
+    def procesar_pendientes(lote=100):
+        """
+        Aplica en orden de llegada hasta `lote` solicitudes pendientes, en
+        una sola transacción. Debe ejecutarlo un único proceso a la vez.
+        Retorna la cantidad de solicitudes procesadas.
+        
+        Cada solicitud se aplica en su propio savepoint: si falla por un
+        error inesperado se rechaza con un mensaje genérico y se registra el
+        error, para que una solicitud problemática no trabe la cola. Los
+        OperationalError (por ejemplo "database is locked") se propagan y
+        el lote completo se reintenta.
+        """
+        solicitudes = list(
+            SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PENDIENTE).order_by('id')[:lote]
+        )
+        if not solicitudes:
+            return 0
+        
+        with transaction.atomic():
+            for solicitud in solicitudes:
+                try:
+                    with transaction.atomic():
+                        inscripcion = InscripcionService.inscribir_alumno(solicitud.alumno_id, solicitud.materia_id)
+                    solicitud.estado = SolicitudInscripcion.ACEPTADA
+                    solicitud.inscripcion = inscripcion
+                    solicitud.mensaje = f'Te has inscripto exitosamente a {inscripcion.materia.nombre}.'
+                except ValidationError as e:
+                    solicitud.estado = SolicitudInscripcion.RECHAZADA
+                    solicitud.mensaje = e.messages[0]
+                except OperationalError:
+                    raise
+                except Exception:
+                    logger.exception('No se pudo procesar la solicitud de inscripción %s', solicitud.ticket)
+                    solicitud.estado = SolicitudInscripcion.RECHAZADA
+                    solicitud.mensaje = 'No se pudo procesar la solicitud. Intenta inscribirte nuevamente.'
+                solicitud.fecha_proceso = timezone.now()
+                # Un UPDATE simple por fila cuesta menos que el CASE de bulk_update
+                SolicitudInscripcion.objects.filter(pk=solicitud.pk).update(
+                    estado=solicitud.estado,
+                    inscripcion=solicitud.inscripcion,
+                    mensaje=solicitud.mensaje,
+                    fecha_proceso=solicitud.fecha_proceso,
+                )
+        return len(solicitudes)
+    
+    @staticmethod
+    def obtener_solicitud(ticket, alumno_id):
+        """Solicitud de un alumno por su ticket"""
+        try:
+            return SolicitudInscripcion.objects.select_related('materia').get(ticket=ticket, alumno_id=alumno_id)
+        except SolicitudInscripcion.DoesNotExist:
+            raise ValidationError('La solicitud de inscripción no existe')
+    
+    @staticmethod
+    def posicion(solicitud):
+        """Lugar de una solicitud pendiente en la cola (1 es la próxima)"""
+        if solicitud.estado != SolicitudInscripcion.PENDIENTE:
+            return None
+        return SolicitudInscripcion.objects.filter(
+            estado=SolicitudInscripcion.PENDIENTE, id__lte=solicitud.id
+        ).count()
+    
+    @staticmethod
+    def metricas(ventana=60):
+        """
+        Rendimiento de la cola en los últimos `ventana` segundos: solicitudes
+        procesadas por segundo y espera entre la solicitud y su resultado.
+        """
+        procesadas = list(SolicitudInscripcion.objects.filter(
+            fecha_proceso__gte=timezone.now() - timedelta(seconds=ventana)
+        ).values_list('estado', 'fecha_solicitud', 'fecha_proceso'))
+        esperas = sorted((proceso - solicitud).total_seconds() * 1000 for _, solicitud, proceso in procesadas)
+        
+        return {
+            'pendientes': SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PENDIENTE).count(),
+            'procesadas': len(procesadas),
+            'aceptadas': sum(1 for estado, _, _ in procesadas if estado == SolicitudInscripcion.ACEPTADA),
+            'rechazadas': sum(1 for estado, _, _ in procesadas if estado == SolicitudInscripcion.RECHAZADA),
+            'por_segundo': round(len(procesadas) / ventana, 1),
+            'espera_ms': {
+                'p50': _percentil(esperas, 50),
+                'p95': _percentil(esperas, 95),
+                'p99': _percentil(esperas, 99),
+                'maxima': round(esperas[-1], 1) if esperas else None,
+            },
+        }
+
+
+
+
+class ListaEsperaService:
+    """
+    Listas de espera de las materias sin cupo. Los lugares liberados se
+    asignan solos (ver EsperaInscripcion.promover), así que el alumno sólo
+    necesita consultar su posición en lugar de reintentar la inscripción.
+    """
+    
+    @staticmethod
+    def anotar(alumno_id, materia_id):
+        """
+        Anota al alumno al final de la lista de espera de la materia y
+        retorna su lugar. Si ya estaba en la lista retorna ese lugar.
+        """
+        try:
+            with transaction.atomic():
+                alumno = Alumno.objects.get(id=alumno_id)
+                materia = Materia.objects.get(id=materia_id)
+                
+                if alumno.carrera_id != materia.carrera_id:
+                    raise ValidationError('El alumno no puede anotarse en una materia de otra carrera')
+                if Inscripcion.objects.filter(alumno=alumno, materia=materia).exists():
+                    raise ValidationError('El alumno ya está inscripto en esta materia')
+                if materia.tiene_cupo:
+                    raise ValidationError('La materia tiene cupo disponible: inscríbete directamente')
+                
+                espera = EsperaInscripcion.objects.create(alumno=alumno, materia=materia)
+                # Un lugar liberado mientras se anotaba no debe quedar vacío
+                EsperaInscripcion.promover([materia.id])
+        except (Alumno.DoesNotExist, Materia.DoesNotExist):
+            raise ValidationError('El alumno o la materia especificados no existen')
+        except IntegrityError:
+            pass  # Ya estaba en la lista (pedido concurrente del mismo alumno)
+        
+        return ListaEsperaService.esperas_alumno(alumno_id).filter(materia_id=materia_id).first()
+    
+    @staticmethod
+    def cancelar(alumno_id, materia_id):
+        """Saca al alumno de la lista de espera de la materia"""
+        canceladas = EsperaInscripcion.objects.filter(
+            alumno_id=alumno_id, materia_id=materia_id, estado=EsperaInscripcion.EN_ESPERA
+        ).update(estado=EsperaInscripcion.CANCELADA, fecha_modificacion=timezone.now())
+        if not canceladas:
+            raise ValidationError('El alumno no está en la lista de espera de esta materia')
+    
+    @staticmethod
+    def esperas_alumno(alumno_id):
+        """
+        Lugares del alumno en listas de espera con su posición (1 es el
+        próximo en ser inscripto; None si ya no está esperando), calculada
+        sobre el índice de la lista de cada materia
+        """
+        anteriores = EsperaInscripcion.objects.filter(
+            materia=OuterRef('materia'), estado=EsperaInscripcion.EN_ESPERA, id__lte=OuterRef('id')
+        ).order_by().values('materia').annotate(total=Count('id')).values('total')
+        
+        return EsperaInscripcion.objects.filter(alumno_id=alumno_id).select_related('materia').annotate(
+            posicion=Case(When(estado=EsperaInscripcion.EN_ESPERA, then=Subquery(anteriores)), default=None)
+        ).order_by('-id')
+    
+    @staticmethod
+    def posiciones_alumno(alumno_id):
+        """Posición del alumno en cada lista de espera en la que está anotado, por materia"""
+        return {
+            espera.materia_id: espera.posicion
+            for espera in ListaEsperaService.esperas_alumno(alumno_id).filter(estado=EsperaInscripcion.EN_ESPERA)
+        }
+
+
+class InscripcionIdempotenteService:
+    """
+    Inscripciones desde el portal con clave de idempotencia.
+    El primer pedido con una clave reserva su entrada en la cache y guarda
+    el resultado; los repetidos (doble clic, reintentos del proxy) reciben
+    ese mismo resultado sin volver a la base de datos, y los que llegan
+    mientras el primero se procesa reciben enseguida un aviso de que sigue
+    en curso, sin ocupar un worker esperándolo.
+    La clave sólo alcanza a todos los procesos si la cache 'default' es
+    compartida (GESTION_CACHE_REDIS_URL). Fuera de DEBUG, con una cache
+    propia de cada proceso la idempotencia se desactiva, y se advierte al
+    iniciar cada proceso y en el check inscripcion.W001 de
+    `manage.py check --deploy`.
+    """
+    
+    EN_CURSO = 'en_curso'
+    CACHES_LOCALES = (LocMemCache, DummyCache)
+    
+    @staticmethod
+    def cache_compartida():
+        return not isinstance(caches['default'], InscripcionIdempotenteService.CACHES_LOCALES)
+    
+    @staticmethod
+    def activa():
+        """Con una cache local de cada proceso sólo se admite en desarrollo"""
+        return settings.DEBUG or InscripcionIdempotenteService.cache_compartida()
+    
+    @staticmethod
+    def advertir_si_inactiva():
+        if not InscripcionIdempotenteService.activa():
+            logger.warning(
+                'La cache "default" es local de cada proceso: las claves de idempotencia de las '
+                'inscripciones se ignoran. Define GESTION_CACHE_REDIS_URL.'
+            )
+    
+    @staticmethod
+    def clave(alumno_id, materia_id, clave_idempotencia):
+        return f'inscripcion:idempotencia:{alumno_id}:{materia_id}:{clave_idempotencia}'
+    
+    @staticmethod
+    def inscribir(alumno_id, materia_id, clave_idempotencia=None):
+        """
+        Inscribe al alumno (o encola la solicitud si la cola está activa) y
+        retorna el resultado como un diccionario con 'nivel' ('success',
+        'info' si el pedido original sigue en curso, o 'error'), 'mensaje'
+        y, para solicitudes encoladas, 'ticket'.
+        """
+        if not clave_idempotencia or not InscripcionIdempotenteService.activa():
+            return InscripcionIdempotenteService._resultado(alumno_id, materia_id)
+        
+        clave = InscripcionIdempotenteService.clave(alumno_id, materia_id, clave_idempotencia)
+        ttl = getattr(settings, 'INSCRIPCION_IDEMPOTENCIA_TTL', 600)
+        if not cache.add(clave, InscripcionIdempotenteService.EN_CURSO, ttl):
+            return InscripcionIdempotenteService._resultado_original(clave)
+        
+        try:
+            resultado = InscripcionIdempotenteService._resultado(alumno_id, materia_id)
+        except Exception:
+            # Un error inesperado no es un resultado: se permite reintentar
+            cache.delete(clave)
+            raise
+        cache.set(clave, resultado, ttl)
+        return resultado
+    
+    @staticmethod
+    def _resultado(alumno_id, materia_id):
+        try:
+            if ColaInscripcionService.activa():
+                solicitud = ColaInscripcionService.encolar(alumno_id, materia_id)
+                return {'nivel': 'success', 'mensaje': '', 'ticket': str(solicitud.ticket)}
+            inscripcion = InscripcionService.inscribir_alumno(alumno_id, materia_id)
+            return {'nivel': 'success', 'mensaje': f'Te has inscripto exitosamente a {inscripcion.materia.nombre}.'}
+        except ValidationError as e:
+            return {'nivel': 'error', 'mensaje': e.messages[0]}
+    
+    @staticmethod
+    def _resultado_original(clave):
+        """Resultado del pedido original con la misma clave, sin esperarlo"""
+        resultado = cache.get(clave)
+        if resultado is None:
+            # El pedido original falló o la clave expiró
+            return {'nivel': 'error', 'mensaje': 'Error al procesar la inscripción.'}
+        if resultado == InscripcionIdempotenteService.EN_CURSO:
+            return {
+                'nivel': 'info',
+                'mensaje': 'Tu inscripción todavía se está procesando. Revisa tus materias en unos segundos.',
+            }
+        return resultado
+
+
+def _percentil(ordenados, numero):
+    valor = percentil(ordenados, numero)
+    return None if valor is None else round(valor, 1)
@@ -1,3 +1,612 @@
-from django.test import TestCase
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from materia.models import Materia
+from materia.services import MateriaService
+from usuario.models import Usuario
+
+from .models import EsperaInscripcion, Inscripcion, SolicitudInscripcion
+from .services import ColaInscripcionService, InscripcionService, ListaEsperaService
+
+
+def crear_carrera(codigo='TP2024'):
+    return Carrera.objects.create(nombre=f'Carrera {codigo}', codigo=codigo, duracion_años=3)
+
+
+def crear_materia(carrera, codigo='PROG101', cupo_maximo=30):
+    return Materia.objects.create(
+        nombre=f'Materia {codigo}', codigo=codigo, carrera=carrera,
+        año=1, cuatrimestre=1, cupo_maximo=cupo_maximo
+    )
+
+
+def crear_alumnos(carrera, cantidad):
+    alumnos = []
+    for i in range(cantidad):
+        dni = f'{30000000 + i}'
+        usuario = Usuario.objects.create(
+            username=dni, email=f'alumno{i}@test.com',
+            first_name='Alumno', last_name=str(i), password='x'
+        )
+        alumnos.append(Alumno.objects.create(
+            usuario=usuario, legajo=f'{20240000 + i}', carrera=carrera, año_ingreso=2024
+        ))
+    return alumnos
+
+
+class InscripcionServiceTest(TestCase):
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.materia = crear_materia(self.carrera, cupo_maximo=2)
+        self.alumnos = crear_alumnos(self.carrera, 3)
+
+    def test_inscripcion_reserva_cupo(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_sin_cupo_mantiene_mensaje(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        InscripcionService.inscribir_alumno(self.alumnos[1].id, self.materia.id)
+        with self.assertRaisesMessage(ValidationError, 'No hay cupo disponible en esta materia'):
+            InscripcionService.inscribir_alumno(self.alumnos[2].id, self.materia.id)
+        self.assertEqual(Inscripcion.objects.filter(materia=self.materia).count(), 2)
+
+    def test_inscripcion_duplicada(self):
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        with self.assertRaisesMessage(ValidationError, 'El alumno ya está inscripto en esta materia'):
+            InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_alumno_o_materia_inactivos(self):
+        Alumno.objects.filter(pk=self.alumnos[0].pk).update(activo=False)
+        with self.assertRaisesMessage(ValidationError, 'El alumno no está activo'):
+            InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+        Materia.objects.filter(pk=self.materia.pk).update(activa=False)
+        with self.assertRaisesMessage(ValidationError, 'La materia no está activa'):
+            InscripcionService.inscribir_alumno(self.alumnos[1].id, self.materia.id)
+        self.assertFalse(Inscripcion.objects.exists())
+
+    def test_baja_libera_cupo(self):
+        inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+        InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 0)
+
+
+class InscripcionConcurrenteTest(TransactionTestCase):
+    """Varios workers compiten por los mismos lugares de una materia"""
+
+    WORKERS = 24
+    CUPO = 5
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.materia = crear_materia(self.carrera, cupo_maximo=self.CUPO)
+        self.alumnos = crear_alumnos(self.carrera, self.WORKERS)
+
+    def _inscribir(self, alumno_id, barrera, resultados):
+        barrera.wait()
+        try:
+            while True:
+                try:
+                    InscripcionService.inscribir_alumno(alumno_id, self.materia.id)
+                    resultados.append('ok')
+                    return
+                except ValidationError:
+                    resultados.append('rechazada')
+                    return
+                except OperationalError:
+                    # Base bloqueada por otro escritor: reintentar
+                    time.sleep(0.005)
+        finally:
+            connection.close()
+
+    def test_no_supera_cupo_maximo(self):
+        barrera = threading.Barrier(self.WORKERS)
+        resultados = []
+        hilos = [
+            threading.Thread(target=self._inscribir, args=(alumno.id, barrera, resultados))
+            for alumno in self.alumnos
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.materia.refresh_from_db()
+        activas = Inscripcion.objects.filter(materia=self.materia, activa=True).count()
+        self.assertEqual(resultados.count('ok'), self.CUPO)
+        self.assertEqual(resultados.count('rechazada'), self.WORKERS - self.CUPO)
+        self.assertEqual(activas, self.CUPO)
+        self.assertEqual(self.materia.inscriptos_activos, self.CUPO)
+
+
+class InscripcionMasivaTest(TestCase):
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.con_cupo_dos = crear_materia(self.carrera, 'PROG101', cupo_maximo=2)
+        self.con_cupo_cinco = crear_materia(self.carrera, 'MAT101', cupo_maximo=5)
+        self.de_otra_carrera = crear_materia(crear_carrera('LIC2024'), 'FIS101')
+        self.alumnos = crear_alumnos(self.carrera, 3)
+        InscripcionService.inscribir_alumno(self.alumnos[0].id, self.con_cupo_cinco.id)
+
+    def test_reporte_por_par(self):
+        materias = [self.con_cupo_dos, self.con_cupo_cinco, self.de_otra_carrera]
+        resultados = InscripcionService.inscribir_masivo(
+            [alumno.id for alumno in self.alumnos], [materia.id for materia in materias]
+        )
+
+        mensajes = {(r['alumno_id'], r['materia_id']): (r['inscripta'], r['mensaje']) for r in resultados}
+        self.assertEqual(len(resultados), 9)
+        a0, a1, a2 = [alumno.id for alumno in self.alumnos]
+        self.assertTrue(mensajes[(a0, self.con_cupo_dos.id)][0])
+        self.assertTrue(mensajes[(a1, self.con_cupo_dos.id)][0])
+        self.assertEqual(mensajes[(a2, self.con_cupo_dos.id)], (False, 'No hay cupo disponible en esta materia'))
+        self.assertEqual(mensajes[(a0, self.con_cupo_cinco.id)], (False, 'El alumno ya está inscripto en esta materia'))
+        self.assertEqual(
+            mensajes[(a1, self.de_otra_carrera.id)],
+            (False, 'El alumno no puede inscribirse a una materia de otra carrera')
+        )
+
+        self.con_cupo_dos.refresh_from_db()
+        self.con_cupo_cinco.refresh_from_db()
+        self.assertEqual(self.con_cupo_dos.inscriptos_activos, 2)
+        self.assertEqual(self.con_cupo_cinco.inscriptos_activos, 3)
+        self.assertEqual(Inscripcion.objects.filter(activa=True).count(), 5)
+
+    def test_inactivos_con_su_propio_mensaje(self):
+        Alumno.objects.filter(pk=self.alumnos[1].pk).update(activo=False)
+        Materia.objects.filter(pk=self.con_cupo_dos.pk).update(activa=False)
+        resultados = InscripcionService.inscribir_masivo(
+            [self.alumnos[1].id, self.alumnos[2].id], [self.con_cupo_dos.id, self.con_cupo_cinco.id]
+        )
+
+        mensajes = {(r['alumno_id'], r['materia_id']): r['mensaje'] for r in resultados}
+        self.assertEqual(mensajes[(self.alumnos[1].id, self.con_cupo_cinco.id)], 'El alumno no está activo')
+        self.assertEqual(mensajes[(self.alumnos[2].id, self.con_cupo_dos.id)], 'La materia no está activa')
+        self.assertEqual(mensajes[(self.alumnos[2].id, self.con_cupo_cinco.id)], 'Inscripción creada')
+
+    def test_bulk_create_respeta_el_cupo(self):
+        with self.assertRaisesMessage(ValidationError, 'No hay cupo disponible en Materia PROG101'):
+            Inscripcion.objects.bulk_create([
+                Inscripcion(alumno=alumno, materia=self.con_cupo_dos) for alumno in self.alumnos
+            ])
+        self.con_cupo_dos.refresh_from_db()
+        self.assertEqual(self.con_cupo_dos.inscriptos_activos, 0)
+        self.assertFalse(Inscripcion.objects.filter(materia=self.con_cupo_dos).exists())
+
+    def test_consultas_independientes_de_la_cantidad(self):
+        with CaptureQueriesContext(connection) as pocos:
+            InscripcionService.inscribir_masivo([self.alumnos[1].id], [self.con_cupo_cinco.id])
+        with CaptureQueriesContext(connection) as muchos:
+            InscripcionService.inscribir_masivo(
+                [alumno.id for alumno in self.alumnos], [self.con_cupo_dos.id, self.con_cupo_cinco.id]
+            )
+        self.assertEqual(len(pocos), len(muchos))
+
+    def test_invalida_la_oferta_academica(self):
+        MateriaService.obtener_oferta_academica(self.carrera.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.inscribir_masivo([self.alumnos[1].id], [self.con_cupo_dos.id])
+        self.assertIsNone(cache.get(MateriaService.clave_oferta_academica(self.carrera.id)))
+
+    def test_formulario_inscribe_la_cohorte(self):
+        admin = Usuario.objects.create(username='admin', email='admin@test.com', password='x')
+        admin.groups.add(Group.objects.create(name='Administradores'))
+        self.client.force_login(admin)
+
+        respuesta = self.client.post(reverse('inscripcion_masiva'), {
+            'carrera': self.carrera.id, 'año_ingreso': 2024, 'año': 1, 'cuatrimestre': '',
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['inscriptas'], 4)
+        self.assertEqual(len(respuesta.context['rechazadas']), 2)
+        self.assertEqual(Inscripcion.objects.filter(activa=True).count(), 5)
+
+
+class BajaMasivaTest(TestCase):
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.primer_cuatrimestre = crear_materia(self.carrera, 'PROG101')
+        self.segundo_cuatrimestre = Materia.objects.create(
+            nombre='Materia PROG102', codigo='PROG102', carrera=self.carrera, año=1, cuatrimestre=2, cupo_maximo=30
+        )
+        self.alumnos = crear_alumnos(self.carrera, 5)
+        InscripcionService.inscribir_masivo(
+            [alumno.id for alumno in self.alumnos], [self.primer_cuatrimestre.id, self.segundo_cuatrimestre.id]
+        )
+
+    def test_baja_por_cuatrimestre_en_lotes(self):
+        cantidad = InscripcionService.dar_de_baja_masivo(cuatrimestre=1, tamaño_lote=2)
+
+        self.assertEqual(cantidad, 5)
+        self.primer_cuatrimestre.refresh_from_db()
+        self.segundo_cuatrimestre.refresh_from_db()
+        self.assertEqual(self.primer_cuatrimestre.inscriptos_activos, 0)
+        self.assertEqual(self.segundo_cuatrimestre.inscriptos_activos, 5)
+        self.assertFalse(Inscripcion.objects.filter(
+            materia=self.primer_cuatrimestre, activa=False, fecha_baja__isnull=True
+        ).exists())
+
+    def test_requiere_un_criterio(self):
+        with self.assertRaisesMessage(ValidationError, 'Debe indicar una materia, una carrera o un cuatrimestre'):
+            InscripcionService.dar_de_baja_masivo()
+
+    def test_invalida_la_oferta_academica(self):
+        MateriaService.obtener_oferta_academica(self.carrera.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.dar_de_baja_masivo(materia_id=self.segundo_cuatrimestre.id)
+        self.assertIsNone(cache.get(MateriaService.clave_oferta_academica(self.carrera.id)))
+
+    def test_baja_individual_registra_fecha(self):
+        inscripcion = Inscripcion.objects.filter(activa=True).first()
+        InscripcionService.dar_de_baja_inscripcion(inscripcion.id)
+        inscripcion.refresh_from_db()
+        self.assertIsNotNone(inscripcion.fecha_baja)
+
+    def test_comando_dry_run(self):
+        salida = StringIO()
+        call_command('dar_de_baja_inscripciones', carrera='TP2024', dry_run=True, stdout=salida)
+        self.assertIn('10 inscripciones se darían de baja', salida.getvalue())
+        self.assertEqual(Inscripcion.objects.filter(activa=True).count(), 10)
+
+        call_command('dar_de_baja_inscripciones', carrera='TP2024', lote=3, stdout=StringIO())
+        self.assertFalse(Inscripcion.objects.filter(activa=True).exists())
+
+    def test_comando_con_codigo_de_materia_repetido(self):
+        otra = crear_materia(crear_carrera('LIC2024'), 'PROG101')
+        with self.assertRaisesMessage(CommandError, 'existe en varias carreras (LIC2024, TP2024)'):
+            call_command('dar_de_baja_inscripciones', materia='prog101', dry_run=True, stdout=StringIO())
+
+        salida = StringIO()
+        call_command('dar_de_baja_inscripciones', materia='PROG101', carrera='LIC2024', dry_run=True, stdout=salida)
+        self.assertIn('0 inscripciones se darían de baja', salida.getvalue())
+        with self.assertRaisesMessage(CommandError, 'La materia "MAT999" no existe en esa carrera'):
+            call_command('dar_de_baja_inscripciones', materia='MAT999', carrera='LIC2024', stdout=StringIO())
+        self.assertTrue(Inscripcion.objects.filter(activa=True).exists())
+        self.assertFalse(otra.inscripciones.exists())
+
+
+class ListaEsperaTest(TestCase):
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.materia = crear_materia(self.carrera, cupo_maximo=1)
+        self.alumnos = crear_alumnos(self.carrera, 4)
+        self.inscripcion = InscripcionService.inscribir_alumno(self.alumnos[0].id, self.materia.id)
+
+    def test_anotarse_en_orden_de_llegada(self):
+        primera = ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        segunda = ListaEsperaService.anotar(self.alumnos[2].id, self.materia.id)
+        repetida = ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+
+        self.assertEqual((primera.posicion, segunda.posicion), (1, 2))
+        self.assertEqual((repetida.id, repetida.posicion), (primera.id, 1))
+        self.assertEqual(EsperaInscripcion.objects.count(), 2)
+
+    def test_no_se_anota_con_cupo_o_ya_inscripto(self):
+        with self.assertRaisesMessage(ValidationError, 'El alumno ya está inscripto en esta materia'):
+            ListaEsperaService.anotar(self.alumnos[0].id, self.materia.id)
+
+        otra = crear_materia(self.carrera, 'PROG102')
+        with self.assertRaisesMessage(ValidationError, 'La materia tiene cupo disponible'):
+            ListaEsperaService.anotar(self.alumnos[1].id, otra.id)
+
+    def test_la_baja_promueve_al_primero(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        ListaEsperaService.anotar(self.alumnos[2].id, self.materia.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InscripcionService.dar_de_baja_inscripcion(self.inscripcion.id)
+
+        promovida = EsperaInscripcion.objects.get(alumno=self.alumnos[1])
+        self.assertEqual(promovida.estado, EsperaInscripcion.PROMOVIDA)
+        self.assertTrue(promovida.inscripcion.activa)
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+        self.assertEqual(ListaEsperaService.posiciones_alumno(self.alumnos[2].id), {self.materia.id: 1})
+        self.assertEqual(ListaEsperaService.posiciones_alumno(self.alumnos[1].id), {})
+
+    def test_la_baja_en_bloque_promueve(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        Inscripcion.objects.filter(id=self.inscripcion.id).dar_de_baja()
+
+        self.assertTrue(Inscripcion.objects.filter(alumno=self.alumnos[1], materia=self.materia, activa=True).exists())
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_eliminar_la_inscripcion_promueve(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.filter(id=self.inscripcion.id).delete()
+
+        self.assertEqual(EsperaInscripcion.objects.get().estado, EsperaInscripcion.PROMOVIDA)
+        self.assertTrue(Inscripcion.objects.filter(alumno=self.alumnos[1], materia=self.materia, activa=True).exists())
+        self.materia.refresh_from_db()
+        self.assertEqual(self.materia.inscriptos_activos, 1)
+
+    def test_la_inscripcion_masiva_respeta_la_lista(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        Materia.objects.filter(pk=self.materia.pk).update(cupo_maximo=2)
+
+        resultados = InscripcionService.inscribir_masivo([self.alumnos[2].id], [self.materia.id])
+
+        self.assertEqual(resultados[0]['mensaje'], 'No hay cupo disponible en esta materia')
+        self.assertEqual(EsperaInscripcion.objects.get().estado, EsperaInscripcion.PROMOVIDA)
+
+    def test_la_baja_masiva_cancela_la_lista(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        InscripcionService.dar_de_baja_masivo(materia_id=self.materia.id)
+
+        self.assertFalse(Inscripcion.objects.filter(activa=True).exists())
+        self.assertEqual(EsperaInscripcion.objects.get().estado, EsperaInscripcion.CANCELADA)
+
+    def test_quien_sale_de_la_lista_no_es_promovido(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        ListaEsperaService.anotar(self.alumnos[2].id, self.materia.id)
+        ListaEsperaService.cancelar(self.alumnos[1].id, self.materia.id)
+
+        InscripcionService.dar_de_baja_inscripcion(self.inscripcion.id)
+        self.assertEqual(
+            list(Inscripcion.objects.filter(activa=True).values_list('alumno_id', flat=True)), [self.alumnos[2].id]
+        )
+        with self.assertRaisesMessage(ValidationError, 'El alumno no está en la lista de espera'):
+            ListaEsperaService.cancelar(self.alumnos[1].id, self.materia.id)
+
+    def test_ampliar_el_cupo_promueve(self):
+        for alumno in self.alumnos[1:]:
+            ListaEsperaService.anotar(alumno.id, self.materia.id)
+
+        self.materia.refresh_from_db()
+        self.materia.cupo_maximo = 3
+        self.materia.save()
+
+        self.assertEqual(EsperaInscripcion.objects.filter(estado=EsperaInscripcion.PROMOVIDA).count(), 2)
+        self.assertEqual(ListaEsperaService.posiciones_alumno(self.alumnos[3].id), {self.materia.id: 1})
+
+    def test_promocion_lee_solo_los_lugares_con_cupo(self):
+        for alumno in self.alumnos[1:]:
+            ListaEsperaService.anotar(alumno.id, self.materia.id)
+        Materia.objects.filter(pk=self.materia.pk).update(cupo_maximo=3)
+
+        primeros = EsperaInscripcion.primeros_en_espera([self.materia.id])
+        self.assertEqual([espera.alumno_id for espera in primeros], [self.alumnos[1].id, self.alumnos[2].id])
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(EsperaInscripcion.promover([self.materia.id]), 2)
+        lecturas = [c['sql'] for c in consultas if c['sql'].startswith('SELECT') and 'inscripcion_esperainscripcion' in c['sql']]
+        self.assertEqual(len(lecturas), 1)
+        self.assertEqual(ListaEsperaService.posiciones_alumno(self.alumnos[3].id), {self.materia.id: 1})
+
+    def test_editar_sin_ampliar_el_cupo_no_promueve(self):
+        ListaEsperaService.anotar(self.alumnos[1].id, self.materia.id)
+        materia = Materia.objects.get(pk=self.materia.pk)
+
+        materia.nombre = 'Materia Renombrada'
+        with mock.patch.object(EsperaInscripcion, 'promover') as promover:
+            materia.save()
+            self.assertFalse(promover.called)
+
+            materia.cupo_maximo = 4
+            materia.save()
+            promover.assert_called_once_with([materia.pk])
+
+
+class ColaInscripcionTest(TestCase):
+
+    def setUp(self):
+        self.carrera = crear_carrera()
+        self.materia = crear_materia(self.carrera, cupo_maximo=1)
+        self.alumnos = crear_alumnos(self.carrera, 3)
+
+    def test_encolar_no_inscribe(self):
+        solicitud = ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        self.assertEqual(solicitud.estado, SolicitudInscripcion.PENDIENTE)
+        self.assertFalse(Inscripcion.objects.exists())
+        self.assertEqual(ColaInscripcionService.posicion(solicitud), 1)
+
+    def test_solicitud_repetida_reutiliza_el_ticket(self):
+        primera = ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        segunda = ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        self.assertEqual(primera.ticket, segunda.ticket)
+
+    def test_solicitud_simultanea_reutiliza_el_ticket(self):
+        primera = ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        # Otro pedido encoló entre la búsqueda y el INSERT: la búsqueda inicial no la ve
+        # y el INSERT choca con la restricción solicitud_pendiente_unica
+        first = QuerySet.first
+        busquedas = []
+
+        def primera_busqueda_vacia(queryset):
+            busquedas.append(queryset)
+            return None if len(busquedas) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', primera_busqueda_vacia):
+            segunda = ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        self.assertEqual(len(busquedas), 2)
+        self.assertEqual(primera.ticket, segunda.ticket)
+
+    def test_una_sola_solicitud_pendiente_por_materia(self):
+        SolicitudInscripcion.objects.create(alumno=self.alumnos[0], materia=self.materia)
+        with self.assertRaises(IntegrityError):
+            SolicitudInscripcion.objects.create(alumno=self.alumnos[0], materia=self.materia)
+
+    @override_settings(COLA_INSCRIPCION_MAXIMO_PENDIENTES=2)
+    def test_cola_llena(self):
+        ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        ColaInscripcionService.encolar(self.alumnos[1].id, self.materia.id)
+        with self.assertRaisesMessage(ValidationError, 'Hay demasiadas solicitudes de inscripción en espera'):
+            ColaInscripcionService.encolar(self.alumnos[2].id, self.materia.id)
+
+    def test_procesa_en_orden_de_llegada(self):
+        solicitudes = [ColaInscripcionService.encolar(alumno.id, self.materia.id) for alumno in self.alumnos]
+        self.assertEqual(ColaInscripcionService.posicion(solicitudes[2]), 3)
+
+        self.assertEqual(ColaInscripcionService.procesar_pendientes(), 3)
+        self.assertEqual(ColaInscripcionService.procesar_pendientes(), 0)
+
+        for solicitud in solicitudes:
+            solicitud.refresh_from_db()
+        self.assertEqual(solicitudes[0].estado, SolicitudInscripcion.ACEPTADA)
+        self.assertEqual(solicitudes[0].inscripcion.alumno_id, self.alumnos[0].id)
+        for solicitud in solicitudes[1:]:
+            self.assertEqual(solicitud.estado, SolicitudInscripcion.RECHAZADA)
+            self.assertEqual(solicitud.mensaje, 'No hay cupo disponible en esta materia')
+            self.assertIsNone(ColaInscripcionService.posicion(solicitud))
+
+        metricas = ColaInscripcionService.metricas()
+        self.assertEqual((metricas['procesadas'], metricas['aceptadas'], metricas['rechazadas']), (3, 1, 2))
+        self.assertEqual(metricas['pendientes'], 0)
+
+    def test_error_inesperado_no_traba_la_cola(self):
+        solicitudes = [ColaInscripcionService.encolar(alumno.id, self.materia.id) for alumno in self.alumnos[:2]]
+        inscribir = InscripcionService.inscribir_alumno
+
+        def falla_la_primera(alumno_id, materia_id):
+            inscripcion = inscribir(alumno_id, materia_id)
+            if alumno_id == self.alumnos[0].id:
+                raise RuntimeError('falla inesperada')
+            return inscripcion
+
+        with mock.patch.object(InscripcionService, 'inscribir_alumno', side_effect=falla_la_primera), \
+                self.assertLogs('gestion.inscripciones', 'ERROR'):
+            self.assertEqual(ColaInscripcionService.procesar_pendientes(), 2)
+
+        for solicitud in solicitudes:
+            solicitud.refresh_from_db()
+        self.assertEqual(solicitudes[0].estado, SolicitudInscripcion.RECHAZADA)
+        self.assertEqual(solicitudes[0].mensaje, 'No se pudo procesar la solicitud. Intenta inscribirte nuevamente.')
+        # El savepoint revirtió la inscripción a medio hacer y el cupo quedó para la siguiente
+        self.assertEqual(solicitudes[1].estado, SolicitudInscripcion.ACEPTADA)
+        self.assertEqual(list(Inscripcion.objects.values_list('alumno_id', flat=True)), [self.alumnos[1].id])
+
+    def test_worker_reintenta_tras_error_de_base(self):
+        ColaInscripcionService.encolar(self.alumnos[0].id, self.materia.id)
+        procesar = ColaInscripcionService.procesar_pendientes
+        llamadas = []
+
+        def bloqueada_una_vez(lote):
+            llamadas.append(lote)
+            if len(llamadas) == 1:
+                raise OperationalError('database is locked')
+            return procesar(lote)
+
+        with mock.patch.object(ColaInscripcionService, 'procesar_pendientes', side_effect=bloqueada_una_vez), \
+                mock.patch.object(connection, 'close'), \
+                self.assertLogs('gestion.inscripciones', 'ERROR'):
+            salida = StringIO()
+            call_command('procesar_inscripciones', '--una-vez', '--intervalo=0', stdout=salida)
+        self.assertIn('1 solicitudes procesadas', salida.getvalue())
+        self.assertEqual(len(llamadas), 3)
+
+
+@tag('estres')
+class ColaInscripcionEstresTest(TransactionTestCase):
+    """
+    5000 alumnos piden inscribirse a la vez mientras el worker vacía la cola.
+    Tarda más que el resto: se omite con test --exclude-tag=estres
+    """
+
+    ALUMNOS = 5000
+    HILOS = 4
+    MATERIAS = 5
+    CUPO = 100
+
+    def setUp(self):
+        carrera = crear_carrera()
+        self.materias = [crear_materia(carrera, f'MAT{i:03d}', cupo_maximo=self.CUPO) for i in range(self.MATERIAS)]
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(username=f'{30000000 + i}', email=f'alumno{i}@test.com', password='x')
+            for i in range(self.ALUMNOS)
+        ])
+        self.alumnos = Alumno.objects.bulk_create([
+            Alumno(usuario=usuario, legajo=f'{20240000 + i}', carrera=carrera, año_ingreso=2024)
+            for i, usuario in enumerate(usuarios)
+        ])
+
+    def _reintentar(self, operacion, *args):
+        while True:
+            try:
+                return operacion(*args)
+            except OperationalError:
+                # Base bloqueada por otro escritor: reintentar
+                time.sleep(0.02)
+
+    def _solicitar(self, alumnos, barrera, tickets):
+        barrera.wait()
+        try:
+            for i, alumno in alumnos:
+                materia = self.materias[i % self.MATERIAS]
+                tickets.append(self._reintentar(ColaInscripcionService.encolar, alumno.id, materia.id).ticket)
+        finally:
+            connection.close()
+
+    def _procesar(self, solicitando):
+        try:
+            while True:
+                if not self._reintentar(ColaInscripcionService.procesar_pendientes, 100):
+                    if not solicitando.is_set():
+                        break
+                    time.sleep(0.01)
+        finally:
+            connection.close()
+
+    def test_cola_con_5000_alumnos(self):
+        barrera = threading.Barrier(self.HILOS)
+        tickets = []
+        solicitando = threading.Event()
+        solicitando.set()
+        hilos = [
+            threading.Thread(target=self._solicitar, args=(
+                list(enumerate(self.alumnos))[n::self.HILOS], barrera, tickets
+            ))
+            for n in range(self.HILOS)
+        ]
+        worker = threading.Thread(target=self._procesar, args=(solicitando,))
+        worker.start()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        solicitando.clear()
+        worker.join()
+
+        self.assertEqual(len(set(tickets)), self.ALUMNOS)
+        self.assertFalse(SolicitudInscripcion.objects.filter(estado=SolicitudInscripcion.PENDIENTE).exists())
+
+        for materia in self.materias:
+            materia.refresh_from_db()
+            self.assertEqual(materia.inscriptos_activos, self.CUPO)
+            self.assertEqual(Inscripcion.objects.filter(materia=materia, activa=True).count(), self.CUPO)
+            # Los lugares son para las primeras solicitudes que llegaron
+            aceptadas = list(
+                SolicitudInscripcion.objects.filter(materia=materia)
+                .order_by('id').values_list('estado', flat=True)
+            )
+            self.assertEqual(aceptadas[:self.CUPO], [SolicitudInscripcion.ACEPTADA] * self.CUPO)
+            self.assertNotIn(SolicitudInscripcion.ACEPTADA, aceptadas[self.CUPO:])
+
+        metricas = ColaInscripcionService.metricas(ventana=3600)
+        self.assertEqual(metricas['procesadas'], self.ALUMNOS)
+        self.assertEqual(metricas['aceptadas'], self.MATERIAS * self.CUPO)
+        self.assertIsNotNone(metricas['espera_ms']['p99'])
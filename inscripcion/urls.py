@@ -9,5 +9,6 @@ urlpatterns = [
     # Gestión de Inscripciones
     path('inscripciones/', views.InscripcionListView.as_view(), name='inscripcion_list'),
     path('inscripciones/crear/', views.InscripcionCreateView.as_view(), name='inscripcion_create'),
+    path('inscripciones/masiva/', views.InscripcionMasivaView.as_view(), name='inscripcion_masiva'),
     path('inscripciones/<int:pk>/dar-baja/', views.InscripcionBajaView.as_view(), name='inscripcion_baja'),
 ]
@@ -2,28 +2,30 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic import (
-    View, ListView, CreateView
+    View, ListView, CreateView, FormView
 )
 from django.core.exceptions import ValidationError
 
+from gestion_academica.paginacion import CursorPaginationMixin
 from usuario.views import AdminRequiredMixin, AlumnoRequiredMixin
 
 from .models import Inscripcion
-from .forms import InscripcionForm
+from .forms import InscripcionForm, InscripcionMasivaForm
 from .services import InscripcionService
 # Create your views here.
 
 # === GESTIÓN DE INSCRIPCIONES ===
 
-class InscripcionListView(AdminRequiredMixin, ListView):
+class InscripcionListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """Lista todas las inscripciones"""
     model = Inscripcion
     template_name = 'gestion_academica/inscripciones/list.html'
     context_object_name = 'inscripciones'
     paginate_by = 10
+    orden_cursor = ('-fecha_inscripcion', 'id')
     
     def get_queryset(self):
-        return Inscripcion.objects.filter(activa=True).select_related('alumno', 'materia').order_by('-fecha_inscripcion')
+        return Inscripcion.objects.filter(activa=True).select_related('alumno__usuario', 'materia__carrera')
 
 
 class InscripcionCreateView(AdminRequiredMixin, CreateView):
@@ -43,6 +45,33 @@ class InscripcionCreateView(AdminRequiredMixin, CreateView):
             return self.form_invalid(form)
 
 
+class InscripcionMasivaView(AdminRequiredMixin, FormView):
+    """Inscribe una cohorte completa en las materias de un año de su carrera"""
+    form_class = InscripcionMasivaForm
+    template_name = 'gestion_academica/inscripciones/masiva.html'
+    
+    def form_valid(self, form):
+        alumnos = {alumno.id: alumno for alumno in form.cleaned_data['alumnos']}
+        materias = {materia.id: materia for materia in form.cleaned_data['materias']}
+        resultados = InscripcionService.inscribir_masivo(
+            list(alumnos), list(materias), form.cleaned_data['observaciones']
+        )
+        
+        rechazadas = [
+            {**resultado, 'alumno': alumnos[resultado['alumno_id']], 'materia': materias[resultado['materia_id']]}
+            for resultado in resultados if not resultado['inscripta']
+        ]
+        inscriptas = len(resultados) - len(rechazadas)
+        messages.success(self.request, f'{inscriptas} inscripciones creadas, {len(rechazadas)} rechazadas.')
+        
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            inscriptas=inscriptas,
+            rechazadas=rechazadas,
+            total=len(resultados),
+        ))
+
+
 class InscripcionBajaView(AdminRequiredMixin, AlumnoRequiredMixin, View):
     """Da de baja una inscripción"""
     def post(self, request, pk):
@@ -3,7 +3,8 @@ from django.contrib import admin
 from .models import Materia
 # Register your models here.
 class MateriaAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'codigo', 'carrera', 'año', 'cuatrimestre', 'cupo_maximo', 'activa')
+    list_display = ('nombre', 'codigo', 'carrera', 'año', 'cuatrimestre', 'cupo_maximo', 'inscriptos_activos', 'activa')
+    list_select_related = ('carrera',)
     list_filter = ('carrera', 'año', 'cuatrimestre', 'activa')
     search_fields = ('nombre', 'codigo', 'carrera__nombre')
     ordering = ('carrera', 'año', 'cuatrimestre', 'nombre')
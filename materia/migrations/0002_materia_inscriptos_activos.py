@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular_inscriptos_activos(apps, schema_editor):
+    Materia = apps.get_model('materia', 'Materia')
+    materias = Materia.objects.annotate(
+        activas=Count('inscripciones', filter=Q(inscripciones__activa=True))
+    )
+    for materia in materias:
+        Materia.objects.filter(pk=materia.pk).update(inscriptos_activos=materia.activas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia', '0001_initial'),
+        ('inscripcion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materia',
+            name='inscriptos_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Inscriptos Activos'),
+        ),
+        migrations.RunPython(calcular_inscriptos_activos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrera', '0001_initial'),
+        ('materia', '0002_materia_inscriptos_activos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='materia',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['carrera', 'año', 'cuatrimestre', 'nombre'], name='materia_activa_carrera_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def copiar_fecha_creacion(apps, schema_editor):
+    Materia = apps.get_model('materia', 'Materia')
+    Materia.objects.update(fecha_modificacion=F('fecha_creacion'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materia', '0003_materia_materia_activa_carrera_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materia',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copiar_fecha_creacion, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 
@@ -35,13 +37,29 @@ class Materia(models.Model):
     )
     descripcion = models.TextField(blank=True, verbose_name='Descripción')
     activa = models.BooleanField(default=True, verbose_name='Activa')
+    inscriptos_activos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Inscriptos Activos'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    _cupo_maximo_original = None
 
     class Meta:
         verbose_name = 'Materia'
         verbose_name_plural = 'Materias'
         unique_together = ['carrera', 'codigo']  # No duplicar códigos por carrera
         ordering = ['carrera', 'año', 'cuatrimestre', 'nombre']
+        indexes = [
+            # Plan de estudios de una carrera, ya ordenado
+            models.Index(
+                fields=['carrera', 'año', 'cuatrimestre', 'nombre'],
+                condition=models.Q(activa=True),
+                name='materia_activa_carrera_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.carrera.nombre} ({self.año}° año)"
@@ -55,17 +73,79 @@ class Materia(models.Model):
         if self.carrera and self.año > self.carrera.duracion_años:
             raise ValidationError(f'El año {self.año} supera la duración de la carrera ({self.carrera.duracion_años} años)')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Para promover la lista de espera sólo cuando el cupo aumenta
+        instancia._cupo_maximo_original = instancia.__dict__.get('cupo_maximo')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        """
+        Al editar una materia no se escribe inscriptos_activos: el valor en
+        memoria puede ser viejo y pisaría las reservas hechas desde que se
+        cargó. El contador sólo lo cambian reservar_cupo, liberar_cupo y
+        recalcular_inscriptos.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'inscriptos_activos'
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def cupo_disponible(self):
-        """Propiedad que calcula el cupo disponible"""
-        inscriptos = self.inscripciones.filter(activa=True).count()
-        return self.cupo_maximo - inscriptos
+        """Cupo disponible según el contador de inscriptos (sin consultar la base)"""
+        return self.cupo_maximo - self.inscriptos_activos
 
     @property
     def tiene_cupo(self):
         """Propiedad que indica si hay cupo disponible"""
         return self.cupo_disponible > 0
 
+    @classmethod
+    def reservar_cupo(cls, materia_id):
+        """
+        Reserva un lugar con un UPDATE condicional atómico.
+        Retorna False si la materia ya alcanzó su cupo máximo.
+        Los cambios de cupo también actualizan fecha_modificacion,
+        que alimenta los validadores HTTP de la oferta académica.
+        """
+        actualizadas = cls.objects.filter(
+            id=materia_id,
+            inscriptos_activos__lt=F('cupo_maximo')
+        ).update(inscriptos_activos=F('inscriptos_activos') + 1, fecha_modificacion=Now())
+        return actualizadas == 1
+
+    @classmethod
+    def liberar_cupo(cls, materia_id):
+        """Libera un lugar previamente reservado"""
+        cls.objects.filter(
+            id=materia_id,
+            inscriptos_activos__gt=0
+        ).update(inscriptos_activos=F('inscriptos_activos') - 1, fecha_modificacion=Now())
+
+    @classmethod
+    def recalcular_inscriptos(cls, materia_ids=None):
+        """
+        Recalcula el contador a partir de las inscripciones activas
+        con un único UPDATE. Sin ids, recalcula todas las materias.
+        """
+        from inscripcion.models import Inscripcion
+
+        activas = Inscripcion.objects.filter(
+            materia=OuterRef('pk'), activa=True
+        ).order_by().values('materia').annotate(total=Count('id')).values('total')
+
+        materias = cls.objects.all()
+        if materia_ids is not None:
+            materias = materias.filter(id__in=materia_ids)
+        return materias.update(
+            inscriptos_activos=Coalesce(Subquery(activas), 0),
+            fecha_modificacion=Now()
+        )
+
     def delete(self, *args, **kwargs):
         """
         Validación: No permitir eliminar si tiene inscripciones activas
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Max, Sum
 from django.core.exceptions import ValidationError
 from .models import  Carrera, Materia
 
@@ -65,20 +68,83 @@ class MateriaService:
         """
         Obtiene todas las materias de una carrera específica
         """
+        return MateriaService.obtener_carrera_y_materias(carrera_id)[1]
+    
+    @staticmethod
+    def obtener_carrera_y_materias(carrera_id):
+        """
+        Retorna la carrera y sus materias activas, para las vistas que
+        muestran ambas sin volver a buscar la carrera
+        """
         try:
             carrera = Carrera.objects.get(id=carrera_id)
-            return Materia.objects.filter(carrera=carrera, activa=True).order_by('año', 'cuatrimestre', 'nombre')
         except Carrera.DoesNotExist:
             raise ValidationError('La carrera especificada no existe')
+        materias = Materia.objects.filter(carrera=carrera, activa=True).order_by('año', 'cuatrimestre', 'nombre')
+        return carrera, materias
     
     @staticmethod
     def obtener_materias_con_cupo():
         """
-        Obtiene todas las materias que tienen cupo disponible
+        Obtiene todas las materias que tienen cupo disponible.
+        Retorna un QuerySet perezoso filtrado en SQL, apto para paginar
+        o seguir filtrando, anotado con la cantidad de inscriptos.
         """
-        materias_con_cupo = []
-        for materia in Materia.objects.filter(activa=True):
-            if materia.tiene_cupo:
-                materias_con_cupo.append(materia)
-        return materias_con_cupo
-
+        return Materia.objects.filter(
+            activa=True,
+            inscriptos_activos__lt=F('cupo_maximo')
+        ).annotate(
+            inscriptos=F('inscriptos_activos')
+        ).select_related('carrera').order_by('carrera__nombre', 'año', 'cuatrimestre', 'nombre')
+    
+    @staticmethod
+    def resumen_materias_con_cupo(materias):
+        """
+        Totales de un QuerySet de materias con cupo, en una sola consulta.
+        version_cupos (la última fecha_modificacion) cambia con cada cupo
+        reservado o liberado, para las claves de caché del listado.
+        """
+        return materias.aggregate(
+            cupos_totales=Sum(F('cupo_maximo') - F('inscriptos_activos'), default=0),
+            carreras_involucradas=Count('carrera', distinct=True),
+            version_cupos=Max('fecha_modificacion'),
+        )
+    
+    @staticmethod
+    def clave_oferta_academica(carrera_id):
+        return f'oferta_academica:carrera:{carrera_id}'
+    
+    @staticmethod
+    def obtener_oferta_academica(carrera_id):
+        """
+        Materias activas de una carrera con su cupo ya calculado, listas
+        para mostrar. Se guardan en caché por carrera con un TTL corto y se
+        invalidan al cambiar materias o inscripciones (ver gestion_academica.signals).
+        """
+        clave = MateriaService.clave_oferta_academica(carrera_id)
+        oferta = cache.get(clave)
+        if oferta is None:
+            oferta = [
+                {
+                    'id': materia.id,
+                    'nombre': materia.nombre,
+                    'codigo': materia.codigo,
+                    'año': materia.año,
+                    'cuatrimestre': materia.get_cuatrimestre_display(),
+                    'descripcion': materia.descripcion,
+                    'cupo_maximo': materia.cupo_maximo,
+                    'cupo_disponible': materia.cupo_disponible,
+                    'porcentaje_cupo': materia.cupo_disponible * 100 // materia.cupo_maximo,
+                    'tiene_cupo': materia.tiene_cupo,
+                }
+                for materia in Materia.objects.filter(
+                    carrera_id=carrera_id, activa=True
+                ).order_by('año', 'cuatrimestre', 'nombre')
+            ]
+            cache.set(clave, oferta, getattr(settings, 'OFERTA_ACADEMICA_CACHE_TTL', 30))
+        return oferta
+    
+    @staticmethod
+    def invalidar_oferta_academica(carrera_id):
+        """Descarta la oferta académica guardada en caché de una carrera"""
+        cache.delete(MateriaService.clave_oferta_academica(carrera_id))
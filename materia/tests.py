@@ -1,3 +1,156 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from alumno.models import Alumno
+from carrera.models import Carrera
+from inscripcion.models import Inscripcion
+from usuario.models import Usuario
+
+from .forms import MateriaForm
+from .models import Materia
+from .services import MateriaService
+
+
+class ContadorInscriptosTest(TestCase):
+
+    def setUp(self):
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.materia = Materia.objects.create(
+            nombre='Programación', codigo='PROG101', carrera=self.carrera,
+            año=1, cuatrimestre=1, cupo_maximo=2
+        )
+        self.alumnos = []
+        for i in range(3):
+            usuario = Usuario.objects.create(
+                username=f'{30000000 + i}', email=f'alumno{i}@test.com', password='x'
+            )
+            self.alumnos.append(Alumno.objects.create(
+                usuario=usuario, legajo=f'{20240000 + i}', carrera=self.carrera, año_ingreso=2024
+            ))
+
+    def inscribir(self, alumno, **kwargs):
+        return Inscripcion.objects.create(alumno=alumno, materia=self.materia, **kwargs)
+
+    def contador(self):
+        self.materia.refresh_from_db()
+        return self.materia.inscriptos_activos
+
+    def test_cupo_se_lee_sin_consultas(self):
+        self.inscribir(self.alumnos[0])
+        self.materia.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.materia.cupo_disponible, 1)
+            self.assertTrue(self.materia.tiene_cupo)
+
+    def test_baja_y_reactivacion(self):
+        inscripcion = self.inscribir(self.alumnos[0])
+        inscripcion.dar_de_baja()
+        self.assertEqual(self.contador(), 0)
+
+        inscripcion = Inscripcion.objects.get(pk=inscripcion.pk)
+        inscripcion.activa = True
+        inscripcion.save()
+        self.assertEqual(self.contador(), 1)
+
+    def test_baja_repetida_no_descuenta_dos_veces(self):
+        inscripcion = self.inscribir(self.alumnos[0])
+        self.inscribir(self.alumnos[1])
+        copia = Inscripcion.objects.get(pk=inscripcion.pk)
+        inscripcion.dar_de_baja()
+        copia.dar_de_baja()
+        self.assertEqual(self.contador(), 1)
+
+    def test_eliminar_libera_cupo(self):
+        self.inscribir(self.alumnos[0])
+        self.inscribir(self.alumnos[1])
+        Inscripcion.objects.filter(alumno=self.alumnos[0]).delete()
+        self.assertEqual(self.contador(), 1)
+        self.alumnos[1].delete()  # Borrado en cascada
+        self.assertEqual(self.contador(), 0)
+
+    def test_operaciones_en_bloque(self):
+        Inscripcion.objects.bulk_create([
+            Inscripcion(alumno=alumno, materia=self.materia) for alumno in self.alumnos[:2]
+        ])
+        self.assertEqual(self.contador(), 2)
+        self.assertEqual(Inscripcion.objects.filter(materia=self.materia).dar_de_baja(), 2)
+        self.assertEqual(self.contador(), 0)
+
+    def test_recalcular_cupos_repara_desfase(self):
+        self.inscribir(self.alumnos[0])
+        Materia.objects.filter(pk=self.materia.pk).update(inscriptos_activos=2)
+        salida = StringIO()
+        call_command('recalcular_cupos', stdout=salida)
+        self.assertIn('1 contadores recalculados', salida.getvalue())
+        self.assertEqual(self.contador(), 1)
+
+    def test_editar_materia_no_pisa_el_contador(self):
+        materia = Materia.objects.get(pk=self.materia.pk)  # Cargada antes de las inscripciones
+        self.inscribir(self.alumnos[0])
+        self.inscribir(self.alumnos[1])
+
+        form = MateriaForm(
+            data={
+                'nombre': 'Programación Avanzada', 'codigo': 'PROG101', 'carrera': self.carrera.id,
+                'año': 1, 'cuatrimestre': 1, 'cupo_maximo': 2, 'descripcion': '',
+            },
+            instance=materia,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.assertEqual(self.contador(), 2)
+        self.assertEqual(self.materia.nombre, 'Programación Avanzada')
+        self.assertFalse(Materia.reservar_cupo(self.materia.id))
+
+
+class MateriasConCupoTest(TestCase):
+
+    def setUp(self):
+        self.carrera = Carrera.objects.create(nombre='Carrera', codigo='TP2024', duracion_años=3)
+        self.usuario = Usuario.objects.create(username='40000000', email='admin@test.com', password='x')
+
+    def crear_materias(self, cantidad):
+        Materia.objects.bulk_create([
+            Materia(
+                nombre=f'Materia {i}', codigo=f'MAT{i:04d}', carrera=self.carrera,
+                año=1, cuatrimestre=1, cupo_maximo=10,
+                # Una de cada cuatro materias está completa
+                inscriptos_activos=10 if i % 4 == 0 else i % 10
+            )
+            for i in range(cantidad)
+        ])
+
+    def test_servicio_filtra_en_una_consulta(self):
+        self.crear_materias(1000)
+        with self.assertNumQueries(1):
+            materias = list(MateriaService.obtener_materias_con_cupo())
+        self.assertEqual(len(materias), 750)
+        with self.assertNumQueries(0):
+            for materia in materias:
+                self.assertTrue(materia.tiene_cupo)
+                self.assertEqual(materia.inscriptos, materia.inscriptos_activos)
+                materia.carrera.nombre
+
+    def test_vista_paginada_con_consultas_constantes(self):
+        self.client.force_login(self.usuario)
+        url = reverse('materias_con_cupo')
+
+        self.crear_materias(10)
+        with CaptureQueriesContext(connection) as pocas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
 
-# Create your tests here.
+        Materia.objects.all().delete()
+        self.crear_materias(1000)
+        with CaptureQueriesContext(connection) as muchas:
+            respuesta = self.client.get(url, {'page': 20})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['paginator'].count, 750)
+        self.assertEqual(len(respuesta.context['materias_con_cupo']), 10)
+        self.assertEqual(len(muchas), len(pocas))
@@ -7,6 +7,7 @@ from django.views.generic import (
 )
 from django.core.exceptions import ValidationError
 
+from gestion_academica.paginacion import CursorPaginationMixin
 from usuario.views import AdminRequiredMixin
 
 from .models import Carrera, Materia
@@ -16,12 +17,13 @@ from .services import MateriaService
 # Create your views here.
 # === GESTIÓN DE MATERIAS (Solo Admin) ===
 
-class MateriaListView(AdminRequiredMixin, ListView):
+class MateriaListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """Lista todas las materias con filtros"""
     model = Materia
     template_name = 'gestion_academica/materias/list.html'
     context_object_name = 'materias'
     paginate_by = 10
+    orden_cursor = ('carrera__nombre', 'año', 'cuatrimestre', 'nombre', 'id')
     
     def get_queryset(self):
         queryset = Materia.objects.filter(activa=True).select_related('carrera')
@@ -31,7 +33,7 @@ class MateriaListView(AdminRequiredMixin, ListView):
         if carrera_id:
             queryset = queryset.filter(carrera_id=carrera_id)
         
-        return queryset.order_by('carrera__nombre', 'año', 'cuatrimestre', 'nombre')
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -101,20 +103,26 @@ class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
         
         if carrera_id:
             try:
-                context['materias'] = MateriaService.obtener_materias_por_carrera(carrera_id)
-                context['carrera_seleccionada'] = Carrera.objects.get(id=carrera_id)
+                context['carrera_seleccionada'], context['materias'] = (
+                    MateriaService.obtener_carrera_y_materias(carrera_id)
+                )
             except ValidationError as e:
                 messages.error(self.request, str(e))
         
         return context
     
-class MateriasConCupoView(LoginRequiredMixin, TemplateView):
+class MateriasConCupoView(LoginRequiredMixin, ListView):
     """Vista para ver materias con cupo disponible"""
-    template_name = 'gestion_academica/filtros/materias_con_cupo.html'
+    template_name = 'gestion_academica/publico/materias_con_cupo.html'
+    context_object_name = 'materias_con_cupo'
+    paginate_by = 10
+    
+    def get_queryset(self):
+        return MateriaService.obtener_materias_con_cupo()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['materias'] = MateriaService.obtener_materias_con_cupo()
+        context.update(MateriaService.resumen_materias_con_cupo(self.object_list))
         return context
     
 class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
@@ -129,8 +137,9 @@ class MateriasPorCarreraView(LoginRequiredMixin, TemplateView):
         
         if carrera_id:
             try:
-                context['materias'] = MateriaService.obtener_materias_por_carrera(carrera_id)
-                context['carrera_seleccionada'] = Carrera.objects.get(id=carrera_id)
+                context['carrera_seleccionada'], context['materias'] = (
+                    MateriaService.obtener_carrera_y_materias(carrera_id)
+                )
             except ValidationError as e:
                 messages.error(self.request, str(e))
         
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
+# Bajo ASGI se sirven las vistas asíncronas (ver VISTAS_ASYNC)
+os.environ.setdefault('GESTION_VISTAS_ASYNC', '1')
 
 application = get_asgi_application()
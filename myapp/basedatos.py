@@ -0,0 +1,44 @@
+"""
+Configuración de la base de datos PostgreSQL a partir de variables de entorno
+(ver DATABASES en settings.py)
+"""
+
+import os
+
+
+def configuracion_postgresql(entorno=None, prefijo='GESTION_DB_'):
+    """
+    Base en PostgreSQL: la principal o, con prefijo GESTION_DB_REPLICA_,
+    la réplica, que toma de la principal lo que no defina. Sin pool, las
+    conexiones persisten entre requests GESTION_DB_CONN_MAX_AGE segundos;
+    con GESTION_DB_POOL=1 se usa
+    el pool nativo de Django (psycopg_pool), incompatible con CONN_MAX_AGE.
+    En ambos casos la conexión se verifica antes de reutilizarse
+    (CONN_HEALTH_CHECKS, que con pool es el chequeo de psycopg_pool).
+    """
+    entorno = os.environ if entorno is None else entorno
+
+    def valor(nombre, defecto=''):
+        return entorno.get(f'{prefijo}{nombre}', entorno.get(f'GESTION_DB_{nombre}', defecto))
+
+    pool = valor('POOL') == '1'
+
+    configuracion = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': valor('NOMBRE', 'gestion_academica'),
+        'USER': valor('USUARIO', ''),
+        'PASSWORD': valor('CLAVE', ''),
+        'HOST': valor('HOST', ''),
+        'PORT': valor('PUERTO', ''),
+        'CONN_MAX_AGE': 0 if pool else int(valor('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if pool:
+        configuracion['OPTIONS']['pool'] = {
+            'min_size': int(valor('POOL_MIN', 2)),
+            'max_size': int(valor('POOL_MAX', 10)),
+            'timeout': float(valor('POOL_TIMEOUT', 10)),
+        }
+    return configuracion
+
@@ -0,0 +1,157 @@
+"""
+Presupuesto de consultas SQL por request, para desarrollo y CI (ver
+PRESUPUESTO_CONSULTAS en settings.py).
+
+RegistroConsultas anota cada consulta de todas las conexiones con su
+duración. Se señalan tres problemas:
+
+- el request hace más consultas que el presupuesto de su nombre de URL;
+- la misma consulta, con los mismos parámetros, se repite;
+- la misma consulta con distintos parámetros (misma huella) se repite
+  PRESUPUESTO_CONSULTAS_SIMILARES veces o más: el patrón típico de un
+  N+1, por ejemplo un __str__ que sigue una ForeignKey sin select_related.
+
+Los SAVEPOINT no se cuentan: que aparezcan o no depende de si el request
+ya corre dentro de una transacción (como en los tests).
+
+PresupuestoConsultasMiddleware lo aplica a cada request y
+PresupuestoConsultasMixin.assertPresupuestoConsultas a los tests.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('gestion.consultas')
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+_SAVEPOINTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class PresupuestoConsultasExcedido(Exception):
+    """Un request excedió su presupuesto de consultas (modo estricto)"""
+
+
+def huella(sql):
+    """
+    La consulta sin parámetros ni literales: es la misma para las
+    consultas que sólo difieren en los valores
+    """
+    sql = _LITERALES.sub('?', sql.replace('%s', '?'))
+    return _ESPACIOS.sub(' ', _LISTAS.sub('(...)', sql)).strip()
+
+
+def presupuesto(nombre_url):
+    """Cantidad máxima de consultas para un nombre de URL"""
+    return getattr(settings, 'PRESUPUESTO_CONSULTAS', {}).get(
+        nombre_url, getattr(settings, 'PRESUPUESTO_CONSULTAS_DEFECTO', 10)
+    )
+
+
+class RegistroConsultas:
+    """Consultas ejecutadas mientras dura registrar()"""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(_SAVEPOINTS):
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, repr(params), time.perf_counter() - inicio))
+
+    @contextmanager
+    def registrar(self):
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tiempo_ms(self):
+        return sum(duracion for _, _, duracion in self.consultas) * 1000
+
+    def repetidas(self):
+        """{sql: veces} de las consultas idénticas ejecutadas más de una vez"""
+        veces = Counter((sql, params) for sql, params, _ in self.consultas)
+        return {sql: n for (sql, _), n in veces.items() if n > 1}
+
+    def similares(self, umbral=None):
+        """{huella: veces} de las consultas que se repiten con distintos parámetros"""
+        if umbral is None:
+            umbral = getattr(settings, 'PRESUPUESTO_CONSULTAS_SIMILARES', 5)
+        veces = Counter(huella(sql) for sql, _, _ in self.consultas)
+        return {sql: n for sql, n in veces.items() if n >= umbral}
+
+    def problemas(self, nombre_url):
+        """Descripción de cada problema encontrado; vacía si no hay ninguno"""
+        problemas = []
+        maximo = presupuesto(nombre_url)
+        if self.total > maximo:
+            problemas.append(f'{nombre_url}: {self.total} consultas, el presupuesto es {maximo}')
+        for sql, n in self.repetidas().items():
+            problemas.append(f'{nombre_url}: consulta repetida {n} veces: {sql}')
+        for sql, n in self.similares().items():
+            problemas.append(f'{nombre_url}: posible N+1, {n} consultas iguales salvo los valores: {sql}')
+        return problemas
+
+
+class PresupuestoConsultasMiddleware:
+    """
+    Informa en la cabecera X-Consultas la cantidad de consultas del
+    request y su tiempo, y registra como warning en 'gestion.consultas'
+    los problemas encontrados (o los levanta, en modo estricto).
+    Las consultas de una respuesta streaming, que corren al enviarla,
+    no se cuentan.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PRESUPUESTO_CONSULTAS_ACTIVO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        with registro.registrar():
+            response = self.get_response(request)
+
+        nombre_url = request.resolver_match.url_name if request.resolver_match else request.path
+        response['X-Consultas'] = (
+            f'{registro.total}; tiempo={registro.tiempo_ms:.1f}ms; '
+            f'repetidas={sum(registro.repetidas().values())}'
+        )
+
+        problemas = registro.problemas(nombre_url)
+        for problema in problemas:
+            logger.warning(problema)
+        if problemas and getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+            raise PresupuestoConsultasExcedido('\n'.join(problemas))
+        return response
+
+
+class PresupuestoConsultasMixin:
+    """Para TestCase: falla si el bloque excede el presupuesto de la URL"""
+
+    @contextmanager
+    def assertPresupuestoConsultas(self, nombre_url):
+        registro = RegistroConsultas()
+        with registro.registrar():
+            yield registro
+        problemas = registro.problemas(nombre_url)
+        if problemas:
+            self.fail('\n'.join(problemas))
@@ -0,0 +1,23 @@
+"""
+Percentiles de latencias para los informes de rendimiento (estadísticas
+de la cola de inscripciones y comandos comparar_*).
+"""
+
+import statistics
+
+
+def percentil(ordenados, percentil):
+    """
+    Percentil (1 a 99) de una lista ya ordenada, interpolado entre sus
+    valores. Retorna None si la lista está vacía.
+    """
+    if not ordenados:
+        return None
+    if len(ordenados) == 1:
+        return ordenados[0]
+    return statistics.quantiles(ordenados, n=100, method='inclusive')[percentil - 1]
+
+
+def columna_ms(valor, ancho=10):
+    """Milisegundos alineados a la derecha para una tabla; '-' si no hay valor"""
+    return f'{"-":>{ancho}}' if valor is None else f'{valor:>{ancho}.1f}'
@@ -0,0 +1,90 @@
+"""
+Perfilado de requests con cProfile (ver PERFILADO_ACTIVO en settings.py).
+
+Un administrador perfila un request agregando ?perfilar=1 a la URL. Con
+PERFILADO_MUESTREO mayor a 0 se perfila además esa fracción de todos los
+requests. Cada perfil se guarda en formato pstats en PERFILADO_DIRECTORIO
+y `python manage.py resumir_perfiles` resume los puntos calientes.
+
+Se usa cProfile y no un muestreador por señales porque las señales sólo
+llegan al hilo principal y el servidor atiende cada request en su propio
+hilo. Se perfila un request a la vez; los que llegan mientras tanto se
+atienden sin perfilar. Con ASGI, las vistas asíncronas corren en el hilo
+del event loop y no quedan en el perfil.
+"""
+
+import cProfile
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+PARAMETRO = 'perfilar'
+
+_en_curso = threading.Lock()
+
+
+def directorio_perfiles():
+    return Path(getattr(settings, 'PERFILADO_DIRECTORIO', settings.BASE_DIR / 'perfiles'))
+
+
+def nombre_url(archivo):
+    """Nombre de URL del request de un perfil guardado por guardar_perfil"""
+    partes = Path(archivo).stem.split('-')
+    return partes[2] if len(partes) == 5 else None
+
+
+def guardar_perfil(perfil, nombre, segundos):
+    """
+    Guarda el perfil como AAAAMMDD-HHMMSS-<nombre de URL>-<ms>ms-<id>.prof
+    y retorna la ruta
+    """
+    directorio = directorio_perfiles()
+    directorio.mkdir(parents=True, exist_ok=True)
+    fecha = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    archivo = directorio / f'{fecha}-{nombre}-{segundos * 1000:.0f}ms-{uuid.uuid4().hex[:8]}.prof'
+    perfil.dump_stats(archivo)
+    return archivo
+
+
+class PerfiladoMiddleware:
+    """
+    Perfila los requests pedidos y agrega la cabecera X-Perfil con el
+    nombre del archivo. Va después de AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFILADO_ACTIVO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.perfilar(request) or not _en_curso.acquire(blocking=False):
+            return self.get_response(request)
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            perfil.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfil.disable()
+        finally:
+            _en_curso.release()
+
+        nombre = request.resolver_match.url_name if request.resolver_match else None
+        archivo = guardar_perfil(perfil, nombre or 'sin_nombre', time.perf_counter() - inicio)
+        response['X-Perfil'] = archivo.name
+        return response
+
+    def perfilar(self, request):
+        if request.GET.get(PARAMETRO) == '1':
+            return request.user.is_authenticated and request.user.tiene_grupo('Administradores')
+        muestreo = getattr(settings, 'PERFILADO_MUESTREO', 0)
+        return muestreo > 0 and random.random() < muestreo
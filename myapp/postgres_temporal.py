@@ -0,0 +1,85 @@
+"""
+Cluster de PostgreSQL temporal (initdb + pg_ctl) para correr los tests y
+los benchmarks de inscripción sin Docker ni un servidor instalado como
+servicio. Lo usa TestRunner con GESTION_DB_MOTOR=postgresql-temporal.
+"""
+
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+class ClusterPostgresTemporal:
+    """
+    Cluster en un directorio temporal que sólo escucha en un socket Unix
+    dentro de ese directorio. Prioriza la velocidad sobre la durabilidad
+    (fsync desactivado): los datos se descartan al detenerlo.
+    """
+    PUERTO = '5432'
+    USUARIO = 'postgres'
+
+    def __init__(self, bindir=None):
+        self.bindir = Path(bindir or os.environ.get('GESTION_PG_BINDIR') or _bindir_postgresql())
+        self.directorio = None
+
+    def iniciar(self):
+        self.directorio = tempfile.mkdtemp(prefix='gestion-pg-')
+        datos = Path(self.directorio) / 'datos'
+        try:
+            self._ejecutar(
+                'initdb', '-D', datos, '-U', self.USUARIO, '-A', 'trust', '-E', 'UTF8', '--no-locale', '--no-sync'
+            )
+            opciones = ' '.join([
+                '-k', shlex.quote(self.directorio),
+                '-p', self.PUERTO,
+                "-c listen_addresses=''",
+                '-c fsync=off',
+                '-c synchronous_commit=off',
+                '-c full_page_writes=off',
+            ])
+            self._ejecutar('pg_ctl', '-D', datos, '-l', Path(self.directorio) / 'postgresql.log', '-o', opciones, '-w', 'start')
+        except Exception:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            raise
+        return self
+
+    def detener(self):
+        if self.directorio is None:
+            return
+        try:
+            self._ejecutar('pg_ctl', '-D', Path(self.directorio) / 'datos', '-m', 'fast', '-w', 'stop')
+        finally:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            self.directorio = None
+
+    def entorno(self):
+        """Variables de entorno para configuracion_postgresql (ver myapp/basedatos.py)"""
+        return {
+            'GESTION_DB_NOMBRE': 'postgres',
+            'GESTION_DB_USUARIO': self.USUARIO,
+            'GESTION_DB_HOST': self.directorio,
+            'GESTION_DB_PUERTO': self.PUERTO,
+        }
+
+    def _ejecutar(self, programa, *argumentos):
+        resultado = subprocess.run(
+            [str(self.bindir / programa), *map(str, argumentos)], capture_output=True, text=True
+        )
+        if resultado.returncode != 0:
+            raise RuntimeError(f'{programa} falló: {resultado.stderr.strip() or resultado.stdout.strip()}')
+
+
+def _bindir_postgresql():
+    """Directorio de initdb y pg_ctl: el del PATH o el que informa pg_config"""
+    initdb = shutil.which('initdb')
+    if initdb:
+        return Path(initdb).parent
+    pg_config = shutil.which('pg_config')
+    if pg_config:
+        bindir = Path(subprocess.run([pg_config, '--bindir'], capture_output=True, text=True).stdout.strip())
+        if (bindir / 'initdb').exists():
+            return bindir
+    raise RuntimeError('No se encontró initdb: instale PostgreSQL o indique su directorio en GESTION_PG_BINDIR')
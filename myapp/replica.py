@@ -0,0 +1,151 @@
+"""
+Lecturas desde la réplica de la base de datos (ver REPLICA_LECTURA en
+settings.py).
+
+Sólo se leen de la réplica las vistas que lo declaran con el atributo
+`leer_de_replica` (True, o 'anonimos' para servirlas así sólo a los
+usuarios anónimos) y los métodos de servicio decorados con
+@lectura_en_replica. Todo lo demás, las escrituras y cualquier lectura
+dentro de una transacción van a la base principal.
+
+Después de un POST (por ejemplo una inscripción) el usuario lee de la
+principal durante REPLICA_LECTURA_PROPIA_SEGUNDOS, para ver sus propios
+cambios aunque la réplica todavía no los tenga.
+
+Las cachés que se llenan con lecturas de la réplica (páginas del catálogo,
+reporte general) registran cada invalidación con registrar_invalidacion().
+Durante REPLICA_RETRASO_MAXIMO_SEGUNDOS quien las reconstruye lee de la
+principal, porque la réplica puede no tener todavía el cambio que las
+invalidó y se guardarían datos viejos bajo la clave nueva. Pasado ese
+plazo se asume que la réplica está al día: si se atrasa más, la caché
+puede quedar desactualizada hasta su TTL o la próxima invalidación.
+"""
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+COOKIE_LECTURA_PROPIA = 'gestion_leer_principal'
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+_lectura_propia = ContextVar('lectura_propia', default=False)
+
+
+def alias_replica():
+    """Alias de la réplica configurada, o None si no hay"""
+    return getattr(settings, 'REPLICA_LECTURA', None)
+
+
+@contextmanager
+def leer_de_replica():
+    """Las consultas de lectura del bloque van a la réplica"""
+    token = _leer_de_replica.set(True)
+    try:
+        yield
+    finally:
+        _leer_de_replica.reset(token)
+
+
+def _clave_invalidacion(nombre):
+    return f'replica:invalidada:{nombre}'
+
+
+def registrar_invalidacion(nombre):
+    """
+    Anota que se invalidó la caché `nombre`. Se llama al confirmar la
+    transacción que cambió los datos, que es cuando la réplica empieza a
+    recibirlos.
+    """
+    if alias_replica():
+        cache.set(_clave_invalidacion(nombre), True, getattr(settings, 'REPLICA_RETRASO_MAXIMO_SEGUNDOS', 5))
+
+
+def invalidacion_reciente(nombre):
+    """Si la caché `nombre` se invalidó hace menos de REPLICA_RETRASO_MAXIMO_SEGUNDOS"""
+    return bool(alias_replica()) and cache.get(_clave_invalidacion(nombre)) is not None
+
+
+def lectura_en_replica(funcion=None, *, cache_llenada=None):
+    """
+    Decorador para métodos de servicio de sólo lectura que retornan datos
+    ya evaluados (un queryset perezoso se evaluaría fuera del bloque).
+    Con cache_llenada, el método lee de la principal mientras esa caché
+    se haya invalidado recientemente.
+    """
+    if funcion is None:
+        return functools.partial(lectura_en_replica, cache_llenada=cache_llenada)
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if cache_llenada and invalidacion_reciente(cache_llenada):
+            return funcion(*args, **kwargs)
+        with leer_de_replica():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+class ReplicaRouter:
+    """Envía a la réplica las lecturas marcadas con leer_de_replica()"""
+
+    def db_for_read(self, model, **hints):
+        replica = alias_replica()
+        if not replica or not _leer_de_replica.get() or _lectura_propia.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Dentro de una transacción se lee lo que ella misma escribió
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Principal y réplica tienen los mismos datos
+        return True
+
+
+class ReplicaMiddleware:
+    """
+    Decide para cada request si sus lecturas van a la réplica y marca a
+    quien acaba de escribir para que lea de la principal por un tiempo
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token_propia = _lectura_propia.set(COOKIE_LECTURA_PROPIA in request.COOKIES)
+        token_replica = _leer_de_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _leer_de_replica.reset(token_replica)
+            _lectura_propia.reset(token_propia)
+
+        if alias_replica() and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_LECTURA_PROPIA,
+                '1',
+                max_age=getattr(settings, 'REPLICA_LECTURA_PROPIA_SEGUNDOS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        vista = getattr(view_func, 'view_class', view_func)
+        modo = getattr(vista, 'leer_de_replica', False)
+        if request.method not in ('GET', 'HEAD') or not modo:
+            return None
+        if modo == 'anonimos' and request.user.is_authenticated:
+            return None
+        # Las vistas que guardan lo que leen declaran la caché en cache_llenada
+        cache_llenada = getattr(vista, 'cache_llenada', None)
+        if cache_llenada and invalidacion_reciente(cache_llenada):
+            return None
+        _leer_de_replica.set(True)
+        return None
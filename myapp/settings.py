@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .basedatos import configuracion_postgresql
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,11 +50,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myapp.tiempos.ServerTimingMiddleware',
+    'myapp.consultas.PresupuestoConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'myapp.replica.ReplicaMiddleware',
+    'myapp.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -60,7 +67,8 @@ ROOT_URLCONF = 'myapp.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que mide el render para la cabecera Server-Timing
+        'BACKEND': 'myapp.tiempos.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,6 +94,161 @@ DATABASES = {
     }
 }
 
+# Pragmas del perfil de producción de SQLite, aplicados al abrir cada conexión:
+# WAL deja leer mientras se escribe, NORMAL sólo sincroniza el disco en
+# los checkpoints y el resto mantiene páginas y temporales en memoria
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # en KiB
+    'temp_store': 'MEMORY',
+}
+
+# Perfil de producción de SQLite. Las transacciones empiezan con BEGIN
+# IMMEDIATE, que toma el bloqueo de escritura al comenzar y espera hasta
+# `timeout` segundos (busy_timeout) si otro lo tiene, en lugar de fallar con
+# "database is locked" al pasar de lectura a escritura a mitad de la
+# transacción (las de inscripcion/services.py leen antes de escribir)
+SQLITE_PERFIL_PRODUCCION = {
+    'init_command': ';'.join(f'PRAGMA {pragma}={valor}' for pragma, valor in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
+if os.environ.get('GESTION_SQLITE_PERFIL') == 'produccion':
+    DATABASES['default']['OPTIONS'] = SQLITE_PERFIL_PRODUCCION
+
+# Con GESTION_DB_MOTOR=postgresql la base es PostgreSQL, con conexiones
+# persistentes o el pool nativo (ver myapp/basedatos.py). Con
+# postgresql-temporal los tests corren contra un cluster temporal
+# (ver myapp/test_runner.py).
+if os.environ.get('GESTION_DB_MOTOR') == 'postgresql':
+    DATABASES['default'] = configuracion_postgresql()
+
+# Réplica de lectura para reportes y catálogo público (ver myapp/replica.py):
+# otra base PostgreSQL (variables GESTION_DB_REPLICA_*) o, con SQLite,
+# otro archivo, por ejemplo una copia de db.sqlite3
+REPLICA_LECTURA = None
+if os.environ.get('GESTION_DB_REPLICA_NOMBRE'):
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES['replica'] = configuracion_postgresql(prefijo='GESTION_DB_REPLICA_')
+    else:
+        DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.environ['GESTION_DB_REPLICA_NOMBRE']}
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    REPLICA_LECTURA = 'replica'
+
+DATABASE_ROUTERS = ['myapp.replica.ReplicaRouter']
+
+# Retraso máximo que se asume para la réplica: durante estos segundos
+# después de invalidar el catálogo o el reporte general, se reconstruyen
+# leyendo de la principal para no cachear datos viejos. Si la réplica se
+# atrasa más, esas cachés pueden quedar viejas hasta su TTL.
+REPLICA_RETRASO_MAXIMO_SEGUNDOS = int(os.environ.get('GESTION_DB_REPLICA_RETRASO_MAXIMO', 5))
+
+# Segundos que quien escribió (por ejemplo, al inscribirse) lee de la base
+# principal, hasta que la réplica tenga sus cambios
+REPLICA_LECTURA_PROPIA_SEGUNDOS = REPLICA_RETRASO_MAXIMO_SEGUNDOS
+
+TEST_RUNNER = 'myapp.test_runner.TestRunner'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Con GESTION_CACHE_REDIS_URL (por ejemplo redis://localhost:6379/0) la cache
+# es Redis, compartida por todos los procesos (requiere `pip install redis`).
+# Sin ella cada proceso tiene la suya en memoria, lo que sólo alcanza para
+# desarrollo: la idempotencia de las inscripciones necesita una compartida
+if os.environ.get('GESTION_CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['GESTION_CACHE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gestion-academica',
+        }
+    }
+
+# Segundos que se conserva el reporte general del dashboard
+REPORTE_GENERAL_CACHE_TTL = 300
+
+# Segundos que se conservan las páginas y fragmentos del catálogo público
+# (las claves incluyen la generación del catálogo, que cambia con cada edición)
+CATALOGO_CACHE_TTL = 600
+
+# Segundos que se conserva la oferta académica de cada carrera
+OFERTA_ACADEMICA_CACHE_TTL = 30
+
+# Segundos que se conserva el total aproximado de los listados paginados por cursor
+PAGINACION_TOTAL_CACHE_TTL = 60
+
+# Servir las variantes asíncronas de las vistas del portal de alumnos y del
+# catálogo (gestion_academica/views_async.py). myapp/asgi.py lo activa.
+VISTAS_ASYNC = os.environ.get('GESTION_VISTAS_ASYNC') == '1'
+
+# Cola de inscripciones para el período de inscripción: las inscripciones de
+# los alumnos se encolan y las aplica el worker de procesar_inscripciones
+COLA_INSCRIPCION_ACTIVA = os.environ.get('GESTION_COLA_INSCRIPCION') == '1'
+
+# Solicitudes en espera a partir de las cuales se rechazan las nuevas
+COLA_INSCRIPCION_MAXIMO_PENDIENTES = 10000
+
+
+# Segundos que se conserva el resultado de una inscripción del portal para
+# responder igual a los pedidos repetidos con la misma clave de idempotencia.
+# Requiere una cache compartida entre procesos (GESTION_CACHE_REDIS_URL):
+# fuera de DEBUG, con LocMemCache las claves se ignoran y cada proceso lo
+# advierte al iniciar (ver InscripcionIdempotenteService)
+INSCRIPCION_IDEMPOTENCIA_TTL = 600
+
+# Presupuesto de consultas por request (myapp/consultas.py), para desarrollo
+# y CI: GESTION_PRESUPUESTO_CONSULTAS=1 agrega la cabecera X-Consultas y
+# registra los excesos como warnings; =estricto además hace fallar el request
+PRESUPUESTO_CONSULTAS_ACTIVO = os.environ.get('GESTION_PRESUPUESTO_CONSULTAS') in ('1', 'estricto')
+PRESUPUESTO_CONSULTAS_ESTRICTO = os.environ.get('GESTION_PRESUPUESTO_CONSULTAS') == 'estricto'
+
+# Consultas por request para las URLs que no figuran en PRESUPUESTO_CONSULTAS
+PRESUPUESTO_CONSULTAS_DEFECTO = 8
+
+# Veces que puede repetirse una consulta con distintos parámetros antes de
+# señalarla como un posible N+1
+PRESUPUESTO_CONSULTAS_SIMILARES = 5
+
+# Consultas máximas por nombre de URL (incluye sesión, usuario y grupos)
+PRESUPUESTO_CONSULTAS = {
+    # Escrituras: validan, actualizan el cupo y atienden la lista de espera
+    'inscribirse': 10,
+    'anotarse_lista_espera': 10,
+    'inscripcion_baja': 10,
+    # Listados paginados: no deben crecer con la cantidad de filas
+    'usuario_list': 7,
+    'carrera_list': 6,
+    'materia_list': 7,
+    'alumno_list': 6,
+    'inscripcion_list': 6,
+    # API pública, sin sesión
+    'api_carreras': 2,
+    'api_materias': 2,
+}
+
+# Cabecera Server-Timing (myapp/tiempos.py) con los tiempos de db, render, auth
+# y total de cada request. Cualquiera puede leerla, así que fuera de DEBUG sólo
+# se agrega con GESTION_SERVER_TIMING=1
+SERVER_TIMING_ACTIVO = os.environ.get('GESTION_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+
+# Perfilado con cProfile (myapp/perfilado.py): con GESTION_PERFILADO=1 los
+# administradores perfilan un request agregando ?perfilar=1 a la URL, y se
+# perfila además la fracción GESTION_PERFILADO_MUESTREO de todos los requests.
+# `python manage.py resumir_perfiles` resume los perfiles guardados.
+PERFILADO_ACTIVO = os.environ.get('GESTION_PERFILADO') == '1'
+PERFILADO_MUESTREO = float(os.environ.get('GESTION_PERFILADO_MUESTREO', '0'))
+PERFILADO_DIRECTORIO = Path(os.environ.get('GESTION_PERFILADO_DIRECTORIO', BASE_DIR / 'perfiles'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,43 @@
+"""
+Runner de tests del proyecto (ver TEST_RUNNER en settings.py)
+"""
+
+import os
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from .basedatos import configuracion_postgresql
+from .postgres_temporal import ClusterPostgresTemporal
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Con GESTION_DB_MOTOR=postgresql-temporal corre los tests contra un
+    cluster de PostgreSQL temporal que inicia antes de cargar los tests y
+    detiene al terminar, por ejemplo:
+
+        GESTION_DB_MOTOR=postgresql-temporal python manage.py test
+        GESTION_DB_MOTOR=postgresql-temporal GESTION_DB_POOL=1 python manage.py test --tag=estres
+    """
+    cluster = None
+
+    def setup_test_environment(self, **kwargs):
+        if os.environ.get('GESTION_DB_MOTOR') == 'postgresql-temporal':
+            self.cluster = ClusterPostgresTemporal().iniciar()
+            self.log(f'PostgreSQL temporal en {self.cluster.directorio}')
+            _usar_base(configuracion_postgresql({**os.environ, **self.cluster.entorno()}))
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        if self.cluster is not None:
+            connections.close_all()
+            self.cluster.detener()
+
+
+def _usar_base(configuracion):
+    """Reemplaza la base 'default' antes de que se abra cualquier conexión"""
+    connections['default'].close()
+    del connections['default']
+    connections.settings['default'] = connections.configure_settings({'default': configuracion})['default']
@@ -0,0 +1,88 @@
+"""
+Cabecera Server-Timing con el tiempo de cada request repartido en db
+(consultas SQL), render (plantillas), auth (hash de contraseñas) y total
+(ver SERVER_TIMING_ACTIVO en settings.py). Los navegadores la muestran en
+la pestaña de red de las herramientas de desarrollo.
+
+Los tiempos se solapan: render incluye las consultas de los querysets que
+se evalúan en la plantilla y total lo incluye todo. Cualquier otro bloque
+se agrega a la cabecera con medir('nombre'), como bloque o decorador.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as backend_django
+
+from .consultas import RegistroConsultas
+
+_tiempos = ContextVar('server_timing', default=None)
+
+
+@contextmanager
+def medir(nombre):
+    """Suma la duración del bloque a la métrica `nombre` del request en curso"""
+    tiempos = _tiempos.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if tiempos is not None:
+            tiempos[nombre] = tiempos.get(nombre, 0) + time.perf_counter() - inicio
+
+
+class DjangoTemplates(backend_django.DjangoTemplates):
+    """
+    Backend de plantillas de Django que mide el render de cada plantilla
+    (los include y extends quedan dentro del tiempo de la principal)
+    """
+
+    def from_string(self, template_code):
+        return PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return PlantillaMedida(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            backend_django.reraise(exc, self)
+
+
+class PlantillaMedida(backend_django.Template):
+
+    def render(self, context=None, request=None):
+        with medir('render'):
+            return super().render(context, request)
+
+
+class ServerTimingMiddleware:
+    """
+    Agrega la cabecera Server-Timing. Va primero en MIDDLEWARE para que
+    total incluya al resto de los middlewares.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ACTIVO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tiempos = {}
+        registro = RegistroConsultas()
+        token = _tiempos.set(tiempos)
+        inicio = time.perf_counter()
+        try:
+            with registro.registrar():
+                response = self.get_response(request)
+        finally:
+            _tiempos.reset(token)
+        total = time.perf_counter() - inicio
+
+        metricas = [f'db;dur={registro.tiempo_ms:.1f};desc="{registro.total} consultas"']
+        metricas += [f'{nombre};dur={segundos * 1000:.1f}' for nombre, segundos in tiempos.items()]
+        metricas.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(metricas)
+        return response
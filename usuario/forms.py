@@ -1,6 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
+
+from myapp.tiempos import medir
+
 from .models import Usuario
 from .services import UsuarioService
 
@@ -23,6 +26,7 @@ class LoginForm(AuthenticationForm):
         })
     )
 
+    @medir('auth')
     def clean(self):
         email = self.cleaned_data.get('username')
         password = self.cleaned_data.get('password')
@@ -66,6 +70,7 @@ class CambiarPasswordForm(forms.Form):
         self.user = user
         super().__init__(*args, **kwargs)
 
+    @medir('auth')
     def clean_password_actual(self):
         password_actual = self.cleaned_data.get('password_actual')
         if not self.user.check_password(password_actual):
@@ -163,7 +168,6 @@ class UsuarioForm(forms.ModelForm):
         if not password:
             password = self.cleaned_data['username']
         
-            usuario.set_password(password)
             usuario.set_password(password)
             usuario.primer_login = True
         
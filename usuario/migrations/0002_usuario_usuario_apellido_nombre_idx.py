@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='usuario_apellido_nombre_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group
 from django.core.validators import RegexValidator
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 
 class Usuario(AbstractUser):
     email = models.EmailField(unique=True, verbose_name='Correo Electrónico')
@@ -17,24 +19,59 @@ class Usuario(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    # Nombres de grupos ya resueltos para esta instancia (ver nombres_grupos)
+    _nombres_grupos = None
+
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # Orden alfabético de usuarios y alumnos, con id como desempate del cursor
+            models.Index(fields=['last_name', 'first_name', 'id'], name='usuario_apellido_nombre_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.get_rol_display()})"
 
+    @property
+    def nombres_grupos(self):
+        """
+        Nombres de los grupos del usuario. Se consultan una única vez por
+        instancia (request.user vive lo que dura el request) y se toman de
+        prefetch_related('groups') si ya fueron precargados.
+        """
+        if self._nombres_grupos is None:
+            precargados = getattr(self, '_prefetched_objects_cache', {})
+            if 'groups' in precargados:
+                nombres = [grupo.name for grupo in precargados['groups']]
+            else:
+                nombres = self.groups.values_list('name', flat=True)
+            self._nombres_grupos = tuple(sorted(nombres))
+        return self._nombres_grupos
+
+    def tiene_grupo(self, nombre):
+        return nombre in self.nombres_grupos
+    
+    async def atiene_grupo(self, nombre):
+        """Versión de tiene_grupo para vistas asíncronas"""
+        precargados = getattr(self, '_prefetched_objects_cache', {})
+        if self._nombres_grupos is None and 'groups' not in precargados:
+            self._nombres_grupos = tuple(sorted(
+                [nombre_grupo async for nombre_grupo in self.groups.values_list('name', flat=True)]
+            ))
+        return self.tiene_grupo(nombre)
+
     @property
     def rol(self):
         if self.is_superuser:
             return 'administrador'
-        if self.groups.filter(name='Administradores').exists():
+        if self.tiene_grupo('Administradores'):
             return 'administrador'
-        elif self.groups.filter(name='Alumnos').exists():
+        elif self.tiene_grupo('Alumnos'):
             return 'alumno'
-        elif self.groups.filter(name='Docentes').exists():
+        elif self.tiene_grupo('Docentes'):
             return 'docente'
-        elif self.groups.filter(name='Preceptores').exists():
+        elif self.tiene_grupo('Preceptores'):
             return 'preceptor'
         else:
             return 'invitado'
@@ -63,7 +100,7 @@ class Usuario(AbstractUser):
         from django.db import transaction
         
         with transaction.atomic():
-            usuario = cls.objects.create(
+            usuario = cls(
                 username=username,
                 first_name=first_name,
                 last_name=last_name,
@@ -71,7 +108,7 @@ class Usuario(AbstractUser):
                 is_active=True
             )
             
-            # Establecer contraseña
+            # Establecer contraseña antes del único save (un solo hash)
             if password:
                 usuario.set_password(password)
             else:
@@ -86,3 +123,13 @@ class Usuario(AbstractUser):
                 pass  # El grupo se creará con el comando crear_grupos
             
             return usuario
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def invalidar_nombres_grupos(sender, instance, action, **kwargs):
+    """
+    Signal que descarta los grupos resueltos cuando cambian los grupos
+    del usuario, para que la instancia vuelva a consultarlos.
+    """
+    if isinstance(instance, Usuario) and action in ('post_add', 'post_remove', 'post_clear'):
+        instance._nombres_grupos = None
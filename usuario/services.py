@@ -1,5 +1,8 @@
 from django.db import transaction, IntegrityError
 from django.core.exceptions import ValidationError
+
+from myapp.tiempos import medir
+
 from .models import Usuario
 
 class UsuarioService:
@@ -40,6 +43,7 @@ class UsuarioService:
             raise ValidationError(f'Error de integridad: {str(e)}')
     
     @staticmethod
+    @medir('auth')
     def cambiar_password_primer_login(usuario, nueva_password):
         """
         Cambia la contraseña en el primer login
@@ -53,6 +57,7 @@ class UsuarioService:
         return usuario
     
     @staticmethod
+    @medir('auth')
     def autenticar_usuario(email, password):
         """
         Autentica un usuario por email y contraseña
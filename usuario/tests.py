@@ -1,3 +1,51 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Usuario
+
+
+class RolUsuarioTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.administradores = Group.objects.create(name='Administradores')
+        self.alumnos = Group.objects.create(name='Alumnos')
+        self.usuario = Usuario.objects.create(
+            username='12345678', email='admin@test.com', first_name='Ada', last_name='Lovelace',
+            password='x', primer_login=False
+        )
+        self.usuario.groups.add(self.administradores)
+
+    def test_grupos_se_resuelven_una_vez(self):
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(usuario.rol, 'administrador')
+            self.assertEqual(usuario.get_rol_display(), 'Administrador')
+            self.assertEqual(str(usuario), 'Ada Lovelace (Administrador)')
+            self.assertFalse(usuario.tiene_grupo('Alumnos'))
+
+    def test_cambio_de_grupos_invalida(self):
+        self.assertEqual(self.usuario.rol, 'administrador')
+        self.usuario.groups.set([self.alumnos])
+        self.assertEqual(self.usuario.rol, 'alumno')
+
+    def test_grupos_precargados(self):
+        usuarios = list(Usuario.objects.prefetch_related('groups'))
+        with self.assertNumQueries(0):
+            self.assertEqual([u.rol for u in usuarios], ['administrador'])
+
+    def test_paginas_consultan_grupos_una_sola_vez(self):
+        self.client.force_login(self.usuario)
+        for nombre in ('dashboard', 'carrera_list', 'usuario_list'):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(reverse(nombre))
+            self.assertEqual(respuesta.status_code, 200)
+            consultas_grupos = [
+                q['sql'] for q in consultas.captured_queries
+                if 'auth_group' in q['sql'] and 'usuario_usuario_groups"."usuario_id" =' in q['sql']
+            ]
+            self.assertEqual(len(consultas_grupos), 1, nombre)
@@ -1,5 +1,5 @@
 from django.shortcuts import redirect, render
-from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
+from django.contrib.auth.mixins import AccessMixin, UserPassesTestMixin, LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views import View
@@ -9,6 +9,8 @@ from django.views.generic import (
 from django.core.exceptions import ValidationError
 from django.contrib.auth import login, logout
 
+from gestion_academica.paginacion import CursorPaginationMixin
+
 from .models import Usuario
 from .forms import CambiarPasswordForm, LoginForm, UsuarioForm
 
@@ -16,7 +18,7 @@ class AdminRequiredMixin(UserPassesTestMixin):
     """Mixin que requiere grupo de administrador"""
     def test_func(self):
         return (self.request.user.is_authenticated and 
-                self.request.user.groups.filter(name='Administradores').exists())
+                self.request.user.tiene_grupo('Administradores'))
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para acceder a esta página.')
@@ -27,7 +29,34 @@ class AlumnoRequiredMixin(UserPassesTestMixin):
     """Mixin que requiere grupo de alumno"""
     def test_func(self):
         return (self.request.user.is_authenticated and 
-                self.request.user.groups.filter(name='Alumnos').exists())
+                self.request.user.tiene_grupo('Alumnos'))
+    
+    def handle_no_permission(self):
+        messages.error(self.request, 'No tienes permisos para acceder a esta página.')
+        return redirect('dashboard')
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin para vistas asíncronas: resuelve el usuario con
+    request.auser() y lo deja en request.user, de modo que el resto de la
+    vista no dispare consultas sincrónicas desde el event loop.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not await self.atest_func():
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+    
+    async def atest_func(self):
+        return self.request.user.is_authenticated
+
+
+class AsyncAlumnoRequiredMixin(AsyncLoginRequiredMixin):
+    """AlumnoRequiredMixin para vistas asíncronas"""
+    async def atest_func(self):
+        return (self.request.user.is_authenticated and
+                await self.request.user.atiene_grupo('Alumnos'))
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para acceder a esta página.')
@@ -91,15 +120,16 @@ class CambiarPasswordView(LoginRequiredMixin, View):
         return render(request, self.template_name, {'form': form})
 
 
-class UsuarioListView(AdminRequiredMixin, ListView):
+class UsuarioListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """Lista todos los usuarios"""
     model = Usuario
     template_name = 'gestion_academica/usuarios/list.html'
     context_object_name = 'usuarios'
     paginate_by = 10
+    orden_cursor = ('last_name', 'first_name', 'id')
     
     def get_queryset(self):
-        return Usuario.objects.filter(is_active=True).order_by('last_name', 'first_name')
+        return Usuario.objects.filter(is_active=True).prefetch_related('groups')
 
 
 class UsuarioCreateView(AdminRequiredMixin, CreateView):